@@ -0,0 +1,144 @@
+"""Fills an empty database with seeded synthetic brokers, clients, properties and sales.
+
+The same scale and seed always produce the same rows, so benchmark runs on
+different machines or backends read comparable data. Rows are written with
+one executemany() per chunk, then the report tables are rebuilt.
+
+Usage:
+    python -m benchmarks.data_generator 100k
+    REAL_ESTATE_DB_BACKEND=sqlite python -m benchmarks.data_generator 1m --seed 7
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+
+from controllers.report_controller import rebuild
+from utils.db_helper import current_transaction, execute_query, fetch_rows, transactional
+
+# scale -> rows per table
+SCALES = {
+    "1k": {"brokers": 10, "clients": 300, "properties": 1_000, "sales": 400},
+    "100k": {"brokers": 200, "clients": 30_000, "properties": 100_000, "sales": 40_000},
+    "1m": {"brokers": 2_000, "clients": 300_000, "properties": 1_000_000, "sales": 400_000},
+}
+DEFAULT_SEED = 42
+CHUNK_SIZE = 5_000
+
+TYPES = ("apartment", "house", "land", "commercial")
+TYPE_PRICE_PER_SQM = (20_000, 25_000, 8_000, 30_000)
+LOCATIONS = (
+    "Maadi", "Zamalek", "Heliopolis", "Nasr City", "New Cairo", "Sheikh Zayed",
+    "6th of October", "Dokki", "Mohandessin", "Garden City", "Downtown", "Shubra",
+    "Rehab City", "Madinaty", "Obour", "Helwan", "Mokattam", "Agouza", "Giza",
+    "Haram", "Ain Shams", "Abbasia", "Manial", "Sayeda Zeinab", "El Tagamoa",
+    "Katameya", "Shorouk", "Badr City", "Zahraa Maadi", "Smouha",
+)
+# Relative price level per location (index-aligned with LOCATIONS)
+LOCATION_FACTORS = np.linspace(0.6, 1.8, len(LOCATIONS))
+FIRST_SALE_DATE = datetime.date(2020, 1, 1)
+SALE_DAYS = 6 * 365
+
+@transactional
+def _write_chunk(query, rows):
+    cursor = current_transaction().cursor()
+    try:
+        cursor.executemany(query, rows)
+    finally:
+        cursor.close()
+
+def _insert(table, columns, rows, chunk_size):
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), chunk_size):
+        _write_chunk(query, rows[start:start + chunk_size])
+    # Read the ids back: AUTO_INCREMENT need not start at 1
+    _, id_rows = fetch_rows(f"SELECT id FROM {table} ORDER BY id")
+    return np.array([row[0] for row in id_rows], dtype=np.int64)
+
+def _preferences(rng, count):
+    types = rng.integers(0, len(TYPES), count)
+    locations = rng.integers(0, len(LOCATIONS), count)
+    low = rng.integers(5, 30, count) * 10
+    budget = rng.integers(1, 40, count) / 2
+    return [
+        f"{TYPES[t]} in {LOCATIONS[l]}, {lo}-{lo + 50} sqm, under {b:g} million"
+        for t, l, lo, b in zip(types.tolist(), locations.tolist(), low.tolist(), budget.tolist())
+    ]
+
+def generate(scale="1k", seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE, log=print):
+    """Writes the rows for `scale` (a key of SCALES) into the configured database.
+
+    The database must have no properties yet. Returns the row counts written.
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale {scale!r}; expected one of {', '.join(SCALES)}")
+    if execute_query("SELECT COUNT(*) AS n FROM properties", fetch=True)[0]["n"]:
+        raise RuntimeError("The database already has properties; generate into an empty one")
+    counts = SCALES[scale]
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    n = counts["brokers"]
+    broker_ids = _insert("brokers", ("name", "years_experience"), list(zip(
+        [f"Broker {i}" for i in range(1, n + 1)],
+        rng.integers(0, 30, n).tolist(),
+    )), chunk_size)
+    log(f"brokers     {n:>9,}")
+
+    n = counts["clients"]
+    client_brokers = broker_ids[rng.integers(0, len(broker_ids), n)].tolist()
+    unassigned = rng.random(n) < 0.1
+    client_ids = _insert("clients", ("name", "contact", "preferences", "broker_id"), list(zip(
+        [f"Client {i}" for i in range(1, n + 1)],
+        [f"client{i}@example.com" for i in range(1, n + 1)],
+        _preferences(rng, n),
+        [None if skip else broker for skip, broker in zip(unassigned.tolist(), client_brokers)],
+    )), chunk_size)
+    log(f"clients     {n:>9,}")
+
+    n = counts["properties"]
+    types = rng.integers(0, len(TYPES), n)
+    locations = rng.integers(0, len(LOCATIONS), n)
+    sizes = rng.integers(40, 400, n)
+    prices = np.round(sizes * np.take(TYPE_PRICE_PER_SQM, types) * LOCATION_FACTORS[locations]
+                      * rng.uniform(0.8, 1.2, n), -3)
+    property_brokers = broker_ids[rng.integers(0, len(broker_ids), n)]
+    property_ids = _insert("properties", ("location", "type", "size", "price", "status", "broker_id"), list(zip(
+        [LOCATIONS[i] for i in locations.tolist()],
+        [TYPES[i] for i in types.tolist()],
+        sizes.tolist(),
+        prices.tolist(),
+        ["available"] * n,
+        property_brokers.tolist(),
+    )), chunk_size)
+    log(f"properties  {n:>9,}")
+
+    n = counts["sales"]
+    sold = rng.choice(len(property_ids), size=n, replace=False)
+    sold.sort()
+    days = rng.integers(0, SALE_DAYS, n)
+    _insert("sales", ("property_id", "client_id", "broker_id", "date", "final_price"), list(zip(
+        property_ids[sold].tolist(),
+        client_ids[rng.integers(0, len(client_ids), n)].tolist(),
+        property_brokers[sold].tolist(),
+        [FIRST_SALE_DATE + datetime.timedelta(days=d) for d in days.tolist()],
+        np.round(prices[sold] * rng.uniform(0.9, 1.05, n), 2).tolist(),
+    )), chunk_size)
+    execute_query("UPDATE properties SET status = 'sold' WHERE id IN (SELECT property_id FROM sales)")
+    log(f"sales       {n:>9,}")
+
+    rebuild()
+    log(f"Generated {scale} data (seed {seed}) in {time.perf_counter() - started:.1f}s")
+    return dict(counts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill an empty database with synthetic data.")
+    parser.add_argument("scale", choices=list(SCALES))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    generate(args.scale, args.seed, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+"""Benchmarks every controller function and GUI panel refresh on synthetic data.
+
+Each case is called repeatedly (up to --iterations calls or --budget seconds)
+on a database filled by benchmarks.data_generator, and reports throughput
+and p50/p99 latency. The first call is timed separately as cold, since it
+also fills caches and in-memory indexes. Writes run on rows the benchmark
+creates itself and removes again at the end.
+
+Results can be written as JSON (--output) and compared with a stored
+baseline; any case whose p50 got slower by more than --threshold fails
+the run, so hot path regressions show up in CI. Every run also times a
+fixed calibration workload (calibrate()); baseline timings are scaled by
+the ratio of the two calibrations, so a baseline recorded on a faster or
+slower machine doesn't read as a regression. Compare on the same backend
+and scale.
+
+Usage:
+    python -m benchmarks.run                          # embedded SQLite, 1k scale
+    python -m benchmarks.run --scale 100k --output results.json
+    python -m benchmarks.run --save-baseline          # store as benchmarks/baselines/sqlite_1k.json
+    python -m benchmarks.run --only "property.*" --iterations 50
+    python -m benchmarks.run --backend mysql          # the database in config/db_config.py
+"""
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.data_generator import DEFAULT_SEED, LOCATIONS, SCALES, TYPES, generate
+from controllers import analytics_controller, broker_controller, change_controller, client_controller
+from controllers import export_controller, match_controller, property_controller, report_controller
+from controllers import sale_controller, search_controller
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+from models.sale import Sale
+from utils.db_backend import get_backend, use_backend
+from utils.db_helper import execute_query, fetch_rows
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+ITERATIONS = 200
+BUDGET = 2.0        # seconds per case
+THRESHOLD = 0.5      # allowed p50 slowdown against the baseline (0.5 = 50%)
+MIN_DELTA_MS = 0.25  # slowdowns smaller than this are noise, whatever the ratio
+CALIBRATION_ROUNDS = 25  # runs of the calibration workload, before and after the cases
+
+
+class _Context:
+    """Ids to call the cases with, and the rows the write cases created."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.ids = {}
+        for table in ("brokers", "clients", "properties", "sales"):
+            _, rows = fetch_rows(f"SELECT id FROM {table} ORDER BY id")
+            self.ids[table] = [row[0] for row in rows]
+        self.created = {table: [] for table in self.ids}
+        self.sold = []  # created properties used up by sales; deleted at the end
+        self.export_path = os.path.join(tempfile.gettempdir(), "real_estate_bench_export.csv")
+
+    def pick(self, table):
+        return self.random.choice(self.ids[table])
+
+    def picks(self, table, count):
+        return self.random.sample(self.ids[table], min(count, len(self.ids[table])))
+
+    def date_range(self, days=30):
+        start = datetime.date(2020, 1, 1) + datetime.timedelta(days=self.random.randrange(6 * 365 - days))
+        return start, start + datetime.timedelta(days=days)
+
+    def new_broker(self):
+        return Broker(None, f"Bench broker {self.random.randrange(10**6)}", self.random.randrange(30))
+
+    def new_client(self):
+        return Client(None, f"Bench client {self.random.randrange(10**6)}", "bench@example.com",
+                      f"{self.random.choice(TYPES)} in {self.random.choice(LOCATIONS)}", self.pick("brokers"))
+
+    def new_property(self):
+        size = self.random.randrange(40, 400)
+        return Property(None, self.random.choice(LOCATIONS), self.random.choice(TYPES), size,
+                        size * 20_000, "available", self.pick("brokers"))
+
+    def new_sale(self):
+        property_id = self.created_id("properties", keep=False)
+        self.sold.append(property_id)
+        return Sale(None, property_id, self.pick("clients"), self.pick("brokers"),
+                    self.date_range(0)[0], self.random.randrange(500_000, 5_000_000))
+
+    def changed_sale(self):
+        # Same property: moving a sale to a seeded property would change that property's data
+        sale = sale_controller.get_sale_by_id(self.created_id("sales"))
+        return Sale(sale.id, sale.property_id, self.pick("clients"), self.pick("brokers"),
+                    self.date_range(0)[0], self.random.randrange(500_000, 5_000_000))
+
+    def created_id(self, table, keep=True):
+        """Returns a row created by an earlier case (creating one, untimed, if there is none)."""
+        if not self.created[table]:
+            self.created[table].append(_CREATE[table](self))
+        return self.created[table][-1] if keep else self.created[table].pop()
+
+    def add(self, table, row_id):
+        self.created[table].append(row_id)
+        return row_id
+
+
+_CREATE = {
+    "brokers": lambda ctx: broker_controller.add_broker(ctx.new_broker()),
+    "clients": lambda ctx: client_controller.add_client(ctx.new_client()),
+    "properties": lambda ctx: property_controller.add_property(ctx.new_property()),
+    "sales": lambda ctx: sale_controller.add_sale(ctx.new_sale()),
+}
+
+def _args(*args, **kwargs):
+    return args, kwargs
+
+# (name, function, arguments(ctx) -> (args, kwargs), result(ctx, returned value) or None)
+# Arguments are built outside the timed call. Write cases come in create,
+# update, delete order so later ones can use the rows earlier ones created.
+CASES = [
+    ("broker.get_all_brokers", broker_controller.get_all_brokers, lambda c: _args(), None),
+    ("broker.get_brokers_frame", broker_controller.get_brokers_frame, lambda c: _args(), None),
+    ("broker.get_brokers_page", broker_controller.get_brokers_page, lambda c: _args(after_id=c.pick("brokers")), None),
+    ("broker.get_broker_by_id", broker_controller.get_broker_by_id, lambda c: _args(c.pick("brokers")), None),
+    ("broker.get_brokers_by_ids", broker_controller.get_brokers_by_ids, lambda c: _args(c.picks("brokers", 50)), None),
+    ("broker.get_broker_sales", broker_controller.get_broker_sales, lambda c: _args(c.pick("brokers")), None),
+    ("client.get_all_clients", client_controller.get_all_clients, lambda c: _args(), None),
+    ("client.get_clients_frame", client_controller.get_clients_frame, lambda c: _args(c.pick("brokers")), None),
+    ("client.get_clients_page", client_controller.get_clients_page,
+     lambda c: _args(after_id=c.pick("clients"), broker_id=c.pick("brokers")), None),
+    ("client.get_client_by_id", client_controller.get_client_by_id, lambda c: _args(c.pick("clients")), None),
+    ("client.get_clients_by_ids", client_controller.get_clients_by_ids, lambda c: _args(c.picks("clients", 50)), None),
+    ("client.get_client_sales", client_controller.get_client_sales, lambda c: _args(c.pick("clients")), None),
+    ("client.get_clients_by_broker_id", client_controller.get_clients_by_broker_id, lambda c: _args(c.pick("brokers")), None),
+    ("property.get_all_properties", property_controller.get_all_properties, lambda c: _args(), None),
+    ("property.get_properties_frame", property_controller.get_properties_frame,
+     lambda c: _args(status="available", broker_id=c.pick("brokers")), None),
+    ("property.get_properties_page", property_controller.get_properties_page,
+     lambda c: _args(after_id=c.pick("properties"), status="available"), None),
+    ("property.get_property_by_id", property_controller.get_property_by_id, lambda c: _args(c.pick("properties")), None),
+    ("property.get_properties_by_ids", property_controller.get_properties_by_ids,
+     lambda c: _args(c.picks("properties", 50)), None),
+    ("property.get_available_properties", property_controller.get_available_properties, lambda c: _args(), None),
+    ("property.get_property_sales", property_controller.get_property_sales, lambda c: _args(c.pick("properties")), None),
+    ("property.inventory_summary", property_controller.inventory_summary, lambda c: _args(status="available"), None),
+    ("property.find_properties", property_controller.find_properties, lambda c: _args(
+        {"type": c.random.choice(TYPES), "location": c.random.choice(LOCATIONS)[:3], "max_price": 3_000_000},
+        sort="-price", limit=50), None),
+    ("sale.get_all_sales", sale_controller.get_all_sales, lambda c: _args(), None),
+    ("sale.get_sales_frame", sale_controller.get_sales_frame, lambda c: _args(*c.date_range(365)), None),
+    ("sale.get_sales_page", sale_controller.get_sales_page,
+     lambda c: _args(after_id=c.pick("sales"), broker_id=c.pick("brokers")), None),
+    ("sale.get_sale_by_id", sale_controller.get_sale_by_id, lambda c: _args(c.pick("sales")), None),
+    ("sale.get_sales_by_ids", sale_controller.get_sales_by_ids, lambda c: _args(c.picks("sales", 50)), None),
+    ("sale.validate_sale_references", sale_controller.validate_sale_references, lambda c: _args(
+        c.pick("properties"), c.pick("clients"), c.pick("brokers"), c.pick("sales")), None),
+    ("sale.get_sales_by_date_range", sale_controller.get_sales_by_date_range, lambda c: _args(*c.date_range()), None),
+    ("sale.get_sales_by_broker_id", sale_controller.get_sales_by_broker_id, lambda c: _args(c.pick("brokers")), None),
+    ("sale.get_sale_details", sale_controller.get_sale_details, lambda c: _args(broker_id=c.pick("brokers")), None),
+    ("sale.get_sale_details_page", sale_controller.get_sale_details_page,
+     lambda c: _args(after_id=c.pick("sales"), broker_id=c.pick("brokers")), None),
+    ("sale.get_sale_detail", sale_controller.get_sale_detail, lambda c: _args(c.pick("sales")), None),
+    ("sale.sales_summary", sale_controller.sales_summary, lambda c: _args("month", c.date_range(365)), None),
+    ("report.sales_report", report_controller.sales_report,
+     lambda c: _args("month", "broker", c.date_range(365)), None),
+    ("report.inventory_report", report_controller.inventory_report, lambda c: _args(), None),
+    ("change.get_change_token", change_controller.get_change_token, lambda c: _args(), None),
+    ("change.get_changes_since", change_controller.get_changes_since, lambda c: _args(0, ["properties"], 1000), None),
+    ("search.search_properties", search_controller.search_properties, lambda c: _args(
+        f"{c.random.choice(LOCATIONS)} {c.random.choice(TYPES)}", filters={"status": "available"}), None),
+    ("search.search_clients", search_controller.search_clients, lambda c: _args(c.random.choice(LOCATIONS)), None),
+    ("match.get_matches_for_client", match_controller.get_matches_for_client, lambda c: _args(c.pick("clients")), None),
+    ("match.get_interested_clients", match_controller.get_interested_clients, lambda c: _args(c.pick("properties")), None),
+    ("analytics.load_sales_frame", analytics_controller.load_sales_frame, lambda c: _args(*c.date_range(365)), None),
+    ("export.export", export_controller.export, lambda c: _args("sales_detail", c.export_path), None),
+
+    ("broker.add_broker", broker_controller.add_broker, lambda c: _args(c.new_broker()),
+     lambda c, broker_id: c.add("brokers", broker_id)),
+    ("broker.update_broker", broker_controller.update_broker, lambda c: _args(
+        Broker(c.created_id("brokers"), "Bench broker", c.random.randrange(30))), None),
+    ("client.add_client", client_controller.add_client, lambda c: _args(c.new_client()),
+     lambda c, client_id: c.add("clients", client_id)),
+    ("client.update_client", client_controller.update_client, lambda c: _args(
+        Client(c.created_id("clients"), "Bench client", "bench@example.com", "house in Maadi", c.pick("brokers"))), None),
+    ("client.assign_broker_to_client", client_controller.assign_broker_to_client,
+     lambda c: _args(c.created_id("clients"), c.pick("brokers")), None),
+    ("property.add_property", property_controller.add_property, lambda c: _args(c.new_property()),
+     lambda c, property_id: c.add("properties", property_id)),
+    ("property.update_property", property_controller.update_property, lambda c: _args(Property(
+        c.created_id("properties"), "Maadi", "apartment", 120, 2_400_000, "available", c.pick("brokers"))), None),
+    ("property.assign_broker_to_property", property_controller.assign_broker_to_property,
+     lambda c: _args(c.created_id("properties"), c.pick("brokers")), None),
+    ("sale.add_sale", sale_controller.add_sale, lambda c: _args(c.new_sale()),
+     lambda c, sale_id: c.add("sales", sale_id)),
+    ("sale.update_sale", sale_controller.update_sale, lambda c: _args(c.changed_sale()), None),
+    ("sale.delete_sale", sale_controller.delete_sale, lambda c: _args(c.created_id("sales", keep=False)), None),
+    ("property.delete_property", property_controller.delete_property,
+     lambda c: _args(c.created_id("properties", keep=False)), None),
+    ("client.delete_client", client_controller.delete_client, lambda c: _args(c.created_id("clients", keep=False)), None),
+    ("broker.delete_broker", broker_controller.delete_broker, lambda c: _args(c.created_id("brokers", keep=False)), None),
+]
+
+def _cleanup(ctx):
+    """Removes whatever the write cases created and did not delete."""
+    for sale_id in ctx.created["sales"]:
+        sale_controller.delete_sale(sale_id)
+    for property_id in ctx.created["properties"] + ctx.sold:
+        property_controller.delete_property(property_id)
+    for client_id in ctx.created["clients"]:
+        client_controller.delete_client(client_id)
+    for broker_id in ctx.created["brokers"]:
+        broker_controller.delete_broker(broker_id)
+    if os.path.exists(ctx.export_path):
+        os.remove(ctx.export_path)
+
+def _summary(cold, durations):
+    durations = np.array(durations) * 1000
+    return {
+        "calls": len(durations),
+        "ops_per_sec": round(len(durations) / (durations.sum() / 1000), 2) if durations.sum() else None,
+        "cold_ms": round(cold * 1000, 3),
+        "mean_ms": round(float(durations.mean()), 3),
+        "p50_ms": round(float(np.percentile(durations, 50)), 3),
+        "p99_ms": round(float(np.percentile(durations, 99)), 3),
+    }
+
+def _measure(call, prepare, iterations, budget):
+    """Times call(*prepare()) once cold, then up to `iterations` times within `budget` seconds."""
+    args, kwargs = prepare()
+    started = time.perf_counter()
+    call(*args, **kwargs)
+    cold = time.perf_counter() - started
+
+    durations = []
+    deadline = time.perf_counter() + budget
+    while len(durations) < iterations and (not durations or time.perf_counter() < deadline):
+        args, kwargs = prepare()
+        started = time.perf_counter()
+        call(*args, **kwargs)
+        durations.append(time.perf_counter() - started)
+    return _summary(cold, durations)
+
+def run_controllers(ctx, only=None, iterations=ITERATIONS, budget=BUDGET, log=print):
+    results = {}
+    for name, function, arguments, result in CASES:
+        if only and not fnmatch.fnmatch(name, only):
+            continue
+
+        def call(*args, **kwargs):
+            value = function(*args, **kwargs)
+            if result is not None:
+                result(ctx, value)
+
+        results[name] = _measure(call, lambda: arguments(ctx), iterations, budget)
+        log(_format(name, results[name]))
+    return results
+
+# (result name, panel class name, role, table whose id is the user_id or None)
+PANELS = [
+    ("panel.clients", "ClientPanel", "Admin", None),
+    ("panel.clients_broker", "ClientPanel", "Broker", "brokers"),
+    ("panel.brokers", "BrokerPanel", "Admin", None),
+    ("panel.properties", "PropertyPanel", "Admin", None),
+    ("panel.sales", "SalePanel", "Admin", None),
+    ("panel.sales_broker", "SalePanel", "Broker", "brokers"),
+]
+
+def _panel_refresher(root, panel_class, role, user_id):
+    """Returns a function doing one refresh_data() of a panel, waiting until it is on screen.
+
+    Without a display (root is None) the panel is built without widgets and
+    the function runs the part of refresh_data() that does not touch Tk: the
+    worker's fetch of the first page and the row values built from it.
+    """
+    if root is None:
+        panel = panel_class.__new__(panel_class)
+        panel.role, panel.user_id = role, user_id
+
+        def refresh():
+            if panel.virtual_mode:
+                items = panel.fetch_page(after_id=None, before_id=None, limit=panel.PAGE_SIZE).items
+            else:
+                items = panel.fetch_all()
+            for item in items:
+                panel.row_values(item)
+        return refresh
+
+    panel = panel_class(root, role, user_id)
+
+    def refresh():
+        panel.refresh_data()
+        while panel.runner.busy:
+            root.update()
+            time.sleep(0.0005)
+    refresh()  # the first load happened in the constructor; start from a full table
+    return refresh
+
+def run_panels(ctx, only=None, iterations=ITERATIONS, budget=BUDGET, log=print):
+    """Times refresh_data() of every panel; returns (results, mode)."""
+    from gui import panels
+
+    root = None
+    try:
+        import tkinter
+
+        root = tkinter.Tk()
+        root.withdraw()
+        panels.BasePanel.setup_styles()
+        mode = "tk"
+    except Exception:
+        mode = "headless"
+    results = {}
+    try:
+        for name, class_name, role, user_table in PANELS:
+            if only and not fnmatch.fnmatch(name, only):
+                continue
+            user_id = ctx.pick(user_table) if user_table else None
+            refresh = _panel_refresher(root, getattr(panels, class_name), role, user_id)
+            results[name] = _measure(refresh, lambda: ((), {}), iterations, budget)
+            log(_format(name, results[name]))
+    finally:
+        if root is not None:
+            root.destroy()
+    return results, mode
+
+def _format(name, result):
+    return (f"{name:40} {result['calls']:>5} calls  {result['ops_per_sec'] or 0:>10,.1f}/s  "
+            f"p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  cold {result['cold_ms']:>9.3f} ms")
+
+def calibrate(rounds=CALIBRATION_ROUNDS):
+    """Returns the median time, in ms, of a fixed SQLite and Python workload on this machine."""
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, k INT, v REAL)")
+        conn.executemany("INSERT INTO t (k, v) VALUES (?, ?)", ((i % 97, i * 0.5) for i in range(5000)))
+        conn.execute("CREATE INDEX t_k ON t (k)")
+        conn.execute("SELECT k, COUNT(*), SUM(v) FROM t GROUP BY k").fetchall()
+        for k in range(97):
+            conn.execute("SELECT * FROM t WHERE k = ? ORDER BY id LIMIT 50", (k,)).fetchall()
+        conn.close()
+        sorted({f"key{i}": i for i in range(5000)}.items(), reverse=True)
+        durations.append(time.perf_counter() - started)
+    return round(float(np.median(durations)) * 1000, 3)
+
+def machine_factor(results, baseline):
+    """How much slower this machine is than the baseline's (1.0 when either run has no calibration)."""
+    now, then = results.get("meta", {}).get("calibration_ms"), baseline.get("meta", {}).get("calibration_ms")
+    return now / then if now and then else 1.0
+
+def compare(results, baseline, metric="p50_ms", threshold=THRESHOLD):
+    """Returns [(case, baseline ms, current ms)] for every case whose `metric` got slower.
+
+    Baseline timings are scaled by machine_factor() first and reported scaled.
+    """
+    factor = machine_factor(results, baseline)
+    regressions = []
+    for section in ("controllers", "panels"):
+        old, new = baseline.get(section, {}), results.get(section, {})
+        for name in sorted(set(old) & set(new)):
+            before, after = old[name][metric] * factor, new[name][metric]
+            if after > before * (1 + threshold) and after - before > MIN_DELTA_MS:
+                regressions.append((name, before, after))
+    return regressions
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(BASELINE_DIR), check=True).stdout.strip()
+    except Exception:
+        return None
+
+def prepare_database(backend, scale, seed, path=None, log=print):
+    """Points the app at the benchmark database, generating the data if it is empty."""
+    if backend == "sqlite":
+        path = path or os.path.join(tempfile.gettempdir(), f"real_estate_bench_{scale}_{seed}.sqlite3")
+        log(f"Using SQLite database {path}")
+        use_backend("sqlite", path=path)
+    elif backend != get_backend().name:
+        use_backend(backend)
+    if not execute_query("SELECT COUNT(*) AS n FROM properties", fetch=True)[0]["n"]:
+        generate(scale, seed, log=log)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark controller functions and panel refreshes.")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--db", dest="path", help="SQLite file (default: one per scale and seed in the temp directory)")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--only", help="run only the cases matching this pattern, e.g. 'sale.*' or 'panel.*'")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS, help="calls per case (after the cold one)")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="seconds per case")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="baseline JSON to compare with (default: baselines/<backend>_<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed p50 slowdown, 0.5 = 50%%")
+    args = parser.parse_args(argv)
+
+    prepare_database(args.backend, args.scale, args.seed, args.path)
+    # Before and after the cases, so a machine that speeds up or slows down midway averages out
+    calibration_ms = calibrate()
+    ctx = _Context(args.seed)
+    try:
+        controllers = run_controllers(ctx, args.only, args.iterations, args.budget)
+        panels, panel_mode = run_panels(ctx, args.only, args.iterations, args.budget)
+    finally:
+        _cleanup(ctx)
+    calibration_ms = round((calibration_ms + calibrate()) / 2, 3)
+    print(f"Calibration workload: {calibration_ms:.3f} ms")
+
+    results = {
+        "meta": {
+            "backend": args.backend,
+            "scale": args.scale,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "budget": args.budget,
+            "panel_mode": panel_mode,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "calibration_ms": calibration_ms,
+        },
+        "controllers": controllers,
+        "panels": panels,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.backend}_{args.scale}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if "calibration_ms" not in baseline.get("meta", {}):
+            print(f"  note: {baseline_path} has no calibration; its timings are compared unscaled")
+        else:
+            print(f"Baseline timings scaled by {machine_factor(results, baseline):.2f} for this machine")
+        # p99 of sub-millisecond calls is too noisy to fail on; it is only reported
+        for name, before, after in compare(results, baseline, "p99_ms", args.threshold * 2):
+            print(f"  note: {name} p99 {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+        regressions = compare(results, baseline, "p50_ms", args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {baseline_path}:")
+            for name, before, after in regressions:
+                print(f"  {name} p50: {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+            sys.exit(1)
+        print(f"\nNo regressions against {baseline_path}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,41 @@
-import mysql.connector
+import os
+
+# Storage backend (see utils/db_backend.py): "mysql", or "sqlite" for an embedded
+# database file that needs no server (tests, benchmarks, demos)
+DB_BACKEND = os.environ.get("REAL_ESTATE_DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("REAL_ESTATE_SQLITE_PATH", "real_estate.sqlite3")
+
+MYSQL_HOST = os.environ.get("REAL_ESTATE_DB_HOST", "localhost")
+MYSQL_USER = os.environ.get("REAL_ESTATE_DB_USER", "root")
+MYSQL_PASSWORD = os.environ.get("REAL_ESTATE_DB_PASSWORD", "A2d3e5l7")
+MYSQL_DATABASE = os.environ.get("REAL_ESTATE_DB_NAME", "real_estate_db")
+
+# Connection pool settings (see utils/db_pool.py)
+POOL_SIZE = 5             # connections kept open and reused
+POOL_MAX_OVERFLOW = 5     # extra connections allowed under load, closed when returned
+POOL_TIMEOUT = 10         # seconds to wait for a free connection before giving up
+POOL_MAX_LIFETIME = 1800  # seconds before a connection is closed and replaced
+POOL_HEALTH_CHECK = True  # ping connections when they are checked out
+
+# Statement caching (see utils/db_backend.py)
+PREPARED_STATEMENTS = True   # MySQL: run parameterized statements as server-side prepared statements
+STATEMENT_CACHE_SIZE = 128   # prepared statements kept per connection (both backends)
+
+# Query instrumentation (see utils/query_stats.py)
+QUERY_STATS = True        # time and count every statement sent on a pooled connection
+SLOW_QUERY_SECONDS = float(os.environ.get("REAL_ESTATE_SLOW_QUERY_SECONDS", "0.5"))  # logged when slower
+METRICS_PORT = int(os.environ.get("REAL_ESTATE_METRICS_PORT", "0")) or None  # serve /metrics when set
+
+# Change feed (see controllers/change_controller.py)
+CHANGE_GAP_TIMEOUT = 30   # seconds a missing change_log id is waited for before it is taken as rolled back
+CHANGE_GAP_WINDOW = 1000  # ids below the newest that get_change_token() checks for uncommitted writes
+
+# Entity cache for get_*_by_id lookups (see utils/entity_cache.py)
+ENTITY_CACHE_SIZE = 1024  # entries kept before the least recently used is dropped
+ENTITY_CACHE_TTL = 30     # seconds an entry is served before it is re-read
 
 def get_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="A2d3e5l7",
-        database="real_estate_db",
-    )
\ No newline at end of file
+    """Opens a new connection on the configured backend."""
+    from utils.db_backend import get_backend
+
+    return get_backend().connect()
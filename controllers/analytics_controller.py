@@ -0,0 +1,170 @@
+"""Sales analytics computed with vectorized pandas/NumPy operations.
+
+load_sales_frame() reads sales joined with their property and broker in one
+query into a columnar DataFrame; every other function works on that frame
+with groupby/array operations only, so millions of sales take seconds.
+
+Usage:
+    python -m controllers.analytics_controller revenue --by broker
+    python -m controllers.analytics_controller price-per-sqm --by location --from 2024-01-01
+    python -m controllers.analytics_controller time-on-market --by type
+    python -m controllers.analytics_controller yoy --by location --csv yoy.csv
+"""
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.db_helper import fetch_frame
+
+# --by choices -> frame column(s) to group on. Brokers are grouped by id (two
+# brokers can share a name), with the name alongside for display.
+GROUPINGS = {
+    "broker": ["broker_id", "broker_name"],
+    "month": "month",
+    "type": "property_type",
+    "location": "location",
+}
+
+# Properties listed before listed_at could be backfilled from the change feed
+# (migrations/009) have no listing date and are left out of time-on-market figures.
+_SALES_QUERY = """
+    SELECT s.id, s.date, s.final_price, s.broker_id, b.name AS broker_name,
+           s.property_id, p.type AS property_type, p.location, p.size,
+           p.listed_at
+    FROM sales s
+    JOIN properties p ON s.property_id = p.id
+    JOIN brokers b ON s.broker_id = b.id
+"""
+
+def load_sales_frame(start_date=None, end_date=None, broker_id=None):
+    """Returns one row per sale with its property and broker columns.
+
+    Adds derived columns month (Period), year, price_per_sqm and
+    days_on_market (NaN when the listing date is unknown).
+    """
+    conditions, values = [], []
+    if start_date is not None:
+        conditions.append("s.date >= %s")
+        values.append(start_date)
+    if end_date is not None:
+        conditions.append("s.date <= %s")
+        values.append(end_date)
+    if broker_id is not None:
+        conditions.append("s.broker_id = %s")
+        values.append(broker_id)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    frame = fetch_frame(_SALES_QUERY + where + " ORDER BY s.id", tuple(values) or None)
+    return add_derived_columns(frame)
+
+def add_derived_columns(frame):
+    """Adds month, year, price_per_sqm and days_on_market to a sales frame."""
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["listed_at"] = pd.to_datetime(frame["listed_at"])
+    frame["final_price"] = frame["final_price"].astype("float64")
+    for column in ("broker_name", "property_type", "location"):
+        # Few distinct values, many rows: categoricals group much faster
+        frame[column] = frame[column].astype("category")
+    frame["month"] = frame["date"].dt.to_period("M")
+    frame["year"] = frame["date"].dt.year
+    size = frame["size"].astype("float64").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frame["price_per_sqm"] = np.where(size > 0, frame["final_price"].to_numpy() / size, np.nan)
+    days = (frame["date"] - frame["listed_at"].dt.normalize()).dt.days
+    frame["days_on_market"] = days.where(days >= 0)
+    return frame
+
+def _group_column(by):
+    if by not in GROUPINGS:
+        raise ValueError(f"Cannot group by {by!r}; expected one of {', '.join(GROUPINGS)}")
+    return GROUPINGS[by]
+
+def revenue(frame, by):
+    """Total, count and average sale price per broker, month, type or location."""
+    column = _group_column(by)
+    result = frame.groupby(column, observed=True, sort=True)["final_price"].agg(
+        revenue="sum", sales="count", average_price="mean"
+    )
+    if by != "month":
+        result = result.sort_values("revenue", ascending=False)
+    return result
+
+def median_price_per_sqm(frame, by=None):
+    """Median of final_price / size, overall (a one-row frame) or per group."""
+    valid = frame.loc[frame["price_per_sqm"].notna()]
+    if by is None:
+        return pd.DataFrame({
+            "median_price_per_sqm": [valid["price_per_sqm"].median()],
+            "sales": [len(valid)],
+        })
+    grouped = valid.groupby(_group_column(by), observed=True, sort=True)["price_per_sqm"]
+    return grouped.agg(median_price_per_sqm="median", sales="count")
+
+def time_on_market(frame, by=None):
+    """Days from listing to sale: median, mean and 90th percentile, overall or per group."""
+    valid = frame.loc[frame["days_on_market"].notna()]
+    if by is None:
+        days = valid["days_on_market"]
+        return pd.DataFrame({
+            "median_days": [days.median()],
+            "mean_days": [days.mean()],
+            "p90_days": [days.quantile(0.9)],
+            "sales": [len(days)],
+        })
+    grouped = valid.groupby(_group_column(by), observed=True, sort=True)["days_on_market"]
+    return grouped.agg(median_days="median", mean_days="mean",
+                       p90_days=lambda days: days.quantile(0.9), sales="count")
+
+def yoy_growth(frame, by=None):
+    """Revenue per year with growth over the previous year, overall or per group.
+
+    growth is a fraction (0.25 = +25%) and NaN for a group's first year.
+    Years with no sales in a group are counted as zero revenue.
+    """
+    if by == "month":
+        raise ValueError("yoy_growth already groups by year; use broker, type or location")
+    if by is None:
+        yearly = frame.groupby("year", sort=True)["final_price"].sum().to_frame("revenue")
+        yearly["growth"] = yearly["revenue"].pct_change()
+        return yearly
+    column = _group_column(by)
+    yearly = frame.pivot_table(index="year", columns=column, values="final_price",
+                               aggfunc="sum", fill_value=0.0, observed=True)
+    growth = yearly.pct_change().replace([np.inf, -np.inf], np.nan)
+    levels = list(range(yearly.columns.nlevels))
+    result = pd.concat({"revenue": yearly.stack(levels, future_stack=True),
+                        "growth": growth.stack(levels, future_stack=True)}, axis=1)
+    # (year, group...) -> (group..., year)
+    return result.reorder_levels([*range(1, len(levels) + 1), 0]).sort_index()
+
+REPORTS = {
+    "revenue": revenue,
+    "price-per-sqm": median_price_per_sqm,
+    "time-on-market": time_on_market,
+    "yoy": yoy_growth,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sales analytics reports.")
+    parser.add_argument("report", choices=list(REPORTS))
+    parser.add_argument("--by", choices=list(GROUPINGS), help="group by (required for revenue)")
+    parser.add_argument("--from", dest="start_date", type=datetime.date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end_date", type=datetime.date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--broker", dest="broker_id", type=int)
+    parser.add_argument("--csv", dest="csv_path", help="write the result to a CSV file instead of printing it")
+    args = parser.parse_args(argv)
+    if args.report == "revenue" and args.by is None:
+        parser.error("revenue needs --by")
+
+    frame = load_sales_frame(args.start_date, args.end_date, args.broker_id)
+    result = REPORTS[args.report](frame, args.by)
+    if args.csv_path:
+        result.to_csv(args.csv_path)
+        print(f"Wrote {len(result):,} rows to {args.csv_path}")
+    else:
+        with pd.option_context("display.max_rows", 200, "display.float_format", "{:,.2f}".format):
+            print(result)
+
+if __name__ == "__main__":
+    main()
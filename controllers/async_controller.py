@@ -0,0 +1,378 @@
+"""Asyncio versions of the broker, client, property and sale controllers.
+
+Each function has the name, arguments and result of its synchronous
+counterpart and runs the same SQL on utils.async_db connections, so a
+batch job or an async service can await many of them at once:
+
+    from controllers import async_controller as db
+
+    sales, clients = await asyncio.gather(db.get_broker_sales(7), db.get_clients_by_broker_id(7))
+
+Writes keep the report summaries, the change log and the entity cache
+current exactly as the synchronous controllers do; both can be used in
+the same process. Call await async_db.close_pool() before the event loop
+ends.
+"""
+from contextlib import asynccontextmanager
+
+from controllers.change_controller import delete_statements
+from controllers.report_controller import summary_statements
+from controllers.sale_controller import SALE_DETAIL_SELECT
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+from models.sale import Sale
+from models.sale_detail import SaleDetail
+from utils.async_db import current_transaction, execute_query, fetch_by_ids, fetch_models, paginate, transaction, transactional
+from utils.entity_cache import entity_cache
+
+# The get_*_sales joins: every sales column plus the names it refers to
+SALES_JOIN = """
+    SELECT s.*,
+           p.location as property_location,
+           c.name as client_name,
+           b.name as broker_name
+    FROM sales s
+    JOIN properties p ON s.property_id = p.id
+    JOIN clients c ON s.client_id = c.id
+    JOIN brokers b ON s.broker_id = b.id
+"""
+
+def _invalidate(kind, entity_id=None):
+    # Same as entity_cache.invalidate(): once now and once after the commit
+    # of the open transaction, which entity_cache cannot see from here
+    drop = (lambda: entity_cache.invalidate(kind, entity_id)) if entity_id is not None \
+        else (lambda: entity_cache.invalidate_kind(kind))
+    drop()
+    tx = current_transaction()
+    if tx is not None:
+        tx.on_commit(drop)
+
+async def _execute_all(statements):
+    for query, values in statements:
+        await execute_query(query, values)
+
+async def include(sales=None, properties=None):
+    """report_controller.include() for the asyncio layer."""
+    await _execute_all(summary_statements(sales, properties, 1))
+
+@asynccontextmanager
+async def maintained(sales=None, properties=None):
+    """report_controller.maintained() for the asyncio layer."""
+    async with transaction():
+        await _execute_all(summary_statements(sales, properties, -1))
+        yield
+        await _execute_all(summary_statements(sales, properties, 1))
+
+@transactional
+async def delete_and_log_cascades(table, row_id):
+    """change_controller.delete_and_log_cascades() for the asyncio layer."""
+    await _execute_all(delete_statements(table, row_id))
+    return True
+
+
+# Brokers
+
+async def add_broker(broker: Broker):
+    query = """
+        INSERT INTO brokers (name, years_experience)
+        VALUES (%s, %s)
+    """
+    broker_id = await execute_query(query, (broker.name, broker.years_experience))
+    _invalidate("brokers", broker_id)
+    return broker_id
+
+async def get_all_brokers():
+    return await fetch_models("brokers", Broker)
+
+async def get_brokers_page(after_id=None, limit=100, before_id=None, with_total=True):
+    return await paginate("brokers", Broker, after_id=after_id, before_id=before_id,
+                          limit=limit, with_total=with_total)
+
+@entity_cache.cached_async("brokers")
+async def get_broker_by_id(broker_id):
+    rows = await execute_query("SELECT * FROM brokers WHERE id = %s", (broker_id,), fetch=True)
+    return Broker.from_dict(rows[0]) if rows else None
+
+async def get_brokers_by_ids(broker_ids):
+    rows = await fetch_by_ids("SELECT * FROM brokers", broker_ids)
+    return {row['id']: Broker.from_dict(row) for row in rows}
+
+async def update_broker(broker: Broker):
+    query = """
+        UPDATE brokers
+        SET name = %s, years_experience = %s
+        WHERE id = %s
+    """
+    await execute_query(query, (broker.name, broker.years_experience, broker.id))
+    _invalidate("brokers", broker.id)
+    return True
+
+@transactional
+async def delete_broker(broker_id):
+    async with maintained(sales=("s.broker_id = %s", (broker_id,))):
+        deleted = await delete_and_log_cascades("brokers", broker_id)
+    _invalidate("brokers", broker_id)
+    # The FKs delete this broker's sales and unassign their clients and properties
+    for kind in ("sales", "clients", "properties"):
+        _invalidate(kind)
+    return deleted
+
+async def get_broker_sales(broker_id):
+    return await execute_query(SALES_JOIN + " WHERE s.broker_id = %s", (broker_id,), fetch=True)
+
+
+# Clients
+
+async def add_client(client: Client):
+    query = """
+        INSERT INTO clients (name, contact, preferences, broker_id)
+        VALUES (%s, %s, %s, %s)
+    """
+    client_id = await execute_query(query, (client.name, client.contact, client.preferences, client.broker_id))
+    _invalidate("clients", client_id)
+    return client_id
+
+async def get_all_clients():
+    return await fetch_models("clients", Client)
+
+async def get_clients_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    conditions, values = ([], []) if broker_id is None else (["broker_id = %s"], [broker_id])
+    return await paginate("clients", Client, conditions, values, after_id=after_id,
+                          before_id=before_id, limit=limit, with_total=with_total)
+
+async def assign_broker_to_client(client_id, broker_id):
+    await execute_query("UPDATE clients SET broker_id = %s WHERE id = %s", (broker_id, client_id))
+    _invalidate("clients", client_id)
+
+@entity_cache.cached_async("clients")
+async def get_client_by_id(client_id):
+    query = """
+        SELECT c.*, b.name as broker_name
+        FROM clients c
+        LEFT JOIN brokers b ON c.broker_id = b.id
+        WHERE c.id = %s
+    """
+    rows = await execute_query(query, (client_id,), fetch=True)
+    return Client.from_dict(rows[0]) if rows else None
+
+async def get_clients_by_ids(client_ids):
+    rows = await fetch_by_ids("SELECT * FROM clients", client_ids)
+    return {row['id']: Client.from_dict(row) for row in rows}
+
+async def update_client(client: Client):
+    query = """
+        UPDATE clients
+        SET name = %s, contact = %s, preferences = %s, broker_id = %s
+        WHERE id = %s
+    """
+    await execute_query(query, (client.name, client.contact, client.preferences, client.broker_id, client.id))
+    _invalidate("clients", client.id)
+    return True
+
+@transactional
+async def delete_client(client_id):
+    async with maintained(sales=("s.client_id = %s", (client_id,))):
+        deleted = await delete_and_log_cascades("clients", client_id)
+    _invalidate("clients", client_id)
+    _invalidate("sales")  # the FK deletes this client's sales
+    return deleted
+
+async def get_client_sales(client_id):
+    return await execute_query(SALES_JOIN + " WHERE s.client_id = %s", (client_id,), fetch=True)
+
+async def get_clients_by_broker_id(broker_id):
+    return await fetch_models("clients", Client, ["broker_id = %s"], [broker_id])
+
+
+# Properties
+
+@transactional
+async def add_property(property_obj: Property):
+    query = """
+        INSERT INTO properties (location, type, size, price, status, broker_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    values = (property_obj.location, property_obj.type, property_obj.size,
+              property_obj.price, property_obj.status, property_obj.broker_id)
+    property_id = await execute_query(query, values)
+    await include(properties=("p.id = %s", (property_id,)))
+    _invalidate("properties", property_id)
+    return property_id
+
+async def get_all_properties():
+    return await fetch_models("properties", Property)
+
+async def get_properties_page(after_id=None, limit=100, status=None, broker_id=None, before_id=None, with_total=True):
+    conditions, values = [], []
+    if status is not None:
+        conditions.append("status = %s")
+        values.append(status)
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    return await paginate("properties", Property, conditions, values, after_id=after_id,
+                          before_id=before_id, limit=limit, with_total=with_total)
+
+async def assign_broker_to_property(property_id, broker_id):
+    await execute_query("UPDATE properties SET broker_id = %s WHERE id = %s", (broker_id, property_id))
+    _invalidate("properties", property_id)
+
+@entity_cache.cached_async("properties")
+async def get_property_by_id(property_id):
+    query = """
+        SELECT p.*, b.name as broker_name
+        FROM properties p
+        LEFT JOIN brokers b ON p.broker_id = b.id
+        WHERE p.id = %s
+    """
+    rows = await execute_query(query, (property_id,), fetch=True)
+    return Property.from_dict(rows[0]) if rows else None
+
+async def get_properties_by_ids(property_ids):
+    rows = await fetch_by_ids("SELECT * FROM properties", property_ids)
+    return {row['id']: Property.from_dict(row) for row in rows}
+
+@transactional
+async def update_property(property_obj: Property):
+    query = """
+        UPDATE properties
+        SET location = %s, type = %s, size = %s, price = %s, status = %s, broker_id = %s
+        WHERE id = %s
+    """
+    values = (property_obj.location, property_obj.type, property_obj.size, property_obj.price,
+              property_obj.status, property_obj.broker_id, property_obj.id)
+    # Type/location are report dimensions of this property's sales too
+    async with maintained(sales=("s.property_id = %s", (property_obj.id,)),
+                          properties=("p.id = %s", (property_obj.id,))):
+        await execute_query(query, values)
+    _invalidate("properties", property_obj.id)
+    return True
+
+@transactional
+async def delete_property(property_id):
+    async with maintained(sales=("s.property_id = %s", (property_id,)),
+                          properties=("p.id = %s", (property_id,))):
+        deleted = await delete_and_log_cascades("properties", property_id)
+    _invalidate("properties", property_id)
+    _invalidate("sales")  # the FK deletes this property's sales
+    return deleted
+
+async def get_available_properties():
+    query = """
+        SELECT p.*, b.name as broker_name
+        FROM properties p
+        LEFT JOIN brokers b ON p.broker_id = b.id
+        WHERE p.status = 'available'
+    """
+    rows = await execute_query(query, fetch=True)
+    return [Property.from_dict(row) for row in rows]
+
+async def get_property_sales(property_id):
+    return await execute_query(SALES_JOIN + " WHERE s.property_id = %s", (property_id,), fetch=True)
+
+
+# Sales
+
+@transactional
+async def add_sale(sale: Sale):
+    query = """
+        INSERT INTO sales (property_id, client_id, broker_id, date, final_price)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    values = (sale.property_id, sale.client_id, sale.broker_id, sale.date, sale.final_price)
+    sale_id = await execute_query(query, values)
+    await include(sales=("s.id = %s", (sale_id,)))
+    async with maintained(properties=("p.id = %s", (sale.property_id,))):
+        await execute_query("UPDATE properties SET status = 'sold' WHERE id = %s", (sale.property_id,))
+    _invalidate("sales", sale_id)
+    _invalidate("properties", sale.property_id)  # status is now 'sold'
+    return sale_id
+
+async def get_all_sales():
+    return await fetch_models("sales", Sale)
+
+async def get_sales_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    conditions, values = ([], []) if broker_id is None else (["broker_id = %s"], [broker_id])
+    return await paginate("sales", Sale, conditions, values, after_id=after_id,
+                          before_id=before_id, limit=limit, with_total=with_total)
+
+@entity_cache.cached_async("sales")
+async def get_sale_by_id(sale_id):
+    rows = await execute_query(SALES_JOIN + " WHERE s.id = %s", (sale_id,), fetch=True)
+    return Sale.from_dict(rows[0]) if rows else None
+
+async def get_sales_by_ids(sale_ids):
+    rows = await fetch_by_ids("SELECT * FROM sales", sale_ids)
+    return {row['id']: Sale.from_dict(row) for row in rows}
+
+async def validate_sale_references(property_id, client_id, broker_id, sale_id=None):
+    query = """
+        SELECT
+            EXISTS(SELECT 1 FROM properties WHERE id = %s) AS property_exists,
+            EXISTS(SELECT 1 FROM clients WHERE id = %s) AS client_exists,
+            EXISTS(SELECT 1 FROM brokers WHERE id = %s) AS broker_exists,
+            (SELECT broker_id FROM sales WHERE id = %s) AS sale_broker_id
+    """
+    rows = await execute_query(query, (property_id, client_id, broker_id, sale_id), fetch=True)
+    row = rows[0]
+    return {
+        'property_exists': bool(row['property_exists']),
+        'client_exists': bool(row['client_exists']),
+        'broker_exists': bool(row['broker_exists']),
+        'sale_broker_id': row['sale_broker_id'],
+    }
+
+@transactional
+async def update_sale(sale: Sale):
+    query = """
+        UPDATE sales
+        SET property_id = %s, client_id = %s, broker_id = %s, date = %s, final_price = %s
+        WHERE id = %s
+    """
+    values = (sale.property_id, sale.client_id, sale.broker_id, sale.date, sale.final_price, sale.id)
+    async with maintained(sales=("s.id = %s", (sale.id,))):
+        await execute_query(query, values)
+    _invalidate("sales", sale.id)
+    return True
+
+@transactional
+async def _delete_sale(sale_id):
+    rows = await execute_query("SELECT property_id FROM sales WHERE id = %s", (sale_id,), fetch=True)
+    if rows:
+        property_id = rows[0]['property_id']
+        async with maintained(properties=("p.id = %s", (property_id,))):
+            await execute_query("UPDATE properties SET status = 'available' WHERE id = %s", (property_id,))
+        _invalidate("properties", property_id)
+    async with maintained(sales=("s.id = %s", (sale_id,))):
+        await execute_query("DELETE FROM sales WHERE id = %s", (sale_id,))
+    _invalidate("sales", sale_id)
+
+async def delete_sale(sale_id):
+    try:
+        await _delete_sale(sale_id)
+        return True
+    except Exception as e:
+        print(f"Error deleting sale: {e}")
+        return False
+
+async def get_sales_by_date_range(start_date, end_date):
+    return await execute_query(SALES_JOIN + " WHERE s.date BETWEEN %s AND %s", (start_date, end_date), fetch=True)
+
+async def get_sales_by_broker_id(broker_id):
+    return await fetch_models("sales", Sale, ["broker_id = %s"], [broker_id])
+
+async def get_sale_details(broker_id=None):
+    conditions, values = ([], []) if broker_id is None else (["s.broker_id = %s"], [broker_id])
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    rows = await execute_query(f"{SALE_DETAIL_SELECT}{where} ORDER BY s.id", tuple(values) or None, fetch=True)
+    return [SaleDetail.from_dict(row) for row in rows]
+
+async def get_sale_details_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    conditions, values = ([], []) if broker_id is None else (["s.broker_id = %s"], [broker_id])
+    return await paginate("sales s", SaleDetail, conditions, values, after_id=after_id, before_id=before_id,
+                          limit=limit, with_total=with_total, select=SALE_DETAIL_SELECT, key="s.id")
+
+async def get_sale_detail(sale_id):
+    rows = await execute_query(f"{SALE_DETAIL_SELECT} WHERE s.id = %s", (sale_id,), fetch=True)
+    return SaleDetail.from_dict(rows[0]) if rows else None
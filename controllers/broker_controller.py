@@ -1,5 +1,8 @@
-from utils.db_helper import execute_query
+from utils.db_helper import execute_query, paginate, fetch_by_ids, fetch_models, fetch_frame, transactional
 from models.broker import Broker
+from utils.entity_cache import entity_cache
+from controllers.change_controller import delete_and_log_cascades
+from controllers.report_controller import maintained
 
 def add_broker(broker: Broker):
     query = """
@@ -7,18 +10,33 @@ def add_broker(broker: Broker):
         VALUES (%s, %s)
     """
     values = (broker.name, broker.years_experience)
-    execute_query(query, values)
+    broker_id = execute_query(query, values)
+    entity_cache.invalidate("brokers", broker_id)
+    return broker_id
 
 def get_all_brokers():
-    query = "SELECT * FROM brokers"
-    rows = execute_query(query, fetch=True)
-    return [Broker.from_dict(row) for row in rows]
+    return fetch_models("brokers", Broker)
+
+def get_brokers_frame():
+    """Returns every broker as a DataFrame with one column per Broker attribute."""
+    return fetch_frame(f"SELECT {', '.join(Broker.COLUMNS)} FROM brokers ORDER BY id")
+
+def get_brokers_page(after_id=None, limit=100, before_id=None, with_total=True):
+    """Returns one Page of brokers ordered by id."""
+    return paginate("brokers", Broker, after_id=after_id, before_id=before_id,
+                    limit=limit, with_total=with_total)
 
+@entity_cache.cached("brokers")
 def get_broker_by_id(broker_id):
     query = "SELECT * FROM brokers WHERE id = %s"
     rows = execute_query(query, (broker_id,), fetch=True)
     return Broker.from_dict(rows[0]) if rows else None
 
+def get_brokers_by_ids(broker_ids):
+    """Fetches many brokers in one query. Returns {id: Broker} for the ids that exist."""
+    rows = fetch_by_ids("SELECT * FROM brokers", broker_ids)
+    return {row['id']: Broker.from_dict(row) for row in rows}
+
 def update_broker(broker: Broker):
     query = """
         UPDATE brokers 
@@ -27,12 +45,19 @@ def update_broker(broker: Broker):
     """
     values = (broker.name, broker.years_experience, broker.id)
     execute_query(query, values)
+    entity_cache.invalidate("brokers", broker.id)
     return True
 
+@transactional
 def delete_broker(broker_id):
-    query = "DELETE FROM brokers WHERE id = %s"
-    execute_query(query, (broker_id,))
-    return True
+    # Goes through the change log helper so rows removed by FK cascades are recorded too
+    with maintained(sales=("s.broker_id = %s", (broker_id,))):
+        deleted = delete_and_log_cascades("brokers", broker_id)
+    entity_cache.invalidate("brokers", broker_id)
+    # The FKs delete this broker's sales and unassign their clients and properties
+    for kind in ("sales", "clients", "properties"):
+        entity_cache.invalidate_kind(kind)
+    return deleted
 
 def get_broker_sales(broker_id):
     query = """
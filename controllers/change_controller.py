@@ -0,0 +1,146 @@
+import threading
+import time
+
+from config import db_config
+from utils.db_backend import get_backend
+from utils.db_helper import execute_query, transactional
+
+# Tables whose inserts/updates/deletes are recorded in change_log by triggers (see schema.sql)
+TRACKED_TABLES = ("properties", "clients", "brokers", "sales")
+
+# MySQL does not fire triggers for rows changed by foreign key cascades, so
+# deleting a parent row logs the child rows it takes with it:
+# parent table -> [(child table, FK column, operation the cascade performs)]
+CASCADES = {
+    "brokers": [
+        ("sales", "broker_id", "delete"),
+        ("clients", "broker_id", "update"),
+        ("properties", "broker_id", "update"),
+    ],
+    "clients": [("sales", "client_id", "delete")],
+    "properties": [("sales", "property_id", "delete")],
+}
+
+# change_log ids are taken when a row is written but only become visible
+# when its transaction commits, so id 11 can show up before id 10. Tokens
+# never move past a missing id until it appears, or until it has been
+# missing for CHANGE_GAP_TIMEOUT seconds (its transaction rolled back).
+_gaps = {}  # first id of a run of missing ids -> time.monotonic() it was noticed
+_gaps_lock = threading.Lock()
+
+def _settled(after, upto):
+    """Returns the highest id in (after, upto] with no pending gap before it (or `after`)."""
+    if upto <= after:
+        return after
+    rows = execute_query("SELECT id FROM change_log WHERE id > %s AND id <= %s ORDER BY id",
+                         (after, upto), fetch=True)
+    now = time.monotonic()
+    settled = after
+    with _gaps_lock:
+        for row in rows:
+            if row["id"] != settled + 1:
+                noticed = _gaps.setdefault(settled + 1, now)
+                if now - noticed < db_config.CHANGE_GAP_TIMEOUT:
+                    break
+            settled = row["id"]
+        for gap in [gap for gap in _gaps if gap <= settled]:
+            del _gaps[gap]
+    return settled
+
+def get_change_token():
+    """Returns the token for "now".
+
+    To mirror a table, read this token first, then do the full read, then
+    poll get_changes_since(token) for everything that happened after it.
+    The token stops short of writes that may still be uncommitted, so those
+    are reported later instead of lost.
+    """
+    rows = execute_query("SELECT COALESCE(MAX(id), 0) AS token FROM change_log", fetch=True)
+    newest = rows[0]["token"]
+    return _settled(max(newest - db_config.CHANGE_GAP_WINDOW, 0), newest)
+
+def get_changes_since(token, tables=None, limit=1000):
+    """Returns (changes, next_token) for changes recorded after `token`.
+
+    Each change is a dict with table_name, row_id, operation and changed_at,
+    collapsed to one entry per row: the latest operation wins, except that a
+    row inserted and then updated within the batch is reported as 'insert'.
+    At most `limit` log entries are read per call; keep calling with
+    next_token until no changes come back. Entries after an id that is
+    still missing (an uncommitted write, see _settled()) are held back
+    until it commits or times out.
+    """
+    conditions = ["id > %s"]
+    values = [token or 0]
+    if tables:
+        conditions.append("table_name IN (" + ", ".join(["%s"] * len(tables)) + ")")
+        values.extend(tables)
+    query = f"""
+        SELECT id, table_name, row_id, operation, changed_at
+        FROM change_log
+        WHERE {" AND ".join(conditions)}
+        ORDER BY id
+        LIMIT %s
+    """
+    rows = execute_query(query, tuple(values) + (limit,), fetch=True)
+    if not rows:
+        return [], token or 0
+    next_token = _settled(token or 0, rows[-1]["id"])
+    rows = [row for row in rows if row["id"] <= next_token]
+    if not rows:
+        return [], next_token
+
+    latest = {}
+    for row in rows:
+        key = (row["table_name"], row["row_id"])
+        previous = latest.pop(key, None)
+        if previous and previous["operation"] == "insert" and row["operation"] == "update":
+            row["operation"] = "insert"
+        latest[key] = row  # re-inserted so the dict stays in log order
+
+    changes = [
+        {
+            "table_name": row["table_name"],
+            "row_id": row["row_id"],
+            "operation": row["operation"],
+            "changed_at": row["changed_at"],
+        }
+        for row in latest.values()
+    ]
+    return changes, next_token
+
+def purge_changes(before_token):
+    """Deletes change_log entries up to and including `before_token`."""
+    execute_query("DELETE FROM change_log WHERE id <= %s", (before_token,))
+    return True
+
+def delete_statements(table, row_id):
+    """Returns the (query, values) pairs deleting one row and logging its FK cascades.
+
+    Backends whose triggers see cascaded changes (SQLite) log them by
+    themselves, so only the DELETE is returned for them.
+    """
+    cascades = () if get_backend().triggers_on_cascade else CASCADES.get(table, ())
+    statements = [
+        (
+            f"""
+            INSERT INTO change_log (table_name, row_id, operation)
+            SELECT %s, id, %s FROM {child} WHERE {column} = %s
+            """,
+            (child, operation, row_id)
+        )
+        for child, column, operation in cascades
+    ]
+    statements.append((f"DELETE FROM {table} WHERE id = %s", (row_id,)))
+    return statements
+
+@transactional
+def delete_and_log_cascades(table, row_id):
+    """Deletes one row from `table`, logging the child rows its FK cascades change.
+
+    Both happen in one transaction so the log never records a cascade for a
+    delete that did not go through.
+    """
+    for query, values in delete_statements(table, row_id):
+        execute_query(query, values)
+    return True
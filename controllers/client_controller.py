@@ -1,6 +1,8 @@
-from utils.db_helper import execute_query
-from config.db_config import get_connection 
+from utils.db_helper import execute_query, paginate, fetch_by_ids, fetch_models, fetch_frame, transactional
 from models.client import Client
+from utils.entity_cache import entity_cache
+from controllers.change_controller import delete_and_log_cascades
+from controllers.report_controller import maintained
 
 def add_client(client: Client):
     query = """
@@ -13,18 +15,36 @@ def add_client(client: Client):
         client.preferences,
         client.broker_id
     )
-    execute_query(query, values)
+    client_id = execute_query(query, values)
+    entity_cache.invalidate("clients", client_id)
+    return client_id
 
 def get_all_clients():
-    query = "SELECT * FROM clients"
-    rows = execute_query(query, fetch=True)
-    return [Client.from_dict(row) for row in rows]
+    return fetch_models("clients", Client)
+
+def get_clients_frame(broker_id=None):
+    """Returns clients as a DataFrame (one column per Client attribute), optionally one broker's."""
+    query = f"SELECT {', '.join(Client.COLUMNS)} FROM clients"
+    if broker_id is not None:
+        return fetch_frame(query + " WHERE broker_id = %s ORDER BY id", (broker_id,))
+    return fetch_frame(query + " ORDER BY id")
+
+def get_clients_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    """Returns one Page of clients ordered by id, optionally only one broker's."""
+    conditions, values = [], []
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    return paginate("clients", Client, conditions, values, after_id=after_id,
+                    before_id=before_id, limit=limit, with_total=with_total)
 
 def assign_broker_to_client(client_id, broker_id):
     query = "UPDATE clients SET broker_id = %s WHERE id = %s"
     values = (broker_id, client_id)
     execute_query(query, values)
+    entity_cache.invalidate("clients", client_id)
 
+@entity_cache.cached("clients")
 def get_client_by_id(client_id):
     query = """
         SELECT c.*, b.name as broker_name 
@@ -35,6 +55,11 @@ def get_client_by_id(client_id):
     rows = execute_query(query, (client_id,), fetch=True)
     return Client.from_dict(rows[0]) if rows else None
 
+def get_clients_by_ids(client_ids):
+    """Fetches many clients in one query. Returns {id: Client} for the ids that exist."""
+    rows = fetch_by_ids("SELECT * FROM clients", client_ids)
+    return {row['id']: Client.from_dict(row) for row in rows}
+
 def update_client(client: Client):
     query = """
         UPDATE clients 
@@ -49,12 +74,17 @@ def update_client(client: Client):
         client.id
     )
     execute_query(query, values)
+    entity_cache.invalidate("clients", client.id)
     return True
 
+@transactional
 def delete_client(client_id):
-    query = "DELETE FROM clients WHERE id = %s"
-    execute_query(query, (client_id,))
-    return True
+    # Goes through the change log helper so rows removed by FK cascades are recorded too
+    with maintained(sales=("s.client_id = %s", (client_id,))):
+        deleted = delete_and_log_cascades("clients", client_id)
+    entity_cache.invalidate("clients", client_id)
+    entity_cache.invalidate_kind("sales")  # the FK deletes this client's sales
+    return deleted
 
 def get_client_sales(client_id):
     query = """
@@ -73,6 +103,4 @@ def get_client_sales(client_id):
 
 def get_clients_by_broker_id(broker_id):
     """Fetches clients associated with a specific broker ID."""
-    query = "SELECT * FROM clients WHERE broker_id = %s"
-    rows = execute_query(query, (broker_id,), fetch=True)
-    return [Client.from_dict(row) for row in rows]
+    return fetch_models("clients", Client, ["broker_id = %s"], [broker_id])
@@ -0,0 +1,291 @@
+"""Streams a table or report to CSV, JSONL or Parquet without loading it into memory.
+
+Rows are read with an unbuffered cursor (the server sends them as they are
+fetched) in batches of batch_size and written straight to the output file,
+so memory use stays flat however many rows there are.
+
+Usage:
+    python -m controllers.export_controller sales sales.csv.gz
+    python -m controllers.export_controller properties available.jsonl --status available --columns id,location,price
+    python -m controllers.export_controller sales_detail 2024.parquet --from 2024-01-01 --to 2024-12-31 --compression zstd
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import json
+from decimal import Decimal
+
+from utils.db_pool import pooled_connection
+
+_SALE_DETAIL_FROM = """sales s
+        JOIN properties p ON s.property_id = p.id
+        JOIN clients c ON s.client_id = c.id
+        JOIN brokers b ON s.broker_id = b.id"""
+
+# name -> FROM clause, exported columns (name -> SQL expression), filters (name -> column)
+EXPORT_SOURCES = {
+    "brokers": {
+        "from": "brokers",
+        "columns": {c: c for c in ("id", "name", "years_experience", "updated_at")},
+        "filters": {},
+    },
+    "clients": {
+        "from": "clients",
+        "columns": {c: c for c in ("id", "name", "contact", "preferences", "broker_id", "updated_at")},
+        "filters": {"broker_id": "broker_id"},
+    },
+    "properties": {
+        "from": "properties",
+        "columns": {c: c for c in ("id", "location", "type", "size", "price", "status", "broker_id", "updated_at")},
+        "filters": {"status": "status", "broker_id": "broker_id"},
+    },
+    "sales": {
+        "from": "sales",
+        "columns": {c: c for c in ("id", "property_id", "client_id", "broker_id", "date", "final_price", "updated_at")},
+        "filters": {"broker_id": "broker_id", "date": "date"},
+    },
+    # Same join as get_sale_by_id / get_*_sales
+    "sales_detail": {
+        "from": _SALE_DETAIL_FROM,
+        "columns": {
+            "id": "s.id",
+            "property_id": "s.property_id",
+            "client_id": "s.client_id",
+            "broker_id": "s.broker_id",
+            "date": "s.date",
+            "final_price": "s.final_price",
+            "property_location": "p.location",
+            "property_type": "p.type",
+            "client_name": "c.name",
+            "broker_name": "b.name",
+        },
+        "filters": {"broker_id": "s.broker_id", "date": "s.date", "status": "p.status"},
+    },
+}
+
+FORMATS = ("csv", "jsonl", "parquet")
+DEFAULT_BATCH_SIZE = 10000
+
+def build_query(source, columns=None, status=None, broker_id=None, start_date=None, end_date=None):
+    """Returns (sql, values, column names) for an export of `source`."""
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"Unknown export source {source!r}; expected one of {', '.join(EXPORT_SOURCES)}")
+    spec = EXPORT_SOURCES[source]
+
+    names = list(columns) if columns else list(spec["columns"])
+    unknown = [name for name in names if name not in spec["columns"]]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {source}: {', '.join(unknown)}")
+
+    conditions, values = [], []
+    requested = {"status": status, "broker_id": broker_id}
+    for name, value in requested.items():
+        if value is None:
+            continue
+        if name not in spec["filters"]:
+            raise ValueError(f"{source} cannot be filtered by {name}")
+        conditions.append(f"{spec['filters'][name]} = %s")
+        values.append(value)
+    if start_date is not None or end_date is not None:
+        if "date" not in spec["filters"]:
+            raise ValueError(f"{source} cannot be filtered by date")
+        if start_date is not None:
+            conditions.append(f"{spec['filters']['date']} >= %s")
+            values.append(start_date)
+        if end_date is not None:
+            conditions.append(f"{spec['filters']['date']} <= %s")
+            values.append(end_date)
+
+    select = ", ".join(f"{spec['columns'][name]} AS {name}" for name in names)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    # Ordered by primary key so the server reads rows in index order, no sort
+    query = f"SELECT {select} FROM {spec['from']}{where} ORDER BY {spec['columns']['id']}"
+    return query, tuple(values), names
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the zstandard package (pip install zstandard)")
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(raw), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class _CsvWriter:
+    def __init__(self, path, names, compression):
+        self.file = _open_text(path, compression)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(names)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path, names, compression):
+        self.file = _open_text(path, compression)
+        self.names = names
+
+    def write(self, rows):
+        self.file.writelines(
+            json.dumps(dict(zip(self.names, row)), default=_json_value) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """Writes each batch as a row group; the schema comes from the cursor description
+    (on SQLite, which has no column types there, from the first batch)."""
+
+    def __init__(self, path, names, compression, description):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.names = names
+        self.compression = compression or "snappy"
+        self.writer = self.schema = None
+        if description[0][1] is None:
+            return
+        from mysql.connector import FieldType
+
+        def arrow_type(type_code):
+            name = FieldType.get_info(type_code)
+            if name in ("TINY", "SHORT", "LONG", "INT24", "LONGLONG", "YEAR"):
+                return pa.int64()
+            if name in ("DECIMAL", "NEWDECIMAL", "FLOAT", "DOUBLE"):
+                return pa.float64()
+            if name in ("DATE", "NEWDATE"):
+                return pa.date32()
+            if name in ("DATETIME", "TIMESTAMP"):
+                return pa.timestamp("us")
+            return pa.string()
+
+        self._open(pa.schema([(col[0], arrow_type(col[1])) for col in description]))
+
+    def _open(self, schema):
+        self.schema = schema
+        self.float_columns = [i for i, field in enumerate(schema) if field.type == self.pa.float64()]
+        self.writer = self.pq.ParquetWriter(self.path, schema, compression=self.compression)
+
+    def _infer(self, columns):
+        fields = []
+        for name, values in zip(self.names, columns):
+            sample = next((v for v in values if v is not None), None)
+            if isinstance(sample, Decimal):
+                sample = float(sample)
+            fields.append((name, self.pa.array([sample]).type if sample is not None else self.pa.string()))
+        self._open(self.pa.schema(fields))
+
+    def write(self, rows):
+        columns = [list(column) for column in zip(*rows)]
+        if self.writer is None:
+            self._infer(columns)
+        for i in self.float_columns:
+            columns[i] = [None if v is None else float(v) for v in columns[i]]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        if self.writer is None:
+            self._infer([[] for _ in self.names])  # no rows: still write an (all string) empty file
+        self.writer.close()
+
+def _guess(path, file_format, compression):
+    lowered = path.lower()
+    if compression is None:
+        if lowered.endswith(".gz"):
+            compression = "gzip"
+        elif lowered.endswith(".zst"):
+            compression = "zstd"
+    if file_format is None:
+        stem = lowered.rsplit(".", 1)[0] if compression and lowered.endswith((".gz", ".zst")) else lowered
+        file_format = stem.rsplit(".", 1)[-1]
+        if file_format == "pq":
+            file_format = "parquet"
+        if file_format == "json":
+            file_format = "jsonl"
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported export format {file_format!r}; expected one of {', '.join(FORMATS)}")
+    return file_format, compression
+
+def export(source, path, file_format=None, columns=None, status=None, broker_id=None,
+           start_date=None, end_date=None, compression=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams `source` (a table or report in EXPORT_SOURCES) to `path`.
+
+    The format and compression are taken from the file name when not given
+    (e.g. sales.csv.gz, sales.jsonl.zst, sales.parquet). Returns the number
+    of rows written.
+    """
+    file_format, compression = _guess(path, file_format, compression)
+    query, values, names = build_query(source, columns, status, broker_id, start_date, end_date)
+
+    written = 0
+    with pooled_connection() as conn:
+        # Unbuffered: rows stay on the server until fetched, batch by batch
+        cursor = conn.cursor(buffered=False)
+        writer = None
+        try:
+            cursor.execute(query, values or None)
+            if file_format == "csv":
+                writer = _CsvWriter(path, names, compression)
+            elif file_format == "jsonl":
+                writer = _JsonlWriter(path, names, compression)
+            else:
+                writer = _ParquetWriter(path, names, compression, cursor.description)
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                writer.write(rows)
+                written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+            cursor.close()
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a table or report to CSV, JSONL or Parquet.")
+    parser.add_argument("source", choices=sorted(EXPORT_SOURCES))
+    parser.add_argument("path")
+    parser.add_argument("--format", dest="file_format", choices=FORMATS)
+    parser.add_argument("--columns", help="comma-separated list of columns to export")
+    parser.add_argument("--status", choices=["available", "sold"])
+    parser.add_argument("--broker", dest="broker_id", type=int)
+    parser.add_argument("--from", dest="start_date", type=datetime.date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end_date", type=datetime.date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--compression", choices=["gzip", "zstd"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    count = export(args.source, args.path, file_format=args.file_format, columns=columns,
+                   status=args.status, broker_id=args.broker_id, start_date=args.start_date,
+                   end_date=args.end_date, compression=args.compression, batch_size=args.batch_size)
+    print(f"Exported {count:,} rows to {args.path}")
+
+if __name__ == "__main__":
+    main()
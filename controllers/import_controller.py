@@ -0,0 +1,251 @@
+"""Bulk import of brokers, clients, properties and sales from CSV or Parquet.
+
+Files are read in chunks and each chunk is validated with vectorized pandas
+operations. Valid rows are written with one executemany() per chunk (which
+mysql.connector sends as a multi-row INSERT) and one commit per chunk.
+Rejected rows go to a side CSV file with a _reject_reason column.
+
+Usage:
+    python -m controllers.import_controller properties listings.csv
+    python -m controllers.import_controller sales sales.parquet --chunk-size 20000 --rejects bad_sales.csv
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from utils.db_helper import execute_query, current_transaction, fetch_by_ids, transactional
+from utils.entity_cache import entity_cache
+from controllers.report_controller import include, maintained
+
+
+class _Column:
+    def __init__(self, name, kind, required=False, default=None, max_len=None,
+                 min_value=None, choices=None, references=None):
+        self.name = name
+        self.kind = kind              # "str", "int", "float", "date" or "choice"
+        self.required = required
+        self.default = default
+        self.max_len = max_len
+        self.min_value = min_value
+        self.choices = choices
+        self.references = references  # table whose id this column must exist in
+
+
+# Columns accepted per table, in INSERT order (mirrors schema.sql)
+IMPORT_SPECS = {
+    "brokers": [
+        _Column("name", "str", required=True, max_len=100),
+        _Column("years_experience", "int", default=0, min_value=0),
+    ],
+    "clients": [
+        _Column("name", "str", required=True, max_len=100),
+        _Column("contact", "str", max_len=100),
+        _Column("preferences", "str"),
+        _Column("broker_id", "int", references="brokers"),
+    ],
+    "properties": [
+        _Column("location", "str", required=True, max_len=100),
+        _Column("type", "str", required=True, max_len=50),
+        _Column("size", "int", required=True, min_value=1),
+        _Column("price", "float", required=True, min_value=0),
+        _Column("status", "choice", default="available", choices=("available", "sold")),
+        _Column("broker_id", "int", references="brokers"),
+    ],
+    "sales": [
+        _Column("property_id", "int", required=True, references="properties"),
+        _Column("client_id", "int", required=True, references="clients"),
+        _Column("broker_id", "int", required=True, references="brokers"),
+        _Column("date", "date", required=True),
+        _Column("final_price", "float", required=True, min_value=0),
+    ],
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, file_format=None):
+    """Yields DataFrames of at most chunk_size rows from a CSV or Parquet file."""
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format == "csv":
+        # dtype=str so validation sees exactly what is in the file
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+    elif file_format in ("parquet", "pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet files requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file format: {file_format!r} (expected csv or parquet)")
+
+def _existing_ids(table, ids):
+    return {row["id"] for row in fetch_by_ids(f"SELECT id FROM {table}", ids)}
+
+def validate_chunk(table, chunk):
+    """Returns (valid DataFrame with the table's columns, rejected DataFrame with _reject_reason)."""
+    spec = IMPORT_SPECS[table]
+    reasons = pd.Series("", index=chunk.index, dtype=object)
+    clean = pd.DataFrame(index=chunk.index)
+
+    def reject(mask, reason):
+        # Keep only the first reason per row
+        reasons.loc[mask & (reasons == "")] = reason
+
+    for column in spec:
+        if column.name in chunk.columns:
+            raw = chunk[column.name]
+        else:
+            raw = pd.Series(None, index=chunk.index, dtype=object)
+        missing = raw.isna() | (raw.astype(str).str.strip() == "")
+
+        if column.kind in ("str", "choice"):
+            values = raw.astype("string").str.strip().mask(missing)
+            if column.max_len:
+                reject((values.str.len() > column.max_len).fillna(False), f"{column.name} longer than {column.max_len} characters")
+            if column.choices:
+                values = values.str.lower()
+                reject(~missing & ~values.isin(column.choices), f"{column.name} must be one of {', '.join(column.choices)}")
+        elif column.kind in ("int", "float"):
+            values = pd.to_numeric(raw.where(~missing), errors="coerce")
+            reject(~missing & values.isna(), f"{column.name} is not a number")
+            if column.kind == "int":
+                reject(values.notna() & (values % 1 != 0), f"{column.name} is not a whole number")
+            if column.min_value is not None:
+                reject(values < column.min_value, f"{column.name} is below {column.min_value}")
+        elif column.kind == "date":
+            values = pd.to_datetime(raw.where(~missing), errors="coerce")
+            reject(~missing & values.isna(), f"{column.name} is not a valid date")
+            values = values.dt.date
+        else:
+            raise ValueError(f"Unknown column kind {column.kind!r}")
+
+        if column.required:
+            reject(missing, f"missing {column.name}")
+        elif column.default is not None:
+            values = values.where(~missing, column.default)
+
+        clean[column.name] = values
+
+    # Foreign keys: a few IN (...) lookups per referenced table per chunk
+    for column in spec:
+        if column.references:
+            values = clean[column.name]
+            candidates = values[(reasons == "") & values.notna()]
+            known = _existing_ids(column.references, sorted({int(v) for v in candidates}))
+            unknown = values.notna() & ~values.isin(list(known))
+            reject(unknown, f"{column.name} not found in {column.references}")
+
+    ok = reasons == ""
+    rejected = chunk.loc[~ok].copy()
+    rejected["_reject_reason"] = reasons[~ok]
+    return clean.loc[ok], rejected
+
+def _to_rows(frame, spec):
+    """Converts a validated frame to tuples of plain Python values (None for missing)."""
+    columns = []
+    for column in spec:
+        values = frame[column.name].astype(object).where(frame[column.name].notna(), None)
+        if column.kind == "int":
+            values = values.map(lambda v: None if v is None else int(v))
+        elif column.kind == "float":
+            values = values.map(lambda v: None if v is None else float(v))
+        columns.append(values.tolist())
+    return list(zip(*columns))
+
+@transactional
+def _write_chunk(table, spec, rows):
+    names = [column.name for column in spec]
+    query = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+    cursor = current_transaction().cursor()
+    try:
+        if table == "sales":
+            # Same side effects as add_sale: the property is no longer available
+            # and the report tables count the new sales
+            property_ids = tuple(sorted({row[0] for row in rows}))
+            placeholders = ", ".join(["%s"] * len(property_ids))
+            with maintained(sales=(f"s.property_id IN ({placeholders})", property_ids),
+                            properties=(f"p.id IN ({placeholders})", property_ids)):
+                cursor.executemany(query, rows)
+                cursor.execute(f"UPDATE properties SET status = 'sold' WHERE id IN ({placeholders})", property_ids)
+        elif table == "properties":
+            # The new rows are the ones above the highest id this transaction
+            # sees; rows other writers add meanwhile stay out of its snapshot
+            # and are counted by their own include()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM properties")
+            last_id = cursor.fetchone()[0]
+            cursor.executemany(query, rows)
+            include(properties=("p.id > %s", (last_id,)))
+        else:
+            cursor.executemany(query, rows)
+    finally:
+        cursor.close()
+    # New ids may have been cached as "not found"; sales also changed property statuses
+    entity_cache.invalidate_kind(table)
+    if table == "sales":
+        entity_cache.invalidate_kind("properties")
+
+def import_file(table, path, chunk_size=DEFAULT_CHUNK_SIZE, rejects_path=None, file_format=None, log=print):
+    """Imports every valid row of a CSV/Parquet file into `table`.
+
+    Each chunk is committed on its own, together with its share of the
+    report tables, so a failure part-way keeps the chunks already written
+    and the reports match them. Returns a summary dict with rows_read, inserted,
+    rejected, chunks and seconds.
+    """
+    if table not in IMPORT_SPECS:
+        raise ValueError(f"Cannot import into {table!r}; expected one of {', '.join(IMPORT_SPECS)}")
+    spec = IMPORT_SPECS[table]
+    rejects_path = rejects_path or f"{os.path.splitext(path)[0]}.rejected.csv"
+    if os.path.exists(rejects_path):
+        os.remove(rejects_path)
+
+    summary = {"rows_read": 0, "inserted": 0, "rejected": 0, "chunks": 0, "seconds": 0.0}
+    started = time.perf_counter()
+    for number, chunk in enumerate(read_chunks(path, chunk_size, file_format), start=1):
+        chunk_started = time.perf_counter()
+        if number == 1:
+            absent = [c.name for c in spec if c.required and c.name not in chunk.columns]
+            if absent:
+                raise ValueError(f"{path} is missing required column(s): {', '.join(absent)}")
+
+        valid, rejected = validate_chunk(table, chunk)
+        if len(valid):
+            _write_chunk(table, spec, _to_rows(valid, spec))
+        if len(rejected):
+            rejected.to_csv(rejects_path, mode="a", index=False, header=not os.path.exists(rejects_path))
+
+        elapsed = time.perf_counter() - chunk_started
+        summary["rows_read"] += len(chunk)
+        summary["inserted"] += len(valid)
+        summary["rejected"] += len(rejected)
+        summary["chunks"] = number
+        if log:
+            rate = len(chunk) / elapsed if elapsed else float("inf")
+            log(f"chunk {number}: {len(valid)} inserted, {len(rejected)} rejected, {rate:,.0f} rows/s")
+
+    summary["seconds"] = time.perf_counter() - started
+    if summary["rejected"]:
+        summary["rejects_path"] = rejects_path
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import rows from a CSV or Parquet file.")
+    parser.add_argument("table", choices=sorted(IMPORT_SPECS))
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--format", dest="file_format", choices=["csv", "parquet"])
+    parser.add_argument("--rejects", dest="rejects_path", help="where to write rejected rows (default: <file>.rejected.csv)")
+    args = parser.parse_args(argv)
+
+    summary = import_file(args.table, args.path, chunk_size=args.chunk_size,
+                          rejects_path=args.rejects_path, file_format=args.file_format)
+    rate = summary["rows_read"] / summary["seconds"] if summary["seconds"] else 0
+    print(f"Imported {summary['inserted']:,} of {summary['rows_read']:,} rows into {args.table} "
+          f"in {summary['seconds']:.1f}s ({rate:,.0f} rows/s)")
+    if summary["rejected"]:
+        print(f"{summary['rejected']:,} rejected rows written to {summary['rejects_path']}")
+
+if __name__ == "__main__":
+    main()
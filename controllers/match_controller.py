@@ -0,0 +1,478 @@
+"""Matches clients to available properties using their free-text preferences.
+
+parse_preferences() turns text such as "apartment in Maadi or Zamalek,
+100-150 sqm, budget under 2M" into a Criteria (types, location words, size
+and price ranges). Types and locations, when given, are hard filters; size
+and price score 1 inside the range and fall off linearly outside it (faster
+above the budget). A property's score is the mean of its size and price
+scores. Types and location words are recognised if any property, sold or
+not, has them; when a new one appears, the clients whose text mentions it
+are parsed again.
+
+Available listings and parsed clients are held in NumPy columns, so one
+client is scored against every listing, or one listing against every
+client, with a handful of array operations. Each client's top MAX_CACHED
+matches are kept once computed; when listings change (read from the change
+feed, like the search index) only the changed listings are scored against
+the cached clients and merged in.
+"""
+import re
+import threading
+import time
+
+import numpy as np
+
+from controllers.change_controller import get_change_token, get_changes_since
+from controllers.client_controller import get_clients_by_ids
+from controllers.property_controller import get_properties_by_ids
+from utils.db_helper import fetch_by_ids, fetch_rows
+from utils.search_index import tokenize
+
+REFRESH_INTERVAL = 1.0  # seconds between change feed polls
+MAX_CACHED = 50         # matches kept per client
+DEFAULT_K = 10
+
+# How fast scores fall off outside a range: 1 - FALLOFF * relative distance
+SIZE_FALLOFF = 2.0   # 50% outside the size range scores 0
+PRICE_FALLOFF = 4.0  # 25% over budget scores 0
+
+# Words never taken as a location even if some listing's location contains them
+_STOPWORDS = {
+    "the", "and", "for", "with", "near", "close", "from", "into", "around", "about",
+    "street", "road", "city", "area", "district", "new", "old", "main", "north",
+    "south", "east", "west", "budget", "under", "over", "between", "sqm", "max", "min",
+}
+
+_QUANTITY = re.compile(
+    r"(?P<currency>[$£€]|egp|usd)?\s*"
+    r"(?P<number>\d[\d,]*(?:\.\d+)?)\s*"
+    r"(?P<suffix>k|thousand|million|mn|m(?![a-z²2]))?\s*"
+    r"(?P<unit>m²|m2|sqm|sq\.?\s?m|square\s+met(?:er|re)s?|met(?:er|re)s?)?",
+    re.IGNORECASE,
+)
+_MAX_WORDS = re.compile(r"(under|below|less than|max(?:imum)?|up to|at most|budget(?: of)?|within|<=?)\s*$")
+_MIN_WORDS = re.compile(r"(over|above|more than|at least|min(?:imum)?|from|>=?)\s*$")
+_RANGE_JOIN = re.compile(r"^\s*(-|–|to|and)\s*$")
+
+
+class Criteria:
+    """What a client is looking for. None / empty means "no preference"."""
+    __slots__ = ("types", "locations", "min_size", "max_size", "min_price", "max_price")
+
+    def __init__(self, types=(), locations=(), min_size=None, max_size=None, min_price=None, max_price=None):
+        self.types = frozenset(types)
+        self.locations = frozenset(locations)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def is_empty(self):
+        return not (self.types or self.locations or self.min_size or self.max_size
+                    or self.min_price or self.max_price)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Criteria({fields})"
+
+def _quantities(text):
+    """Yields (kind, value, qualifier, match) for each number in `text`.
+
+    kind is "size", "price" or None when the number alone doesn't say
+    (bedrooms, house numbers, or the first half of a range like "100-150 sqm").
+    """
+    for match in _QUANTITY.finditer(text):
+        value = float(match["number"].replace(",", ""))
+        suffix = (match["suffix"] or "").lower()
+        unit = match["unit"]
+        if suffix == "m" and not unit and value > 100:
+            unit, suffix = "m", ""  # "120m" is metres, "2m" is millions
+        if suffix == "k" or suffix == "thousand":
+            value *= 1_000
+        elif suffix:
+            value *= 1_000_000
+
+        if unit:
+            kind = "size"
+        elif suffix or match["currency"] or value >= 10_000:
+            kind = "price"
+        else:
+            kind = None
+
+        before = text[max(0, match.start() - 20):match.start()]
+        if _MAX_WORDS.search(before):
+            qualifier = "max"
+        elif _MIN_WORDS.search(before):
+            qualifier = "min"
+        else:
+            qualifier = None
+        yield kind, value, qualifier, match
+
+def parse_preferences(text, known_types=(), known_locations=()):
+    """Turns free-text preferences into a Criteria.
+
+    known_types are the property types in use (e.g. "apartment", "villa");
+    a type matches in singular or plural. Words of the text that occur in
+    known_locations (words of listing locations) become location words.
+    """
+    text = (text or "").lower()
+    words = tokenize(text)
+    word_set = set(words)
+
+    types = set()
+    for property_type in known_types:
+        type_words = tokenize(property_type)
+        if type_words and all(w in word_set or w + "s" in word_set or w + "es" in word_set for w in type_words):
+            types.add(property_type)
+    type_words = {w for t in types for w in tokenize(t)}
+
+    locations = {
+        w for w in words
+        if len(w) >= 3 and not w.isdigit() and w in known_locations
+        and w not in _STOPWORDS and w not in type_words
+    }
+
+    bounds = {"size": [None, None], "price": [None, None]}
+    quantities = list(_quantities(text))
+    skip = set()
+    for i, (kind, value, qualifier, match) in enumerate(quantities):
+        if i in skip:
+            continue
+        following = quantities[i + 1] if i + 1 < len(quantities) else None
+        if following and following[0] and _RANGE_JOIN.match(text[match.end():following[3].start()]):
+            # "100-150 sqm", "1.5 to 2M": the unit/suffix may only be on the second number
+            other_kind, other_value, _, other_match = following
+            other_suffix = (other_match["suffix"] or "").lower()
+            if not match["suffix"] and other_kind == "price":
+                if other_suffix in ("m", "mn", "million"):
+                    value *= 1_000_000
+                elif other_suffix in ("k", "thousand"):
+                    value *= 1_000
+            bounds[other_kind] = [min(value, other_value), max(value, other_value)]
+            skip.add(i + 1)
+        elif kind is None:
+            continue
+        elif qualifier == "max":
+            bounds[kind][1] = value
+        elif qualifier == "min":
+            bounds[kind][0] = value
+        elif kind == "size":
+            bounds[kind] = [value * 0.85, value * 1.15]  # "about 120 sqm"
+        else:
+            bounds[kind][1] = value  # a bare price is a budget
+
+    return Criteria(types, locations, bounds["size"][0], bounds["size"][1],
+                    bounds["price"][0], bounds["price"][1])
+
+def _range_score(values, low, high, falloff):
+    """1 inside [low, high], decreasing linearly with the relative distance outside it.
+
+    low / high are scalars or arrays; NaN means unbounded on that side.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        below = np.where(values < low, (low - values) / low, 0.0)
+        above = np.where(values > high, (values - high) / high, 0.0)
+    distance = np.nan_to_num(np.maximum(below, above), nan=0.0)
+    return np.clip(1.0 - falloff * distance, 0.0, 1.0)
+
+def _nan(value):
+    return np.nan if value is None else float(value)
+
+
+class _Columns:
+    """Growable NumPy columns with a slot per row; removed rows leave dead slots."""
+
+    def __init__(self, dtypes):
+        self.dtypes = dtypes
+        self.size = 0
+        self.capacity = 1024
+        self.columns = {name: np.zeros(self.capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.slots = {}  # row id -> slot
+
+    def add(self, row_id, **values):
+        self.remove(row_id)
+        if self.size == self.capacity:
+            self.capacity *= 2
+            for name, column in self.columns.items():
+                self.columns[name] = np.resize(column, self.capacity)
+            self.alive = np.resize(self.alive, self.capacity)
+            self.alive[self.size:] = False
+        slot = self.size
+        self.size += 1
+        self.columns["id"][slot] = row_id
+        for name, value in values.items():
+            self.columns[name][slot] = value
+        self.alive[slot] = True
+        self.slots[row_id] = slot
+        return slot
+
+    def remove(self, row_id):
+        slot = self.slots.pop(row_id, None)
+        if slot is not None:
+            self.alive[slot] = False
+        return slot
+
+    def __getitem__(self, name):
+        return self.columns[name][:self.size]
+
+    def live(self):
+        return self.alive[:self.size]
+
+
+class _Matcher:
+    def __init__(self):
+        self.listings = _Columns({"id": np.int64, "type": np.int32, "location": np.int32,
+                                  "size": np.float64, "price": np.float64})
+        # Vocabulary of every property, sold or not, so preferences can name
+        # a type or place that has no available listing yet
+        self.types = {}             # type -> code
+        self.type_names = []        # code -> type
+        self.location_codes = {}    # location string -> code
+        self.location_names = []    # code -> location string
+        self.location_words = {}    # word -> set of location codes
+        self._new_words = set()     # type / location words added since clients were last re-parsed
+
+        self.clients = _Columns({"id": np.int64, "min_size": np.float64, "max_size": np.float64,
+                                 "min_price": np.float64, "max_price": np.float64,
+                                 "has_type": bool, "has_location": bool})
+        self.criteria = {}          # client id -> Criteria
+        self.preferences = {}       # client id -> preference text, to parse again when the vocabulary grows
+        self.clients_by_type = {}   # type -> list of client slots
+        self.clients_by_word = {}   # location word -> list of client slots
+
+        self.cache = {}             # client id -> (listing ids, scores, complete)
+        self.token = None
+        self.checked_at = 0.0
+        self._lock = threading.RLock()
+
+    # -- loading and change tracking -------------------------------------
+
+    def _codes(self, location, type_):
+        """Returns (type code, location code), adding either to the vocabulary if new."""
+        type_ = (type_ or "").lower()
+        type_code = self.types.get(type_)
+        if type_code is None:
+            type_code = self.types[type_] = len(self.type_names)
+            self.type_names.append(type_)
+            self._new_words.update(tokenize(type_))
+        location = location or ""
+        code = self.location_codes.get(location)
+        if code is None:
+            code = self.location_codes[location] = len(self.location_names)
+            self.location_names.append(location)
+            for word in tokenize(location):
+                if word not in self.location_words:
+                    self._new_words.add(word)
+                self.location_words.setdefault(word, set()).add(code)
+        return type_code, code
+
+    def _add_listing(self, row_id, location, type_, size, price):
+        type_code, code = self._codes(location, type_)
+        self.listings.add(row_id, type=type_code, location=code,
+                          size=float(size or 0), price=float(price or 0))
+
+    def _reparse_clients(self):
+        """Parses again the clients whose preferences mention a newly added type or location word."""
+        new_words, self._new_words = self._new_words, set()
+        if not new_words:
+            return
+        for client_id, preferences in list(self.preferences.items()):
+            words = set(tokenize(preferences))
+            if any(w in words or w + "s" in words or w + "es" in words for w in new_words):
+                self._add_client(client_id, preferences)
+
+    def _add_client(self, row_id, preferences):
+        self.clients.remove(row_id)
+        self.cache.pop(row_id, None)
+        self.preferences[row_id] = preferences
+        criteria = parse_preferences(preferences, self.types, self.location_words)
+        self.criteria[row_id] = criteria
+        if criteria.is_empty():
+            return
+        slot = self.clients.add(
+            row_id,
+            min_size=_nan(criteria.min_size), max_size=_nan(criteria.max_size),
+            min_price=_nan(criteria.min_price), max_price=_nan(criteria.max_price),
+            has_type=bool(criteria.types), has_location=bool(criteria.locations),
+        )
+        for property_type in criteria.types:
+            self.clients_by_type.setdefault(property_type, []).append(slot)
+        for word in criteria.locations:
+            self.clients_by_word.setdefault(word, []).append(slot)
+
+    def _load(self):
+        token = get_change_token()
+        _, rows = fetch_rows("SELECT DISTINCT location, type FROM properties")
+        for location, type_ in rows:
+            self._codes(location, type_)
+        _, rows = fetch_rows("SELECT id, location, type, size, price FROM properties WHERE status = 'available'")
+        for row in rows:
+            self._add_listing(*row)
+        _, rows = fetch_rows("SELECT id, preferences FROM clients")
+        for row_id, preferences in rows:
+            self._add_client(row_id, preferences)
+        self._new_words.clear()
+        self.token = token
+
+    def refresh(self):
+        with self._lock:
+            if self.token is None:
+                self._load()
+                self.checked_at = time.monotonic()
+                return
+            if time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+                return
+            while True:
+                changes, self.token = get_changes_since(self.token, tables=["properties", "clients"])
+                if not changes:
+                    break
+                changed = {"properties": [], "clients": []}
+                for change in changes:
+                    changed[change["table_name"]].append(change["row_id"])
+                if changed["properties"]:
+                    self._apply_listing_changes(changed["properties"])
+                if changed["clients"]:
+                    rows = {row["id"]: row for row in fetch_by_ids("SELECT id, preferences FROM clients", changed["clients"])}
+                    for client_id in changed["clients"]:
+                        if client_id in rows:
+                            self._add_client(client_id, rows[client_id]["preferences"])
+                        else:
+                            self.clients.remove(client_id)
+                            self.criteria.pop(client_id, None)
+                            self.preferences.pop(client_id, None)
+                            self.cache.pop(client_id, None)
+            self._reparse_clients()
+            self.checked_at = time.monotonic()
+
+    def _apply_listing_changes(self, property_ids):
+        rows = fetch_by_ids("SELECT id, location, type, size, price, status FROM properties", property_ids)
+        current = {row["id"]: row for row in rows if row["status"] == "available"}
+        removed = set(property_ids)
+        # Changed listings leave every cached list, then are scored again below
+        for client_id, (ids, scores, complete) in list(self.cache.items()):
+            keep = ~np.isin(ids, list(removed))
+            if not keep.all():
+                self.cache[client_id] = (ids[keep], scores[keep], complete)
+        for property_id in property_ids:
+            self.listings.remove(property_id)
+        for row in rows:
+            self._codes(row["location"], row["type"])
+        for property_id, row in current.items():
+            self._add_listing(property_id, row["location"], row["type"], row["size"], row["price"])
+            self._merge_into_cache(property_id)
+
+    def _merge_into_cache(self, property_id):
+        if not self.cache:
+            return
+        client_slots, scores = self._score_clients(property_id)
+        client_ids = self.clients["id"][client_slots]
+        for client_id, score in zip(client_ids.tolist(), scores.tolist()):
+            cached = self.cache.get(client_id)
+            if cached is None:
+                continue
+            ids, cached_scores, complete = cached
+            if len(ids) >= MAX_CACHED and score <= cached_scores[-1]:
+                continue
+            ids = np.append(ids, property_id)
+            cached_scores = np.append(cached_scores, score)
+            order = np.lexsort((ids, -cached_scores))[:MAX_CACHED]
+            self.cache[client_id] = (ids[order], cached_scores[order], complete and len(ids) <= MAX_CACHED)
+
+    # -- scoring ---------------------------------------------------------------
+
+    def _score_listings(self, criteria):
+        """Scores every live listing for one client. Returns (slots, scores) of matches."""
+        listings = self.listings
+        ok = listings.live().copy()
+        if criteria.types:
+            codes = [self.types[t] for t in criteria.types if t in self.types]
+            ok &= np.isin(listings["type"], codes)
+        if criteria.locations:
+            wanted = np.zeros(len(self.location_codes), dtype=bool)
+            for word in criteria.locations:
+                wanted[list(self.location_words.get(word, ()))] = True
+            ok &= wanted[listings["location"]]
+        slots = np.flatnonzero(ok)
+        size_score = _range_score(listings["size"][slots], _nan(criteria.min_size), _nan(criteria.max_size), SIZE_FALLOFF)
+        price_score = _range_score(listings["price"][slots], _nan(criteria.min_price), _nan(criteria.max_price), PRICE_FALLOFF)
+        scores = (size_score + price_score) / 2
+        keep = scores > 0
+        return slots[keep], scores[keep]
+
+    def _score_clients(self, property_id):
+        """Scores one listing for every live client. Returns (client slots, scores) of matches."""
+        slot = self.listings.slots[property_id]
+        listings, clients = self.listings, self.clients
+        type_name = self.type_names[listings["type"][slot]]
+        location = self.location_names[listings["location"][slot]]
+
+        ok = clients.live().copy()
+        type_hit = np.zeros(clients.size, dtype=bool)
+        type_hit[self.clients_by_type.get(type_name, [])] = True
+        ok &= ~clients["has_type"] | type_hit
+        location_hit = np.zeros(clients.size, dtype=bool)
+        for word in set(tokenize(location)):
+            location_hit[self.clients_by_word.get(word, [])] = True
+        ok &= ~clients["has_location"] | location_hit
+
+        slots = np.flatnonzero(ok)
+        size, price = listings["size"][slot], listings["price"][slot]
+        size_score = _range_score(size, clients["min_size"][slots], clients["max_size"][slots], SIZE_FALLOFF)
+        price_score = _range_score(price, clients["min_price"][slots], clients["max_price"][slots], PRICE_FALLOFF)
+        scores = (size_score + price_score) / 2
+        keep = scores > 0
+        return slots[keep], scores[keep]
+
+    def matches_for_client(self, client_id, k):
+        """Returns [(property id, score)] best first."""
+        with self._lock:
+            cached = self.cache.get(client_id)
+            if cached is None or (len(cached[0]) < k and not cached[2]):
+                criteria = self.criteria.get(client_id)
+                if criteria is None or criteria.is_empty():
+                    return []
+                slots, scores = self._score_listings(criteria)
+                ids = self.listings["id"][slots]
+                order = np.lexsort((ids, -scores))
+                top = order[:max(k, MAX_CACHED)]
+                cached = (ids[top], scores[top], len(order) <= len(top))
+                self.cache[client_id] = cached
+            ids, scores, _ = cached
+            return list(zip(ids[:k].tolist(), scores[:k].tolist()))
+
+    def interested_clients(self, property_id, k):
+        """Returns [(client id, score)] best first."""
+        with self._lock:
+            if property_id not in self.listings.slots:
+                return []
+            slots, scores = self._score_clients(property_id)
+            ids = self.clients["id"][slots]
+            order = np.lexsort((ids, -scores))[:k]
+            return list(zip(ids[order].tolist(), scores[order].tolist()))
+
+
+_matcher = _Matcher()
+
+def get_matches_for_client(client_id, k=DEFAULT_K):
+    """Returns the k best available properties for a client as [(Property, score)].
+
+    Score is between 0 and 1. Clients whose preferences name no type,
+    location, size or price get no matches.
+    """
+    _matcher.refresh()
+    ranked = _matcher.matches_for_client(client_id, k)
+    properties = get_properties_by_ids([property_id for property_id, _ in ranked])
+    return [(properties[pid], score) for pid, score in ranked if pid in properties]
+
+def get_interested_clients(property_id, k=DEFAULT_K):
+    """Returns the k clients whose preferences best fit an available property as [(Client, score)]."""
+    _matcher.refresh()
+    ranked = _matcher.interested_clients(property_id, k)
+    clients = get_clients_by_ids([client_id for client_id, _ in ranked])
+    return [(clients[cid], score) for cid, score in ranked if cid in clients]
+
+def get_client_criteria(client_id):
+    """Returns the Criteria parsed from a client's preferences (None if unknown)."""
+    _matcher.refresh()
+    return _matcher.criteria.get(client_id)
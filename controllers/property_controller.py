@@ -1,7 +1,10 @@
-from utils.db_helper import execute_query
+from utils.db_helper import execute_query, paginate, fetch_by_ids, fetch_models, fetch_frame, transactional, estimate_count, Page
 from models.property import Property
-from config.db_config import get_connection
+from utils.entity_cache import entity_cache
+from controllers.change_controller import delete_and_log_cascades
+from controllers.report_controller import include, maintained
 
+@transactional
 def add_property(property_obj: Property): # Renamed 'property' to 'property_obj' to avoid keyword conflict
     query = """
         INSERT INTO properties (location, type, size, price, status, broker_id)
@@ -15,25 +18,125 @@ def add_property(property_obj: Property): # Renamed 'property' to 'property_obj'
         property_obj.status,
         property_obj.broker_id
     )
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(query, values)
-    conn.commit()
-    property_id = cursor.lastrowid
-    cursor.close()
-    conn.close()
+    property_id = execute_query(query, values)
+    include(properties=("p.id = %s", (property_id,)))
+    entity_cache.invalidate("properties", property_id)
     return property_id
 
 def get_all_properties():
-    query = "SELECT * FROM properties"
-    rows = execute_query(query, fetch=True)
-    return [Property.from_dict(row) for row in rows]
+    return fetch_models("properties", Property)
+
+def get_properties_frame(status=None, broker_id=None):
+    """Returns properties as a DataFrame (one column per Property attribute), optionally filtered."""
+    conditions, values = [], []
+    if status is not None:
+        conditions.append("status = %s")
+        values.append(status)
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"SELECT {', '.join(Property.COLUMNS)} FROM properties{where} ORDER BY id"
+    return fetch_frame(query, tuple(values) or None)
+
+def get_properties_page(after_id=None, limit=100, status=None, broker_id=None, before_id=None, with_total=True):
+    """Returns one Page of properties ordered by id, optionally filtered by status/broker."""
+    conditions, values = [], []
+    if status is not None:
+        conditions.append("status = %s")
+        values.append(status)
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    return paginate("properties", Property, conditions, values, after_id=after_id,
+                    before_id=before_id, limit=limit, with_total=with_total)
 
 def assign_broker_to_property(property_id, broker_id):
     query = "UPDATE properties SET broker_id = %s WHERE id = %s"
     values = (broker_id, property_id)
     execute_query(query, values)
+    entity_cache.invalidate("properties", property_id)
+
+# find_properties filters: name -> SQL condition (values are always parameters)
+PROPERTY_FILTERS = {
+    "status": "status = %s",
+    "type": "type = %s",
+    "broker_id": "broker_id = %s",
+    "location": "location LIKE %s ESCAPE '!'",  # prefix match
+    "min_size": "size >= %s",
+    "max_size": "size <= %s",
+    "min_price": "price >= %s",
+    "max_price": "price <= %s",
+}
+# find_properties sort keys; prefix with "-" for descending
+PROPERTY_SORTS = ("id", "price", "size", "location")
+
+def property_filter_conditions(filters):
+    """Returns (conditions, values) for a dict of PROPERTY_FILTERS; None values are ignored."""
+    conditions, values = [], []
+    for name, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if name not in PROPERTY_FILTERS:
+            raise ValueError(f"Unknown property filter {name!r}; expected one of {', '.join(PROPERTY_FILTERS)}")
+        if name == "location":
+            value = value.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+        conditions.append(PROPERTY_FILTERS[name])
+        values.append(value)
+    return conditions, values
+
+def find_properties(filters=None, sort="id", page=None, limit=100, with_total=True):
+    """Returns one Page of properties matching every filter, in `sort` order.
+
+    filters is a dict of PROPERTY_FILTERS, e.g. {"type": "apartment",
+    "location": "Maadi", "min_size": 80, "max_size": 120,
+    "max_price": 2_000_000, "status": "available", "broker_id": 7}.
+    sort is one of PROPERTY_SORTS, "-price" for descending. page is a
+    cursor from a previous Page (next_cursor / prev_cursor), or None for
+    the first page. Cursors are ("after" | "before", sort value, id), so
+    paging seeks on (sort column, id) instead of using an OFFSET. The
+    composite indexes of migration 007 cover the common combinations.
+    """
+    descending = sort.startswith("-")
+    column = sort.lstrip("-")
+    if column not in PROPERTY_SORTS:
+        raise ValueError(f"Cannot sort properties by {sort!r}; expected one of {', '.join(PROPERTY_SORTS)}")
+    conditions, values = property_filter_conditions(filters)
+    total = estimate_count("properties", conditions, values) if with_total else None
+
+    direction, key_value, key_id = page if page else ("after", None, None)
+    backwards = direction == "before"
+    # Scanning backwards is scanning forwards in the opposite order
+    greater = ">" if descending == backwards else "<"
+    keyset = list(conditions)
+    keyset_values = list(values)
+    if key_id is not None:
+        if column == "id":
+            keyset.append(f"id {greater} %s")
+            keyset_values.append(key_id)
+        else:
+            keyset.append(f"({column} {greater} %s OR ({column} = %s AND id {greater} %s))")
+            keyset_values.extend([key_value, key_value, key_id])
+    order = "ASC" if greater == ">" else "DESC"
+    order_by = f"id {order}" if column == "id" else f"{column} {order}, id {order}"
 
+    where = " WHERE " + " AND ".join(keyset) if keyset else ""
+    rows = execute_query(f"SELECT * FROM properties{where} ORDER BY {order_by} LIMIT %s",
+                         tuple(keyset_values) + (limit + 1,), fetch=True)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = ("after", rows[-1][column], rows[-1]["id"])
+        if (page and not backwards) or (backwards and has_more):
+            prev_cursor = ("before", rows[0][column], rows[0]["id"])
+    return Page([Property.from_dict(row) for row in rows], next_cursor, prev_cursor, total)
+
+@entity_cache.cached("properties")
 def get_property_by_id(property_id):
     query = """
         SELECT p.*, b.name as broker_name 
@@ -46,6 +149,12 @@ def get_property_by_id(property_id):
     # Return the first row if the list is not empty, otherwise None.
     return Property.from_dict(rows[0]) if rows else None
 
+def get_properties_by_ids(property_ids):
+    """Fetches many properties in one query. Returns {id: Property} for the ids that exist."""
+    rows = fetch_by_ids("SELECT * FROM properties", property_ids)
+    return {row['id']: Property.from_dict(row) for row in rows}
+
+@transactional
 def update_property(property_obj: Property): # Renamed 'property' to 'property_obj'
     query = """
         UPDATE properties 
@@ -61,13 +170,22 @@ def update_property(property_obj: Property): # Renamed 'property' to 'property_o
         property_obj.broker_id,
         property_obj.id
     )
-    execute_query(query, values)
+    # Type/location are report dimensions of this property's sales too
+    with maintained(sales=("s.property_id = %s", (property_obj.id,)),
+                    properties=("p.id = %s", (property_obj.id,))):
+        execute_query(query, values)
+    entity_cache.invalidate("properties", property_obj.id)
     return True
 
+@transactional
 def delete_property(property_id):
-    query = "DELETE FROM properties WHERE id = %s"
-    execute_query(query, (property_id,))
-    return True
+    # Goes through the change log helper so rows removed by FK cascades are recorded too
+    with maintained(sales=("s.property_id = %s", (property_id,)),
+                    properties=("p.id = %s", (property_id,))):
+        deleted = delete_and_log_cascades("properties", property_id)
+    entity_cache.invalidate("properties", property_id)
+    entity_cache.invalidate_kind("sales")  # the FK deletes this property's sales
+    return deleted
 
 def get_available_properties():
     query = """
@@ -93,3 +211,34 @@ def get_property_sales(property_id):
     """
     rows = execute_query(query, (property_id,), fetch=True)
     return rows
+
+def inventory_summary(status=None, type_=None):
+    """Property counts and value per (status, type), computed by MySQL with GROUP BY.
+
+    Optionally restricted to one status and/or one type. Returns one dict
+    per group with status, type, properties, total_value, average_price
+    and average_size.
+    """
+    conditions, values = [], []
+    if status is not None:
+        conditions.append("status = %s")
+        values.append(status)
+    if type_ is not None:
+        conditions.append("type = %s")
+        values.append(type_)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"""
+        SELECT status, type,
+               COUNT(*) AS properties,
+               SUM(price) AS total_value,
+               AVG(price) AS average_price,
+               AVG(size) AS average_size
+        FROM properties{where}
+        GROUP BY status, type
+        ORDER BY status, type
+    """
+    rows = execute_query(query, tuple(values) or None, fetch=True)
+    for row in rows:
+        for column in ("total_value", "average_price", "average_size"):
+            row[column] = float(row[column]) if row[column] is not None else 0.0
+    return rows
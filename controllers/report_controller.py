@@ -0,0 +1,176 @@
+"""Summary tables for dashboards, kept up to date as sales and properties change.
+
+report_sales_daily / report_sales_monthly hold sale counts and revenue per
+period, broker, property type and location; report_inventory holds property
+counts and value per status and type (see migrations/006_report_tables.sql).
+
+Writes keep them current inside their own transaction: maintained() takes
+the affected rows out of the summaries before the write and puts them back
+in after it, so inserts, updates, deletes and FK cascades are all covered by
+the same two statements. Reads then cost one index range per request,
+however long the sales history is.
+
+Usage:
+    python -m controllers.report_controller rebuild
+"""
+import argparse
+from contextlib import contextmanager
+
+from utils.db_backend import get_backend
+from utils.db_helper import execute_query, transaction, transactional
+
+# table -> period column ("day" is the sale date, "month" its first day)
+SALES_REPORTS = {
+    "report_sales_daily": "day",
+    "report_sales_monthly": "month",
+}
+PERIODS = {"day": "report_sales_daily", "month": "report_sales_monthly"}
+REPORT_GROUPS = {"broker": "broker_id", "type": "property_type", "location": "location"}
+
+def _sales_statements(condition, values, sign):
+    backend = get_backend()
+    for table, column in SALES_REPORTS.items():
+        period = "s.date" if column == "day" else backend.month_start("s.date")
+        keys = (column, "broker_id", "property_type", "location")
+        yield backend.add_to_totals(table, keys, ("sales", "revenue"), f"""
+            SELECT {period} AS delta_{column}, s.broker_id AS delta_broker_id,
+                   p.type AS delta_property_type, p.location AS delta_location,
+                   {sign} * COUNT(*) AS delta_sales, {sign} * SUM(s.final_price) AS delta_revenue
+            FROM sales s
+            JOIN properties p ON s.property_id = p.id
+            WHERE {condition}
+            GROUP BY delta_{column}, delta_broker_id, delta_property_type, delta_location
+        """), values
+
+def _properties_statement(condition, values, sign):
+    # NULL status is stored as the column default, 'available'
+    totals = ("properties", "total_value")
+    return get_backend().add_to_totals("report_inventory", ("status", "type"), totals, f"""
+        SELECT COALESCE(p.status, 'available') AS delta_status, p.type AS delta_type,
+               {sign} * COUNT(*) AS delta_properties, {sign} * SUM(p.price) AS delta_total_value
+        FROM properties p
+        WHERE {condition}
+        GROUP BY delta_status, delta_type
+    """), values
+
+def summary_statements(sales=None, properties=None, sign=1):
+    """Returns the (query, values) pairs that add (sign 1) or subtract (sign -1) rows from the summaries.
+
+    sales / properties are (condition, values) pairs as for include().
+    Used by include() and maintained(), and by the asyncio controllers,
+    which run the same statements on their own connections.
+    """
+    statements = []
+    if sales is not None:
+        statements.extend(_sales_statements(sales[0], sales[1], sign))
+    if properties is not None:
+        statements.append(_properties_statement(properties[0], properties[1], sign))
+    return statements
+
+def _apply(sales, properties, sign):
+    for query, values in summary_statements(sales, properties, sign):
+        execute_query(query, values)
+
+def include(sales=None, properties=None):
+    """Adds newly inserted rows to the summaries.
+
+    sales is a (condition, values) pair over `sales s`, properties one over
+    `properties p`, e.g. include(sales=("s.id = %s", (sale_id,))).
+    """
+    _apply(sales, properties, 1)
+
+@contextmanager
+def maintained(sales=None, properties=None):
+    """Keeps the summaries right across a write to the rows matching the conditions.
+
+    The rows are subtracted before the block and added back after it, in
+    the same transaction, so rows the block deletes simply drop out and
+    rows it changes move to their new groups. Conditions are (condition,
+    values) pairs as for include() and must match the same rows before and
+    after the write (use ids, not the columns being changed).
+    """
+    with transaction():
+        _apply(sales, properties, -1)
+        yield
+        _apply(sales, properties, 1)
+
+@transactional
+def rebuild():
+    """Recomputes every summary table from sales and properties."""
+    for table in list(SALES_REPORTS) + ["report_inventory"]:
+        execute_query(f"DELETE FROM {table}")
+    include(sales=("1 = 1", None), properties=("1 = 1", None))
+    return True
+
+@transactional
+def rebuild_inventory():
+    """Recomputes report_inventory only; cheap thanks to idx_properties_status_type."""
+    execute_query("DELETE FROM report_inventory")
+    include(properties=("1 = 1", None))
+    return True
+
+def sales_report(period="month", group_by=None, date_range=None, broker_id=None):
+    """Sales and revenue per day or month, optionally split by broker, type or location.
+
+    Reads only the summary tables. date_range is an optional (start_date,
+    end_date) pair, both inclusive; for monthly figures pass first-of-month
+    dates. Returns dicts with period (a date), the group column if any,
+    sales and revenue.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {', '.join(PERIODS)}")
+    if group_by is not None and group_by not in REPORT_GROUPS:
+        raise ValueError(f"Cannot group by {group_by!r}; expected one of {', '.join(REPORT_GROUPS)}")
+
+    conditions, values = [], []
+    start_date, end_date = date_range or (None, None)
+    if start_date is not None:
+        conditions.append(f"{period} >= %s")
+        values.append(start_date)
+    if end_date is not None:
+        conditions.append(f"{period} <= %s")
+        values.append(end_date)
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+
+    keys = [period] + ([REPORT_GROUPS[group_by]] if group_by else [])
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"""
+        SELECT {period} AS period{''.join(f', {key}' for key in keys[1:])},
+               SUM(sales) AS sales, SUM(revenue) AS revenue
+        FROM {PERIODS[period]}{where}
+        GROUP BY {', '.join(keys)}
+        HAVING SUM(sales) > 0
+        ORDER BY {', '.join(keys)}
+    """
+    rows = execute_query(query, tuple(values) or None, fetch=True)
+    for row in rows:
+        row["sales"] = int(row["sales"])
+        row["revenue"] = float(row["revenue"])
+    return rows
+
+def inventory_report(status=None):
+    """Property counts and value per (status, type), read from report_inventory."""
+    query = "SELECT status, type, properties, total_value FROM report_inventory WHERE properties > 0"
+    values = ()
+    if status is not None:
+        query += " AND status = %s"
+        values = (status,)
+    rows = execute_query(query + " ORDER BY status, type", values or None, fetch=True)
+    for row in rows:
+        row["total_value"] = float(row["total_value"])
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the reporting summary tables.")
+    parser.add_argument("command", choices=["rebuild", "rebuild-inventory"])
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        rebuild()
+    else:
+        rebuild_inventory()
+    print("Report tables rebuilt.")
+
+if __name__ == "__main__":
+    main()
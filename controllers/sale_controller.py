@@ -1,8 +1,12 @@
-from utils.db_helper import execute_query
-from config.db_config import get_connection
+from utils.db_helper import execute_query, paginate, fetch_by_ids, transactional, fetch_models, fetch_frame, fetch_rows
 from models.sale import Sale
+from models.sale_detail import SaleDetail
+from utils.entity_cache import entity_cache
+from controllers.report_controller import include, maintained
 
+@transactional
 def add_sale(sale: Sale):
+    # The INSERT and the status UPDATE commit together (see utils.db_helper.transaction)
     # Insert sale record
     query = """
         INSERT INTO sales (property_id, client_id, broker_id, date, final_price)
@@ -15,27 +19,50 @@ def add_sale(sale: Sale):
         sale.date,
         sale.final_price
     )
-
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(query, values)
-    conn.commit()
-    sale_id = cursor.lastrowid
+    sale_id = execute_query(query, values)
+    include(sales=("s.id = %s", (sale_id,)))
 
     # Update property status to "sold"
     update_query = "UPDATE properties SET status = 'sold' WHERE id = %s"
-    cursor.execute(update_query, (sale.property_id,))
-    conn.commit()
+    with maintained(properties=("p.id = %s", (sale.property_id,))):
+        execute_query(update_query, (sale.property_id,))
 
-    cursor.close()
-    conn.close()
+    entity_cache.invalidate("sales", sale_id)
+    entity_cache.invalidate("properties", sale.property_id)  # status is now 'sold'
     return sale_id
 
 def get_all_sales():
-    query = "SELECT * FROM sales"
-    rows = execute_query(query, fetch=True)
-    return [Sale.from_dict(row) for row in rows]
+    return fetch_models("sales", Sale)
+
+def get_sales_frame(start_date=None, end_date=None, broker_id=None):
+    """Returns sales as a DataFrame (one column per Sale attribute), optionally filtered.
+
+    final_price is float64 and date datetime64, ready for vectorized work.
+    """
+    conditions, values = [], []
+    if start_date is not None:
+        conditions.append("date >= %s")
+        values.append(start_date)
+    if end_date is not None:
+        conditions.append("date <= %s")
+        values.append(end_date)
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    query = f"SELECT {', '.join(Sale.COLUMNS)} FROM sales{where} ORDER BY id"
+    return fetch_frame(query, tuple(values) or None)
 
+def get_sales_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    """Returns one Page of sales ordered by id, optionally only one broker's."""
+    conditions, values = [], []
+    if broker_id is not None:
+        conditions.append("broker_id = %s")
+        values.append(broker_id)
+    return paginate("sales", Sale, conditions, values, after_id=after_id,
+                    before_id=before_id, limit=limit, with_total=with_total)
+
+@entity_cache.cached("sales")
 def get_sale_by_id(sale_id):
     query = """
         SELECT s.*, 
@@ -51,6 +78,36 @@ def get_sale_by_id(sale_id):
     rows = execute_query(query, (sale_id,), fetch=True)
     return Sale.from_dict(rows[0]) if rows else None
 
+def get_sales_by_ids(sale_ids):
+    """Fetches many sales in one query. Returns {id: Sale} for the ids that exist."""
+    rows = fetch_by_ids("SELECT * FROM sales", sale_ids)
+    return {row['id']: Sale.from_dict(row) for row in rows}
+
+def validate_sale_references(property_id, client_id, broker_id, sale_id=None):
+    """Checks every foreign key of a sale in a single query.
+
+    Returns a dict with property_exists, client_exists and broker_exists
+    (False when the id is None) and sale_broker_id, the broker currently
+    recorded on sale `sale_id` (None if not given or not found), for
+    permission checks before an update or delete.
+    """
+    query = """
+        SELECT
+            EXISTS(SELECT 1 FROM properties WHERE id = %s) AS property_exists,
+            EXISTS(SELECT 1 FROM clients WHERE id = %s) AS client_exists,
+            EXISTS(SELECT 1 FROM brokers WHERE id = %s) AS broker_exists,
+            (SELECT broker_id FROM sales WHERE id = %s) AS sale_broker_id
+    """
+    rows = execute_query(query, (property_id, client_id, broker_id, sale_id), fetch=True)
+    row = rows[0]
+    return {
+        'property_exists': bool(row['property_exists']),
+        'client_exists': bool(row['client_exists']),
+        'broker_exists': bool(row['broker_exists']),
+        'sale_broker_id': row['sale_broker_id'],
+    }
+
+@transactional
 def update_sale(sale: Sale):
     query = """
         UPDATE sales 
@@ -65,36 +122,38 @@ def update_sale(sale: Sale):
         sale.final_price,
         sale.id
     )
-    execute_query(query, values)
+    with maintained(sales=("s.id = %s", (sale.id,))):
+        execute_query(query, values)
+    entity_cache.invalidate("sales", sale.id)
     return True
 
+@transactional
+def _delete_sale(sale_id):
+    # Get the property_id before deleting the sale
+    get_property_query = "SELECT property_id FROM sales WHERE id = %s"
+    rows = execute_query(get_property_query, (sale_id,), fetch=True)
+
+    if rows:
+        property_id = rows[0]['property_id']
+        # Update property status back to available
+        update_property_query = "UPDATE properties SET status = 'available' WHERE id = %s"
+        with maintained(properties=("p.id = %s", (property_id,))):
+            execute_query(update_property_query, (property_id,))
+        entity_cache.invalidate("properties", property_id)
+
+    # Delete the sale
+    delete_query = "DELETE FROM sales WHERE id = %s"
+    with maintained(sales=("s.id = %s", (sale_id,))):
+        execute_query(delete_query, (sale_id,))
+    entity_cache.invalidate("sales", sale_id)
+
 def delete_sale(sale_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     try:
-        # Get the property_id before deleting the sale
-        get_property_query = "SELECT property_id FROM sales WHERE id = %s"
-        cursor.execute(get_property_query, (sale_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            property_id = result[0]
-            # Update property status back to available
-            update_property_query = "UPDATE properties SET status = 'available' WHERE id = %s"
-            cursor.execute(update_property_query, (property_id,))
-        
-        # Delete the sale
-        delete_query = "DELETE FROM sales WHERE id = %s"
-        cursor.execute(delete_query, (sale_id,))
-        conn.commit()
+        _delete_sale(sale_id)
         return True
     except Exception as e:
         print(f"Error deleting sale: {e}")
         return False
-    finally:
-        cursor.close()
-        conn.close()
 
 def get_sales_by_date_range(start_date, end_date):
     query = """
@@ -113,6 +172,98 @@ def get_sales_by_date_range(start_date, end_date):
 
 def get_sales_by_broker_id(broker_id):
     """Fetches sales associated with a specific broker ID."""
-    query = "SELECT * FROM sales WHERE broker_id = %s"
-    rows = execute_query(query, (broker_id,), fetch=True)
-    return [Sale.from_dict(row) for row in rows]
+    return fetch_models("sales", Sale, ["broker_id = %s"], [broker_id])
+
+# Every SaleDetail column, in constructor order; each join is on a primary key
+SALE_DETAIL_SELECT = """
+    SELECT s.id, s.property_id, s.client_id, s.broker_id, s.date, s.final_price,
+           p.location AS property_location,
+           c.name AS client_name,
+           b.name AS broker_name
+    FROM sales s
+    JOIN properties p ON s.property_id = p.id
+    JOIN clients c ON s.client_id = c.id
+    JOIN brokers b ON s.broker_id = b.id
+"""
+
+def _sale_detail_conditions(broker_id):
+    if broker_id is None:
+        return [], []
+    return ["s.broker_id = %s"], [broker_id]
+
+def get_sale_details(broker_id=None):
+    """Returns every sale (or one broker's) as SaleDetail objects, ordered by id."""
+    conditions, values = _sale_detail_conditions(broker_id)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    _, rows = fetch_rows(f"{SALE_DETAIL_SELECT}{where} ORDER BY s.id", tuple(values) or None)
+    return list(map(SaleDetail.from_row, rows))
+
+def get_sale_details_page(after_id=None, limit=100, broker_id=None, before_id=None, with_total=True):
+    """Returns one Page of SaleDetail objects ordered by id, optionally only one broker's.
+
+    The names come from the same query as the page (seeking on the sales
+    primary key or its broker_id index), so showing them costs no extra
+    round trip per row.
+    """
+    conditions, values = _sale_detail_conditions(broker_id)
+    return paginate("sales s", SaleDetail, conditions, values, after_id=after_id, before_id=before_id,
+                    limit=limit, with_total=with_total, select=SALE_DETAIL_SELECT, key="s.id")
+
+def get_sale_detail(sale_id):
+    """Returns one sale as a SaleDetail, or None. Not cached: the names can change with their rows."""
+    _, rows = fetch_rows(f"{SALE_DETAIL_SELECT} WHERE s.id = %s", (sale_id,))
+    return SaleDetail.from_row(rows[0]) if rows else None
+
+# group_by -> (SELECT/GROUP BY expressions, JOIN needed for them)
+SUMMARY_GROUPS = {
+    "broker": (("s.broker_id", "b.name AS broker_name"), "JOIN brokers b ON s.broker_id = b.id"),
+    "month": (("YEAR(s.date) AS year", "MONTH(s.date) AS month"), ""),
+    "type": (("p.type",), "JOIN properties p ON s.property_id = p.id"),
+    "location": (("p.location",), "JOIN properties p ON s.property_id = p.id"),
+}
+
+def sales_summary(group_by=None, date_range=None, broker_id=None):
+    """Sale count and price totals computed by MySQL with GROUP BY.
+
+    group_by is one of "broker", "month", "type", "location" or None for a
+    single overall row. date_range is an optional (start_date, end_date)
+    pair, both inclusive and either may be None. Returns one dict per
+    group with its key column(s) plus sales, revenue, average_price,
+    min_price and max_price, so the result size follows the number of
+    groups, not of sales.
+    """
+    if group_by is not None and group_by not in SUMMARY_GROUPS:
+        raise ValueError(f"Cannot group sales by {group_by!r}; expected one of {', '.join(SUMMARY_GROUPS)}")
+    keys, join = SUMMARY_GROUPS[group_by] if group_by else ((), "")
+
+    conditions, values = [], []
+    start_date, end_date = date_range or (None, None)
+    if start_date is not None:
+        conditions.append("s.date >= %s")
+        values.append(start_date)
+    if end_date is not None:
+        conditions.append("s.date <= %s")
+        values.append(end_date)
+    if broker_id is not None:
+        conditions.append("s.broker_id = %s")
+        values.append(broker_id)
+
+    select = list(keys) + [
+        "COUNT(*) AS sales",
+        "SUM(s.final_price) AS revenue",
+        "AVG(s.final_price) AS average_price",
+        "MIN(s.final_price) AS min_price",
+        "MAX(s.final_price) AS max_price",
+    ]
+    group_columns = [key.split(" AS ")[0] for key in keys]
+    query = f"SELECT {', '.join(select)} FROM sales s {join}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if group_columns:
+        query += f" GROUP BY {', '.join(group_columns)} ORDER BY {', '.join(group_columns)}"
+
+    rows = execute_query(query, tuple(values) or None, fetch=True)
+    for row in rows:
+        for column in ("revenue", "average_price", "min_price", "max_price"):
+            row[column] = float(row[column]) if row[column] is not None else 0.0
+    return rows
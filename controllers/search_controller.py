@@ -0,0 +1,116 @@
+"""Full-text search over property listings and clients.
+
+Each table gets an in-memory utils.search_index.InvertedIndex (prefix and
+one-typo matching, ranked results), loaded with one full read on first use
+and then kept current from the change feed: every search first applies the
+change_log entries recorded since the last one (at most every
+REFRESH_INTERVAL seconds), re-reading only the rows that changed.
+
+Properties are indexed on location and type, clients on name and
+preferences. Filters are applied in SQL to the ranked ids, a chunk at a
+time, so only rows that can be returned are read.
+"""
+import threading
+import time
+
+from controllers.change_controller import get_change_token, get_changes_since
+from controllers.client_controller import get_clients_by_ids
+from controllers.property_controller import get_properties_by_ids, property_filter_conditions
+from models.property import Property
+from utils.db_helper import execute_query, fetch_by_ids, fetch_rows
+from utils.search_index import InvertedIndex
+
+REFRESH_INTERVAL = 1.0  # seconds between change feed polls
+DEFAULT_LIMIT = 50
+
+
+class _TableSearch:
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns  # text columns joined into the indexed document
+        self.index = InvertedIndex()
+        self.token = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _text(self, values):
+        return " ".join(value for value in values if value)
+
+    def _load(self):
+        # Token first, then the full read: changes made during the read are replayed later
+        token = get_change_token()
+        _, rows = fetch_rows(f"SELECT id, {', '.join(self.columns)} FROM {self.table}")
+        self.index.add_many((row[0], self._text(row[1:])) for row in rows)
+        self.token = token
+
+    def refresh(self):
+        """Loads the index on first use, then applies changes since the last refresh."""
+        with self._lock:
+            if self.token is None:
+                self._load()
+                self.checked_at = time.monotonic()
+                return
+            if time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+                return
+            while True:
+                changes, self.token = get_changes_since(self.token, tables=[self.table])
+                if not changes:
+                    break
+                changed = [c["row_id"] for c in changes if c["operation"] != "delete"]
+                for change in changes:
+                    if change["operation"] == "delete":
+                        self.index.remove(change["row_id"])
+                select = f"SELECT id, {', '.join(self.columns)} FROM {self.table}"
+                for row in fetch_by_ids(select, changed):
+                    self.index.add(row["id"], self._text(row[column] for column in self.columns))
+            self.checked_at = time.monotonic()
+
+    def search(self, query, limit=None, within=None):
+        self.refresh()
+        return [doc_id for doc_id, _ in self.index.search(query, limit=limit, within=within)]
+
+
+_properties = _TableSearch("properties", ("location", "type"))
+_clients = _TableSearch("clients", ("name", "preferences"))
+
+def _in_rank_order(ids, by_id):
+    return [by_id[i] for i in ids if i in by_id]
+
+def search_properties(query, filters=None, limit=DEFAULT_LIMIT):
+    """Returns up to `limit` Property objects matching `query`, best match first.
+
+    filters is an optional dict as for property_controller.find_properties,
+    e.g. {"status": "available", "max_price": 2_000_000}.
+    """
+    conditions, values = property_filter_conditions(filters)
+    if not conditions:
+        ids = _properties.search(query, limit=limit)
+        return _in_rank_order(ids, get_properties_by_ids(ids))
+
+    ranked = _properties.search(query)
+    values = tuple(values)
+    chunk_size = max(limit * 4, 500)
+    results = []
+    for start in range(0, len(ranked), chunk_size):
+        chunk = ranked[start:start + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        query_sql = (f"SELECT * FROM properties WHERE id IN ({placeholders}) AND "
+                     + " AND ".join(conditions))
+        rows = execute_query(query_sql, tuple(chunk) + values, fetch=True)
+        by_id = {row["id"]: Property.from_dict(row) for row in rows}
+        results.extend(_in_rank_order(chunk, by_id))
+        if len(results) >= limit:
+            break
+    return results[:limit]
+
+def search_clients(query, broker_id=None, limit=DEFAULT_LIMIT):
+    """Returns up to `limit` Client objects whose name or preferences match `query`.
+
+    With broker_id, only that broker's clients are searched.
+    """
+    within = None
+    if broker_id is not None:
+        rows = execute_query("SELECT id FROM clients WHERE broker_id = %s", (broker_id,), fetch=True)
+        within = [row["id"] for row in rows]
+    ids = _clients.search(query, limit=limit, within=within)
+    return _in_rank_order(ids, get_clients_by_ids(ids))
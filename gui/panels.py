@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from decimal import Decimal 
 import datetime 
+from functools import partial
+
+from gui.task_runner import TaskRunner
+from gui.tree_rows import TreeRows
+from gui.virtual_table import VirtualTable
 
 # Import all models
 from models.client import Client
@@ -10,16 +15,38 @@ from models.property import Property
 from models.sale import Sale
 
 # Import all controllers, including get_by_id functions for pre-checks and new broker-specific filters
-from controllers.client_controller import get_all_clients, add_client, update_client, delete_client, get_client_by_id, get_clients_by_broker_id
-from controllers.broker_controller import get_all_brokers, add_broker, update_broker, delete_broker, get_broker_by_id
-from controllers.property_controller import get_all_properties, add_property, update_property, delete_property, get_property_by_id
-from controllers.sale_controller import get_all_sales, add_sale, update_sale, delete_sale, get_sales_by_broker_id, get_sale_by_id # get_sale_by_id is needed for broker sale permissions
+from controllers.client_controller import get_all_clients, add_client, update_client, delete_client, get_client_by_id, get_clients_by_broker_id, get_clients_page
+from controllers.broker_controller import get_all_brokers, add_broker, update_broker, delete_broker, get_brokers_page
+from controllers.property_controller import get_all_properties, add_property, update_property, delete_property, get_properties_page, find_properties
+from controllers.search_controller import search_properties, search_clients
+from controllers.sale_controller import add_sale, update_sale, delete_sale, validate_sale_references # validate_sale_references covers FK pre-checks and broker sale permissions
+from controllers.sale_controller import get_sale_details, get_sale_details_page, get_sale_detail # sales with property location, client and broker names
+
+class ActionError(Exception):
+    """Raised inside a background action to show an error dialog with a specific title."""
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
 
 class BasePanel(ttk.Frame):
+    # Virtualized mode: the table holds at most PAGE_SIZE * MAX_PAGES rows and
+    # pages more in from the database on scroll instead of loading everything.
+    virtual_mode = True
+    PAGE_SIZE = 100
+    MAX_PAGES = 3
+    # Panels that implement search_items() get a search box above the table
+    searchable = False
+    SEARCH_LIMIT = 200
+    SEARCH_DELAY_MS = 250  # wait for a pause in typing before searching
+
     def __init__(self, parent, role, user_id): # Added role and user_id
         super().__init__(parent)
         self.role = role
         self.user_id = user_id # This will be broker_id for broker, client_id for client, None for admin
+        # Runs DB calls off the Tk main thread (see gui/task_runner.py)
+        self.runner = TaskRunner(self, on_busy=self._set_loading)
         self.setup_ui()
     
     @classmethod
@@ -137,6 +164,9 @@ class BasePanel(ttk.Frame):
         self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
     
     def create_table(self):
+        if self.searchable:
+            self.create_search_bar()
+
         # Create treeview with scrollbar
         self.tree_frame = ttk.Frame(self.main_frame)
         self.tree_frame.pack(expand=True, fill="both", pady=(0, 10))
@@ -148,7 +178,81 @@ class BasePanel(ttk.Frame):
         self.tree.pack(expand=True, fill="both")
         
         self.tree_scroll.config(command=self.tree.yview)
+
+        # Row count / position and loading indicator shown under the table
+        self.status_frame = ttk.Frame(self.main_frame)
+        self.status_frame.pack(fill="x", pady=(0, 5))
+        self.table_status_var = tk.StringVar()
+        ttk.Label(self.status_frame, textvariable=self.table_status_var).pack(side="left")
+        self.loading_var = tk.StringVar()
+        ttk.Label(self.status_frame, textvariable=self.loading_var, foreground="#1976D2").pack(side="right")
+
+        if self.virtual_mode:
+            self.table = VirtualTable(
+                self.tree,
+                self.tree_scroll,
+                fetch_page=self.fetch_page,
+                row_values=self.row_values,
+                page_size=self.PAGE_SIZE,
+                max_pages=self.MAX_PAGES,
+                on_status=self.table_status_var.set,
+                runner=self.runner,
+                on_error=self._show_refresh_error
+            )
+            self.rows = self.table.rows
+        else:
+            self.rows = TreeRows(self.tree, self.row_values)
     
+    def create_search_bar(self):
+        self.search_frame = ttk.Frame(self.main_frame)
+        self.search_frame.pack(fill="x", pady=(0, 5))
+        ttk.Label(self.search_frame, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        search_entry.bind("<Return>", lambda event: self.run_search())
+        search_entry.bind("<KeyRelease>", self._schedule_search)
+        ttk.Button(self.search_frame, text="Clear", command=self.clear_search).pack(side="right")
+        self._search_pending = None
+
+    def _schedule_search(self, event):
+        if event.keysym == "Return":
+            return
+        if self._search_pending is not None:
+            self.after_cancel(self._search_pending)
+        self._search_pending = self.after(self.SEARCH_DELAY_MS, self.run_search)
+
+    def _search_active(self):
+        return self.searchable and bool(self.search_var.get().strip())
+
+    def run_search(self):
+        """Shows the records matching the search box, best match first (empty box: all rows)."""
+        self._search_pending = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.clear_search()
+            return
+        self.runner.submit(self.search_items, query, key="search",
+                           on_success=self._show_search_results, on_error=self._show_refresh_error)
+
+    def _show_search_results(self, items):
+        status = f"{len(items):,} matches" + (" (best shown)" if len(items) >= self.SEARCH_LIMIT else "")
+        if self.virtual_mode:
+            self.table.show(items, status)
+        else:
+            self.rows.clear()
+            for item in items:
+                self.rows.insert(item)
+            self.table_status_var.set(status)
+
+    def clear_search(self):
+        self.runner.cancel("search")
+        self.search_var.set("")
+        if self.virtual_mode:
+            self.table.reset()
+        else:
+            self.refresh_data()
+
     def create_buttons(self):
         self.button_frame = ttk.Frame(self.main_frame)
         # We will pack this conditionally later
@@ -198,7 +302,87 @@ class BasePanel(ttk.Frame):
         self.form_frame.pack(fill="x", pady=(0, 10))
     
     def refresh_data(self):
-        pass
+        # Both paths load on a worker thread; a newer refresh supersedes an older one.
+        # Only rows that were added, changed or removed are touched in the widget.
+        if self._search_active():
+            self.run_search()
+        elif self.virtual_mode:
+            self.table.refresh()
+        else:
+            self.runner.submit(self.fetch_all, key="refresh", on_success=self._show_all,
+                               on_error=self._show_refresh_error)
+
+    def _show_all(self, items):
+        self.rows.sync(items)
+        self.table_status_var.set(f"{len(items):,} rows")
+
+    def upsert_row(self, item):
+        """Shows one added or updated record without reloading the table."""
+        if self.virtual_mode:
+            self.table.upsert(item)
+        else:
+            self.rows.upsert(item)
+            self.table_status_var.set(f"{len(self.rows.values):,} rows")
+
+    def remove_row(self, item_id):
+        """Removes one deleted record without reloading the table."""
+        if self.virtual_mode:
+            self.table.remove(item_id)
+        else:
+            self.rows.remove(item_id)
+            self.table_status_var.set(f"{len(self.rows.values):,} rows")
+
+    def _show_refresh_error(self, error):
+        messagebox.showerror("Error", f"Error refreshing data: {error}")
+
+    def _set_loading(self, busy):
+        """Shows a loading indicator and busy cursor while DB work is in flight."""
+        self.loading_var.set("Loading…" if busy else "")
+        self.configure(cursor="watch" if busy else "")
+
+    def run_action(self, work, success_message, removed_id=None):
+        """Runs `work` (the DB calls of an add/update/delete) on a worker thread.
+
+        On success only the affected row is updated: the row for removed_id
+        is dropped, or the model object returned by `work` is inserted or
+        updated. If `work` returns None the table is refreshed instead. Then
+        the form is cleared and success_message shown. `work` must not touch
+        Tk widgets or variables; read the form before calling this. Raise
+        ActionError from `work` to show a dialog with a specific title.
+        """
+        def done(result):
+            if removed_id is not None:
+                self.remove_row(removed_id)
+            elif result is not None:
+                self.upsert_row(result)
+            else:
+                self.refresh_data()
+            self.clear_form()
+            messagebox.showinfo("Success", success_message)
+
+        def failed(error):
+            if isinstance(error, ActionError):
+                messagebox.showerror(error.title, error.message)
+            else:
+                messagebox.showerror("Error", str(error))
+
+        self.runner.submit(work, on_success=done, on_error=failed)
+
+    def fetch_all(self):
+        """Returns every model object to show (non-virtual mode). Overridden by subclasses."""
+        raise NotImplementedError("Subclasses must implement fetch_all method.")
+
+    def fetch_page(self, after_id=None, before_id=None, limit=100, with_total=True):
+        """Returns one utils.db_helper.Page of model objects (virtual mode). Overridden by subclasses."""
+        raise NotImplementedError("Subclasses must implement fetch_page method.")
+
+    def row_values(self, item):
+        """Returns the Treeview values tuple for one model object. Overridden by subclasses."""
+        raise NotImplementedError("Subclasses must implement row_values method.")
+
+    def search_items(self, query):
+        """Returns the model objects matching `query`, best first (searchable panels)."""
+        raise NotImplementedError("Searchable panels must implement search_items method.")
     
     def add_item(self):
         pass
@@ -238,6 +422,8 @@ class BasePanel(ttk.Frame):
 
 
 class ClientPanel(BasePanel):
+    searchable = True
+
     def __init__(self, parent, role, user_id):
         super().__init__(parent, role, user_id)
         self.setup_client_ui()
@@ -294,25 +480,32 @@ class ClientPanel(BasePanel):
             self.broker_id_entry.config(state="normal")
 
 
-    def refresh_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
+    def fetch_all(self):
         if self.role == "Broker":
             # Broker sees only their clients
-            clients = get_clients_by_broker_id(self.user_id) # Use the broker's ID
-        else:
-            # Admin sees all clients (Client role won't see this tab, but properties will)
-            clients = get_all_clients() 
-            
-        for client in clients:
-            self.tree.insert("", "end", values=(
-                client.id,
-                client.name,
-                client.contact,
-                client.preferences,
-                client.broker_id
-            ))
+            return get_clients_by_broker_id(self.user_id) # Use the broker's ID
+        # Admin sees all clients (Client role won't see this tab, but properties will)
+        return get_all_clients()
+
+    def fetch_page(self, after_id=None, before_id=None, limit=100, with_total=True):
+        # Broker sees only their clients
+        broker_id = self.user_id if self.role == "Broker" else None
+        return get_clients_page(after_id=after_id, before_id=before_id, limit=limit,
+                                broker_id=broker_id, with_total=with_total)
+
+    def search_items(self, query):
+        # Broker searches only their clients
+        broker_id = self.user_id if self.role == "Broker" else None
+        return search_clients(query, broker_id=broker_id, limit=self.SEARCH_LIMIT)
+
+    def row_values(self, client):
+        return (
+            client.id,
+            client.name,
+            client.contact,
+            client.preferences,
+            client.broker_id
+        )
     
     def add_item(self):
         try:
@@ -328,10 +521,12 @@ class ClientPanel(BasePanel):
                 preferences=self.preferences_var.get(),
                 broker_id=broker_id_for_new_client
             )
-            add_client(new_client) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Client added successfully!")
+
+            def work():
+                new_client.id = add_client(new_client)
+                return new_client
+
+            self.run_action(work, "Client added successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -343,13 +538,6 @@ class ClientPanel(BasePanel):
         
         try:
             client_id = self.tree.item(selected[0])["values"][0]
-            
-            # If broker, ensure they can only update their own clients
-            if self.role == "Broker":
-                existing_client = get_client_by_id(client_id)
-                if existing_client and existing_client.broker_id != self.user_id:
-                    messagebox.showerror("Permission Denied", "You can only update your own clients.")
-                    return
 
             broker_id_for_update = int(self.broker_id_var.get()) if self.broker_id_var.get() else None
             if self.role == "Broker":
@@ -362,10 +550,17 @@ class ClientPanel(BasePanel):
                 preferences=self.preferences_var.get(),
                 broker_id=broker_id_for_update
             )
-            update_client(updated_client) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Client updated successfully!")
+
+            def work():
+                # If broker, ensure they can only update their own clients
+                if self.role == "Broker":
+                    existing_client = get_client_by_id(client_id)
+                    if existing_client and existing_client.broker_id != self.user_id:
+                        raise ActionError("Permission Denied", "You can only update your own clients.")
+                update_client(updated_client)
+                return updated_client
+
+            self.run_action(work, "Client updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -378,18 +573,16 @@ class ClientPanel(BasePanel):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this client?"):
             try:
                 client_id = self.tree.item(selected[0])["values"][0]
-                
-                # If broker, ensure they can only delete their own clients
-                if self.role == "Broker":
-                    existing_client = get_client_by_id(client_id)
-                    if existing_client and existing_client.broker_id != self.user_id:
-                        messagebox.showerror("Permission Denied", "You can only delete your own clients.")
-                        return
 
-                delete_client(client_id)
-                self.refresh_data()
-                self.clear_form()
-                messagebox.showinfo("Success", "Client deleted successfully!")
+                def work():
+                    # If broker, ensure they can only delete their own clients
+                    if self.role == "Broker":
+                        existing_client = get_client_by_id(client_id)
+                        if existing_client and existing_client.broker_id != self.user_id:
+                            raise ActionError("Permission Denied", "You can only delete your own clients.")
+                    delete_client(client_id)
+
+                self.run_action(work, "Client deleted successfully!", removed_id=client_id)
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
@@ -470,18 +663,19 @@ class BrokerPanel(BasePanel):
         self.years_experience_var = tk.StringVar()
         ttk.Entry(self.form_frame, textvariable=self.years_experience_var, state=entry_state).grid(row=0, column=3, padx=5, pady=5)
     
-    def refresh_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Brokers panel always shows all brokers (only accessible by Admin)
-        brokers = get_all_brokers() 
-        for broker in brokers:
-            self.tree.insert("", "end", values=(
-                broker.id,
-                broker.name,
-                broker.years_experience
-            ))
+    # Brokers panel always shows all brokers (only accessible by Admin)
+    def fetch_all(self):
+        return get_all_brokers()
+
+    def fetch_page(self, after_id=None, before_id=None, limit=100, with_total=True):
+        return get_brokers_page(after_id=after_id, before_id=before_id, limit=limit, with_total=with_total)
+
+    def row_values(self, broker):
+        return (
+            broker.id,
+            broker.name,
+            broker.years_experience
+        )
     
     def add_item(self):
         try:
@@ -490,10 +684,12 @@ class BrokerPanel(BasePanel):
                 name=self.name_var.get(),
                 years_experience=int(self.years_experience_var.get())
             )
-            add_broker(new_broker) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Broker added successfully!")
+
+            def work():
+                new_broker.id = add_broker(new_broker)
+                return new_broker
+
+            self.run_action(work, "Broker added successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -510,10 +706,12 @@ class BrokerPanel(BasePanel):
                 name=self.name_var.get(),
                 years_experience=int(self.years_experience_var.get())
             )
-            update_broker(updated_broker) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Broker updated successfully!")
+
+            def work():
+                update_broker(updated_broker)
+                return updated_broker
+
+            self.run_action(work, "Broker updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -526,10 +724,7 @@ class BrokerPanel(BasePanel):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this broker?"):
             try:
                 broker_id = self.tree.item(selected[0])["values"][0]
-                delete_broker(broker_id)
-                self.refresh_data()
-                self.clear_form()
-                messagebox.showinfo("Success", "Broker deleted successfully!")
+                self.run_action(partial(delete_broker, broker_id), "Broker deleted successfully!", removed_id=broker_id)
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
@@ -551,11 +746,16 @@ class BrokerPanel(BasePanel):
             self.years_experience_var.set(self.years_experience_var.get())
 
 class PropertyPanel(BasePanel):
+    searchable = True
+    filters = {}  # find_properties filters applied to the table and to searches
+
     def __init__(self, parent, role, user_id):
         super().__init__(parent, role, user_id)
         self.setup_property_ui()
     
     def setup_property_ui(self):
+        self.create_filter_bar()
+
         self.tree["columns"] = ("id", "location", "type", "size", "price", "status")
         self.tree.column("#0", width=0, stretch="no")
         self.tree.column("id", width=50)
@@ -606,21 +806,128 @@ class PropertyPanel(BasePanel):
         self.status_combobox.grid(row=2, column=1, padx=5, pady=5)
         self.status_combobox.set('available') 
     
-    def refresh_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # All roles can see all properties
-        properties = get_all_properties() 
-        for property_item in properties: 
-            self.tree.insert("", "end", values=(
-                property_item.id,
-                property_item.location,
-                property_item.type, 
-                property_item.size,
-                property_item.price,
-                property_item.status
-            ))
+    def create_filter_bar(self):
+        self.filter_frame = ttk.LabelFrame(self.main_frame, text="Filters")
+        self.filter_frame.pack(fill="x", pady=(0, 5), before=self.tree_frame)
+
+        ttk.Label(self.filter_frame, text="Type:").grid(row=0, column=0, padx=5, pady=2)
+        self.filter_type_var = tk.StringVar(value="any")
+        ttk.Combobox(self.filter_frame, textvariable=self.filter_type_var, width=12, state="readonly",
+                     values=['any', 'house', 'apartment', 'land', 'commercial']).grid(row=0, column=1, padx=5, pady=2)
+
+        ttk.Label(self.filter_frame, text="Location:").grid(row=0, column=2, padx=5, pady=2)
+        self.filter_location_var = tk.StringVar()
+        ttk.Entry(self.filter_frame, textvariable=self.filter_location_var, width=18).grid(row=0, column=3, padx=5, pady=2)
+
+        ttk.Label(self.filter_frame, text="Status:").grid(row=0, column=4, padx=5, pady=2)
+        self.filter_status_var = tk.StringVar(value="any")
+        ttk.Combobox(self.filter_frame, textvariable=self.filter_status_var, width=10, state="readonly",
+                     values=['any', 'available', 'sold']).grid(row=0, column=5, padx=5, pady=2)
+
+        ttk.Label(self.filter_frame, text="Size:").grid(row=1, column=0, padx=5, pady=2)
+        self.filter_min_size_var = tk.StringVar()
+        self.filter_max_size_var = tk.StringVar()
+        size_frame = ttk.Frame(self.filter_frame)
+        size_frame.grid(row=1, column=1, padx=5, pady=2)
+        ttk.Entry(size_frame, textvariable=self.filter_min_size_var, width=6).pack(side="left")
+        ttk.Label(size_frame, text="-").pack(side="left", padx=2)
+        ttk.Entry(size_frame, textvariable=self.filter_max_size_var, width=6).pack(side="left")
+
+        ttk.Label(self.filter_frame, text="Price:").grid(row=1, column=2, padx=5, pady=2)
+        self.filter_min_price_var = tk.StringVar()
+        self.filter_max_price_var = tk.StringVar()
+        price_frame = ttk.Frame(self.filter_frame)
+        price_frame.grid(row=1, column=3, padx=5, pady=2)
+        ttk.Entry(price_frame, textvariable=self.filter_min_price_var, width=10).pack(side="left")
+        ttk.Label(price_frame, text="-").pack(side="left", padx=2)
+        ttk.Entry(price_frame, textvariable=self.filter_max_price_var, width=10).pack(side="left")
+
+        ttk.Button(self.filter_frame, text="Apply", command=self.apply_filters).grid(row=1, column=4, padx=5, pady=2)
+        ttk.Button(self.filter_frame, text="Reset", command=self.reset_filters).grid(row=1, column=5, padx=5, pady=2)
+
+    def read_filters(self):
+        """Returns the filter controls as a find_properties filters dict (blank fields are left out)."""
+        def number(var, convert, label):
+            text = var.get().strip()
+            if not text:
+                return None
+            try:
+                return convert(text)
+            except ValueError:
+                raise ValueError(f"{label} must be a number") from None
+
+        filters = {
+            "type": self.filter_type_var.get(),
+            "status": self.filter_status_var.get(),
+            "location": self.filter_location_var.get().strip(),
+            "min_size": number(self.filter_min_size_var, int, "Minimum size"),
+            "max_size": number(self.filter_max_size_var, int, "Maximum size"),
+            "min_price": number(self.filter_min_price_var, Decimal, "Minimum price"),
+            "max_price": number(self.filter_max_price_var, Decimal, "Maximum price"),
+        }
+        return {name: value for name, value in filters.items() if value not in (None, "", "any")}
+
+    def apply_filters(self):
+        try:
+            self.filters = self.read_filters()
+        except (ValueError, ArithmeticError) as e:
+            messagebox.showerror("Invalid filter", str(e))
+            return
+        self.refresh_filtered()
+
+    def reset_filters(self):
+        self.filter_type_var.set("any")
+        self.filter_status_var.set("any")
+        for var in (self.filter_location_var, self.filter_min_size_var, self.filter_max_size_var,
+                    self.filter_min_price_var, self.filter_max_price_var):
+            var.set("")
+        self.filters = {}
+        self.refresh_filtered()
+
+    def refresh_filtered(self):
+        # Filters change which rows exist, so the table starts again from the first page
+        if self._search_active():
+            self.run_search()
+        elif self.virtual_mode:
+            self.table.reset()
+        else:
+            self.refresh_data()
+
+    # All roles can see all properties
+    def fetch_all(self):
+        if not self.filters:
+            return get_all_properties()
+        items, cursor = [], None
+        while True:
+            page = find_properties(self.filters, page=cursor, limit=1000, with_total=False)
+            items.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                return items
+
+    def fetch_page(self, after_id=None, before_id=None, limit=100, with_total=True):
+        if not self.filters:
+            return get_properties_page(after_id=after_id, before_id=before_id, limit=limit, with_total=with_total)
+        # In id order a find_properties cursor is just the id
+        cursor = None
+        if after_id is not None:
+            cursor = ("after", after_id, after_id)
+        elif before_id is not None:
+            cursor = ("before", before_id, before_id)
+        return find_properties(self.filters, page=cursor, limit=limit, with_total=with_total)
+
+    def search_items(self, query):
+        return search_properties(query, filters=self.filters, limit=self.SEARCH_LIMIT)
+
+    def row_values(self, property_item):
+        return (
+            property_item.id,
+            property_item.location,
+            property_item.type, 
+            property_item.size,
+            property_item.price,
+            property_item.status
+        )
     
     def add_item(self):
         # Clients are disabled by BasePanel.create_buttons
@@ -633,10 +940,12 @@ class PropertyPanel(BasePanel):
                 price=float(self.price_var.get()), 
                 status=self.status_var.get()
             )
-            add_property(new_property) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Property added successfully!")
+
+            def work():
+                new_property.id = add_property(new_property)
+                return new_property
+
+            self.run_action(work, "Property added successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -657,10 +966,12 @@ class PropertyPanel(BasePanel):
                 price=float(self.price_var.get()), 
                 status=self.status_var.get()
             )
-            update_property(updated_property) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Property updated successfully!")
+
+            def work():
+                update_property(updated_property)
+                return updated_property
+
+            self.run_action(work, "Property updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -674,10 +985,7 @@ class PropertyPanel(BasePanel):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this property?"):
             try:
                 property_id = self.tree.item(selected[0])["values"][0]
-                delete_property(property_id)
-                self.refresh_data()
-                self.clear_form()
-                messagebox.showinfo("Success", "Property deleted successfully!")
+                self.run_action(partial(delete_property, property_id), "Property deleted successfully!", removed_id=property_id)
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
@@ -743,19 +1051,26 @@ class SalePanel(BasePanel):
         # It's only accessible by Admin and Broker.
         entry_state = "normal" 
 
-        self.tree["columns"] = ("id", "property_id", "client_id", "broker_id", "date", "final_price")
+        self.tree["columns"] = ("id", "property_id", "property_location", "client_id", "client_name",
+                                "broker_id", "broker_name", "date", "final_price")
         self.tree.column("#0", width=0, stretch="no")
         self.tree.column("id", width=50)
-        self.tree.column("property_id", width=100)
-        self.tree.column("client_id", width=100)
-        self.tree.column("broker_id", width=100)
-        self.tree.column("date", width=150)
-        self.tree.column("final_price", width=150)
+        self.tree.column("property_id", width=80)
+        self.tree.column("property_location", width=150)
+        self.tree.column("client_id", width=80)
+        self.tree.column("client_name", width=150)
+        self.tree.column("broker_id", width=80)
+        self.tree.column("broker_name", width=150)
+        self.tree.column("date", width=100)
+        self.tree.column("final_price", width=120)
         
         self.tree.heading("id", text="ID")
         self.tree.heading("property_id", text="Property ID")
+        self.tree.heading("property_location", text="Property")
         self.tree.heading("client_id", text="Client ID")
+        self.tree.heading("client_name", text="Client")
         self.tree.heading("broker_id", text="Broker ID")
+        self.tree.heading("broker_name", text="Broker")
         self.tree.heading("date", text="Sale Date")
         self.tree.heading("final_price", text="Final Price")
         
@@ -795,33 +1110,52 @@ class SalePanel(BasePanel):
         self.final_price_var = tk.StringVar()
         ttk.Entry(self.form_frame, textvariable=self.final_price_var, state=entry_state).grid(row=2, column=1, padx=5, pady=5)
     
-    def refresh_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        try:
-            if self.role == "Broker":
-                # Broker sees only their sales
-                sales = get_sales_by_broker_id(self.user_id) # Use the broker's ID
-            else:
-                # Admin sees all sales (Client role won't see this tab)
-                sales = get_all_sales() 
-            
-            for i, sale in enumerate(sales):
-                formatted_date = sale.date.isoformat() if hasattr(sale.date, 'isoformat') else str(sale.date)
-                formatted_price = f"{sale.final_price:.2f}" if isinstance(sale.final_price, (float, int, Decimal)) else str(sale.final_price)
-
-                values_to_insert = (
-                    str(sale.id),
-                    str(sale.property_id),
-                    str(sale.client_id),
-                    str(sale.broker_id),
-                    formatted_date, 
-                    formatted_price
-                )
-                self.tree.insert("", "end", values=values_to_insert)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error refreshing sales data: {e}")
+    def fetch_all(self):
+        if self.role == "Broker":
+            # Broker sees only their sales
+            return get_sale_details(broker_id=self.user_id) # Use the broker's ID
+        # Admin sees all sales (Client role won't see this tab)
+        return get_sale_details()
+
+    def fetch_page(self, after_id=None, before_id=None, limit=100, with_total=True):
+        # Broker sees only their sales
+        broker_id = self.user_id if self.role == "Broker" else None
+        return get_sale_details_page(after_id=after_id, before_id=before_id, limit=limit,
+                                     broker_id=broker_id, with_total=with_total)
+
+    def row_values(self, sale):
+        # sale is a SaleDetail: the names come from the same query as the ids
+        formatted_date = sale.date.isoformat() if hasattr(sale.date, 'isoformat') else str(sale.date)
+        formatted_price = f"{sale.final_price:.2f}" if isinstance(sale.final_price, (float, int, Decimal)) else str(sale.final_price)
+
+        return (
+            str(sale.id),
+            str(sale.property_id),
+            sale.property_location,
+            str(sale.client_id),
+            sale.client_name,
+            str(sale.broker_id),
+            sale.broker_name,
+            formatted_date, 
+            formatted_price
+        )
+
+    def _check_sale_references(self, property_id_val, client_id_val, broker_id_val, sale_id=None, action="update"):
+        """Pre-check for existence of foreign keys (and, for brokers, ownership of sale_id).
+
+        Everything is checked with one validate_sale_references query. Runs on a worker thread.
+        """
+        refs = validate_sale_references(property_id_val, client_id_val, broker_id_val, sale_id)
+        # For Broker role, check permission
+        if self.role == "Broker" and sale_id is not None:
+            if refs['sale_broker_id'] is not None and refs['sale_broker_id'] != self.user_id:
+                raise ActionError("Permission Denied", f"You can only {action} your own sales.")
+        if property_id_val is not None and not refs['property_exists']:
+            raise ActionError("Input Error", f"Property ID {property_id_val} does not exist.")
+        if client_id_val is not None and not refs['client_exists']:
+            raise ActionError("Input Error", f"Client ID {client_id_val} does not exist.")
+        if broker_id_val is not None and not refs['broker_exists']:
+            raise ActionError("Input Error", f"Broker ID {broker_id_val} does not exist.")
 
     def add_item(self):
         try:
@@ -832,18 +1166,6 @@ class SalePanel(BasePanel):
             # For Broker role, auto-assign their ID
             if self.role == "Broker":
                 broker_id_val = self.user_id 
-            
-            # --- Pre-check for existence of foreign keys ---
-            if property_id_val is not None and not get_property_by_id(property_id_val):
-                messagebox.showerror("Input Error", f"Property ID {property_id_val} does not exist.")
-                return
-            if client_id_val is not None and not get_client_by_id(client_id_val):
-                messagebox.showerror("Input Error", f"Client ID {client_id_val} does not exist.")
-                return
-            if broker_id_val is not None and not get_broker_by_id(broker_id_val):
-                messagebox.showerror("Input Error", f"Broker ID {broker_id_val} does not exist.")
-                return
-            # --- End pre-check ---
 
             sale_date_str = self.date_var.get()
             sale_date = datetime.date.fromisoformat(sale_date_str) if sale_date_str else None
@@ -858,10 +1180,13 @@ class SalePanel(BasePanel):
                 date=sale_date,
                 final_price=final_price_val
             )
-            add_sale(new_sale) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Sale added successfully!")
+
+            def work():
+                self._check_sale_references(property_id_val, client_id_val, broker_id_val)
+                new_sale.id = add_sale(new_sale)
+                return get_sale_detail(new_sale.id)
+
+            self.run_action(work, "Sale added successfully!")
         except ValueError:
             messagebox.showerror("Input Error", "Please ensure all ID and Price fields are valid numbers and Date is BCE-MM-DD.")
         except Exception as e:
@@ -880,26 +1205,10 @@ class SalePanel(BasePanel):
             client_id_val = int(self.client_id_var.get()) if self.client_id_var.get() else None
             broker_id_val = int(self.broker_id_var.get()) if self.broker_id_var.get() else None
 
-            # For Broker role, auto-assign their ID and check permission
+            # For Broker role, auto-assign their ID
             if self.role == "Broker":
-                existing_sale = get_sale_by_id(sale_id)
-                if existing_sale and existing_sale.broker_id != self.user_id:
-                    messagebox.showerror("Permission Denied", "You can only update your own sales.")
-                    return
                 broker_id_val = self.user_id 
 
-            # --- Pre-check for existence of foreign keys ---
-            if property_id_val is not None and not get_property_by_id(property_id_val):
-                messagebox.showerror("Input Error", f"Property ID {property_id_val} does not exist.")
-                return
-            if client_id_val is not None and not get_client_by_id(client_id_val):
-                messagebox.showerror("Input Error", f"Client ID {client_id_val} does not exist.")
-                return
-            if broker_id_val is not None and not get_broker_by_id(broker_id_val):
-                messagebox.showerror("Input Error", f"Broker ID {broker_id_val} does not exist.")
-                return
-            # --- End pre-check ---
-
             sale_date_str = self.date_var.get()
             sale_date = datetime.date.fromisoformat(sale_date_str) if sale_date_str else None
 
@@ -913,10 +1222,13 @@ class SalePanel(BasePanel):
                 date=sale_date,
                 final_price=final_price_val
             )
-            update_sale(updated_sale) 
-            self.refresh_data()
-            self.clear_form()
-            messagebox.showinfo("Success", "Sale updated successfully!")
+
+            def work():
+                self._check_sale_references(property_id_val, client_id_val, broker_id_val, sale_id=sale_id)
+                update_sale(updated_sale)
+                return get_sale_detail(sale_id)
+
+            self.run_action(work, "Sale updated successfully!")
         except ValueError:
             messagebox.showerror("Input Error", "Please ensure all ID and Price fields are valid numbers and Date is BCE-MM-DD.")
         except Exception as e:
@@ -931,18 +1243,13 @@ class SalePanel(BasePanel):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this sale?"):
             try:
                 sale_id = self.tree.item(selected[0])["values"][0]
-                
-                # For Broker role, check permission
-                if self.role == "Broker":
-                    existing_sale = get_sale_by_id(sale_id)
-                    if existing_sale and existing_sale.broker_id != self.user_id:
-                        messagebox.showerror("Permission Denied", "You can only delete your own sales.")
-                        return
 
-                delete_sale(sale_id)
-                self.refresh_data()
-                self.clear_form()
-                messagebox.showinfo("Success", "Sale deleted successfully!")
+                def work():
+                    self._check_sale_references(None, None, None, sale_id=sale_id, action="delete")
+                    if not delete_sale(sale_id):
+                        raise ActionError("Error", f"Sale {sale_id} could not be deleted.")
+
+                self.run_action(work, "Sale deleted successfully!", removed_id=sale_id)
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
@@ -962,20 +1269,21 @@ class SalePanel(BasePanel):
 
     def _populate_form_fields(self, values):
         """Populates the Sale form fields from selected treeview values."""
-        # values: (id, property_id, client_id, broker_id, date, final_price)
-        if len(values) >= 6:
+        # values: (id, property_id, property_location, client_id, client_name,
+        #          broker_id, broker_name, date, final_price)
+        if len(values) >= 9:
             self.property_id_var.set(values[1])
-            self.client_id_var.set(values[2])
-            self.broker_id_var.set(values[3])
+            self.client_id_var.set(values[3])
+            self.broker_id_var.set(values[5])
             
-            date_val = values[4]
+            date_val = values[7]
             self.date_var.set(str(date_val)) 
             
             try:
-                price_val = float(values[5])
+                price_val = float(values[8])
                 self.final_price_var.set(f"{price_val:.2f}") 
             except ValueError:
-                self.final_price_var.set(str(values[5])) 
+                self.final_price_var.set(str(values[8])) 
             
             # Ensure broker_id entry state is correct on populate
             if self.role == "Broker":
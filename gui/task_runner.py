@@ -0,0 +1,116 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads shared by every panel. Kept small: each one holds a pooled
+# DB connection while it runs (see utils/db_pool.py).
+MAX_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="db-worker")
+    return _executor
+
+
+class TaskRunner:
+    """Runs blocking calls on the worker pool and hands results back on the Tk thread.
+
+    Tk widgets may only be touched from the main thread, so workers never call
+    back into Tk. Finished futures are queued and drained by an after() poll
+    that runs only while work is in flight.
+
+    Tasks submitted with the same key supersede each other: when a newer task
+    with that key is submitted, the older one is cancelled if it has not
+    started yet, and its result is dropped if it has.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, widget, on_busy=None):
+        self.widget = widget
+        self.on_busy = on_busy  # called with True/False when work starts/stops
+        self._results = queue.Queue()
+        self._generations = {}
+        self._futures = {}
+        self._in_flight = 0
+        self._poll_id = None
+
+    @property
+    def busy(self):
+        """True while any submitted task has not been delivered yet."""
+        return self._in_flight > 0
+
+    def submit(self, fn, *args, key=None, on_success=None, on_error=None, **kwargs):
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._futures.pop(key, None)
+            if previous is not None:
+                previous.cancel()
+
+        if self._in_flight == 0 and self.on_busy:
+            self.on_busy(True)
+        self._in_flight += 1
+
+        future = get_executor().submit(fn, *args, **kwargs)
+        if key is not None:
+            self._futures[key] = future
+        future.add_done_callback(
+            lambda f: self._results.put((key, generation, f, on_success, on_error))
+        )
+        self._schedule_poll()
+        return future
+
+    def cancel(self, key):
+        """Drops the result of the pending task with this key, if any."""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        previous = self._futures.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            try:
+                self._poll_id = self.widget.after(self.POLL_MS, self._poll)
+            except Exception:
+                # Widget already destroyed; nothing left to deliver to
+                self._poll_id = None
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                key, generation, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            if key is not None and self._futures.get(key) is future:
+                del self._futures[key]
+
+            if future.cancelled() or (key is not None and generation != self._generations.get(key)):
+                continue  # superseded by a newer task with the same key
+
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        traceback.print_exception(type(error), error, error.__traceback__)
+                elif on_success:
+                    on_success(future.result())
+            except Exception:
+                traceback.print_exc()
+
+        if self._in_flight:
+            self._schedule_poll()
+        elif self.on_busy:
+            self.on_busy(False)
@@ -0,0 +1,79 @@
+from bisect import bisect_left
+
+
+class TreeRows:
+    """Tracks the rows of a Treeview by record id so refreshes only touch what changed.
+
+    Rows are kept in ascending id order with the id (as a string) as the
+    iid. `values` maps each iid to the tuple last written to the widget, so
+    a row is only rewritten when its values actually differ. Selection and
+    scroll position survive because unchanged rows are never recreated.
+    """
+
+    def __init__(self, tree, row_values):
+        self.tree = tree
+        self.row_values = row_values
+        self.values = {}
+
+    def ids(self):
+        return self.tree.get_children()
+
+    def __contains__(self, item_id):
+        return str(item_id) in self.values
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self.values.clear()
+
+    def insert(self, item, index="end"):
+        iid = str(item.id)
+        values = self.row_values(item)
+        self.tree.insert("", index, iid=iid, values=values)
+        self.values[iid] = values
+
+    def delete(self, iids):
+        if iids:
+            self.tree.delete(*iids)
+            for iid in iids:
+                self.values.pop(iid, None)
+
+    def update(self, item):
+        """Rewrites an existing row if its values changed. Returns True if it did."""
+        iid = str(item.id)
+        values = self.row_values(item)
+        if self.values.get(iid) == values:
+            return False
+        self.tree.item(iid, values=values)
+        self.values[iid] = values
+        return True
+
+    def upsert(self, item):
+        """Updates the row for item, or inserts it at its id position."""
+        if str(item.id) in self.values:
+            self.update(item)
+            return
+        ids = [int(iid) for iid in self.ids()]
+        self.insert(item, bisect_left(ids, int(item.id)))
+
+    def remove(self, item_id):
+        iid = str(item_id)
+        if iid in self.values:
+            self.delete([iid])
+
+    def sync(self, items):
+        """Makes the widget show exactly `items` (sorted by id), touching only changed rows.
+
+        Returns (inserted, updated, deleted) counts.
+        """
+        wanted = {str(item.id) for item in items}
+        stale = [iid for iid in self.ids() if iid not in wanted]
+        self.delete(stale)
+
+        inserted = updated = 0
+        for index, item in enumerate(items):
+            if str(item.id) in self.values:
+                updated += self.update(item)
+            else:
+                self.insert(item, index)
+                inserted += 1
+        return inserted, updated, len(stale)
@@ -0,0 +1,229 @@
+from gui.tree_rows import TreeRows
+
+
+class VirtualTable:
+    """Shows a large table in a ttk.Treeview while holding only a window of it.
+
+    Rows are fetched a page at a time with keyset pagination. Scrolling near
+    the bottom loads the next page and scrolling near the top loads the
+    previous one. Once the window is more than max_pages pages long, rows at
+    the far end are dropped, so the widget never holds more than
+    page_size * max_pages rows however big the table is.
+
+    fetch_page(after_id=..., before_id=..., limit=...) must return a
+    utils.db_helper.Page. row_values(item) turns one model object into the
+    tuple shown in the row. Row iids are the item ids as strings, and all
+    widget writes go through a gui.tree_rows.TreeRows.
+
+    With a gui.task_runner.TaskRunner, pages are fetched on a worker thread
+    and a reset supersedes any page load still in flight. Fetch errors then
+    go to on_error instead of being raised.
+    """
+
+    EDGE = 0.1  # fraction of the scroll range that counts as "near the edge"
+
+    def __init__(self, tree, scrollbar, fetch_page, row_values,
+                 page_size=100, max_pages=3, on_status=None, runner=None, on_error=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.row_values = row_values
+        self.rows = TreeRows(tree, row_values)
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+        self.on_status = on_status
+        self.runner = runner
+        self.on_error = on_error
+
+        self.has_before = False
+        self.has_after = False
+        self.total_estimate = None
+        self.offset = 0  # approximate position of the first loaded row in the table
+        self._pending = None
+        self._loading = False
+
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.scrollbar.config(command=self.tree.yview)
+
+    def _fetch(self, on_page, **kwargs):
+        self._loading = True
+        kwargs.setdefault("limit", self.page_size)
+        if self.runner is None:
+            try:
+                page = self.fetch_page(**kwargs)
+            finally:
+                self._loading = False
+            on_page(page)
+            return
+
+        def done(page):
+            self._loading = False
+            on_page(page)
+
+        def failed(error):
+            self._loading = False
+            if self.on_error:
+                self.on_error(error)
+
+        self.runner.submit(self.fetch_page, key="page", on_success=done, on_error=failed, **kwargs)
+
+    def reset(self):
+        """Drops the current window and loads the first page."""
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        self._fetch(self._apply_reset, after_id=None, before_id=None)
+
+    def _apply_reset(self, page):
+        self.rows.clear()
+        self._insert(page.items, at_top=False)
+        self.has_before = False
+        self.has_after = page.next_cursor is not None
+        self.total_estimate = page.total_estimate
+        self.offset = 0
+        self.tree.yview_moveto(0)
+        self._report()
+
+    def refresh(self):
+        """Re-reads the loaded window and applies only the rows that changed.
+
+        The window keeps its first row, so the scroll position and selection
+        stay where they were.
+        """
+        children = self.tree.get_children()
+        if not children:
+            self.reset()
+            return
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        self._fetch(self._apply_refresh, after_id=int(children[0]) - 1, before_id=None,
+                    limit=max(len(children), self.page_size))
+
+    def _apply_refresh(self, page):
+        if not page.items:
+            self.reset()
+            return
+        self.rows.sync(page.items)
+        self.has_after = page.next_cursor is not None
+        self.total_estimate = page.total_estimate
+        self._report()
+
+    def show(self, items, status=None):
+        """Shows a fixed list of records (e.g. search results) in the given order.
+
+        Paging stops until the next reset().
+        """
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        if self.runner is not None:
+            self.runner.cancel("page")
+            self._loading = False
+        self.rows.clear()
+        self._insert(items, at_top=False)
+        self.has_before = self.has_after = False
+        self.offset = 0
+        self.total_estimate = None
+        self.tree.yview_moveto(0)
+        if self.on_status is not None:
+            self.on_status(status or f"{len(items):,} rows")
+
+    def upsert(self, item):
+        """Shows a changed or newly added record, if it falls inside the loaded window."""
+        if item.id in self.rows:
+            self.rows.update(item)
+            return
+        children = self.tree.get_children()
+        if children:
+            if self.has_after and int(item.id) > int(children[-1]):
+                return
+            if self.has_before and int(item.id) < int(children[0]):
+                return
+        self.rows.upsert(item)
+        self._report()
+
+    def remove(self, item_id):
+        self.rows.remove(item_id)
+        self._report()
+
+    def _insert(self, items, at_top):
+        index = 0
+        for item in items:
+            self.rows.insert(item, index if at_top else "end")
+            if at_top:
+                index += 1
+
+    def _on_tree_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        first, last = float(first), float(last)
+        # Defer the fetch so it doesn't run inside Tk's scroll callback
+        if self._pending is None and not self._loading:
+            if last >= 1 - self.EDGE and self.has_after:
+                self._pending = self.tree.after_idle(self._load_next)
+            elif first <= self.EDGE and self.has_before:
+                self._pending = self.tree.after_idle(self._load_previous)
+
+    def _first_visible_index(self, children):
+        return int(round(self.tree.yview()[0] * len(children))) if children else 0
+
+    def _load_next(self):
+        self._pending = None
+        children = self.tree.get_children()
+        if children:
+            self._fetch(self._apply_next, after_id=int(children[-1]), before_id=None, with_total=False)
+
+    def _apply_next(self, page):
+        children = self.tree.get_children()
+        top = self._first_visible_index(children)
+        self._insert(page.items, at_top=False)
+        self.has_after = page.next_cursor is not None
+
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            self.rows.delete(children[:excess])
+            self.has_before = True
+            self.offset += excess
+            top -= excess
+        self._restore_view(top)
+
+    def _load_previous(self):
+        self._pending = None
+        children = self.tree.get_children()
+        if children:
+            self._fetch(self._apply_previous, after_id=None, before_id=int(children[0]), with_total=False)
+
+    def _apply_previous(self, page):
+        children = self.tree.get_children()
+        top = self._first_visible_index(children)
+        self._insert(page.items, at_top=True)
+        self.has_before = page.prev_cursor is not None
+        self.offset = max(0, self.offset - len(page.items))
+        top += len(page.items)
+
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            self.rows.delete(children[-excess:])
+            self.has_after = True
+        self._restore_view(top)
+
+    def _restore_view(self, top):
+        # Keep the same row at the top of the viewport after rows were added or dropped
+        children = self.tree.get_children()
+        if children:
+            self.tree.yview_moveto(max(0, top) / len(children))
+        self._report()
+
+    def _report(self):
+        if self.on_status is None:
+            return
+        count = len(self.tree.get_children())
+        if not count:
+            self.on_status("No rows")
+            return
+        text = f"Rows {self.offset + 1:,}–{self.offset + count:,}"
+        if self.total_estimate:
+            text += f" of ~{max(self.total_estimate, self.offset + count):,}"
+        self.on_status(text)
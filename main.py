@@ -1,5 +1,9 @@
+from config import db_config
 from gui.app import RealEstateApp
+from utils.query_stats import start_metrics_server
 
 if __name__ == "__main__":
+    if db_config.METRICS_PORT:
+        start_metrics_server(db_config.METRICS_PORT)
     app = RealEstateApp()
     app.run()
\ No newline at end of file
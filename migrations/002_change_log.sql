@@ -0,0 +1,43 @@
+-- updated_at columns and the trigger-maintained change feed
+-- (read by controllers/change_controller.py)
+ALTER TABLE properties ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+ALTER TABLE clients ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+ALTER TABLE brokers ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+ALTER TABLE sales ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(20) NOT NULL,
+    row_id INT NOT NULL,
+    operation ENUM('insert', 'update', 'delete') NOT NULL,
+    changed_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_change_log_table (table_name, id)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_properties_insert AFTER INSERT ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_properties_update AFTER UPDATE ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_properties_delete AFTER DELETE ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_insert AFTER INSERT ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_clients_update AFTER UPDATE ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_clients_delete AFTER DELETE ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_brokers_insert AFTER INSERT ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_brokers_update AFTER UPDATE ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_brokers_delete AFTER DELETE ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_insert AFTER INSERT ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_sales_update AFTER UPDATE ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_sales_delete AFTER DELETE ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', OLD.id, 'delete');
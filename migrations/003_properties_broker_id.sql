@@ -0,0 +1,8 @@
+-- properties.broker_id is written by add_property and assign_broker_to_property
+-- but was never declared. Deleting a broker unassigns their properties.
+ALTER TABLE properties ADD COLUMN broker_id INT NULL;
+
+ALTER TABLE properties
+    ADD INDEX idx_properties_broker_id (broker_id),
+    ADD CONSTRAINT fk_properties_broker FOREIGN KEY (broker_id) REFERENCES brokers(id)
+        ON DELETE SET NULL ON UPDATE CASCADE;
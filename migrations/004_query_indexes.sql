@@ -0,0 +1,12 @@
+-- Indexes for the filters the controllers use. InnoDB secondary indexes end
+-- with the primary key, so (status) also serves "status = ? AND id > ? ORDER BY id"
+-- in get_properties_page.
+--
+-- clients.broker_id and the sales FK columns already have the indexes InnoDB
+-- creates for their foreign keys.
+
+-- get_available_properties, get_properties_page(status=...)
+CREATE INDEX idx_properties_status ON properties (status);
+
+-- get_sales_by_date_range
+CREATE INDEX idx_sales_date ON sales (date);
@@ -0,0 +1,4 @@
+-- Covering index for inventory_summary: GROUP BY status, type with SUM/AVG of
+-- price and size is answered from the index alone, in group order, without
+-- reading table rows or sorting.
+CREATE INDEX idx_properties_status_type ON properties (status, type, price, size);
@@ -0,0 +1,35 @@
+-- Summary tables kept up to date by the controllers (controllers/report_controller.py).
+-- Fill them once after migrating with:
+--     python -m controllers.report_controller rebuild
+
+-- Sales per day / per month (first day of the month) by broker, property type and location
+CREATE TABLE IF NOT EXISTS report_sales_daily (
+    day DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, broker_id, property_type, location),
+    INDEX idx_report_sales_daily_broker (broker_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS report_sales_monthly (
+    month DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, broker_id, property_type, location),
+    INDEX idx_report_sales_monthly_broker (broker_id, month)
+);
+
+-- Property counts and listed value by status and type
+CREATE TABLE IF NOT EXISTS report_inventory (
+    status ENUM('available', 'sold') NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    properties INT NOT NULL DEFAULT 0,
+    total_value DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, type)
+);
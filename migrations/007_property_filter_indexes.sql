@@ -0,0 +1,13 @@
+-- Composite indexes for property_controller.find_properties. Equality filters
+-- come first, then the range / sort column, so each common filter set is one
+-- index range read in sort order:
+--   type (+ location prefix) (+ price range)      idx_properties_type_location
+--   status (+ price range or price sort)          idx_properties_status_price
+--   broker_id (+ status) (+ price)                idx_properties_broker_status
+--   location prefix, or sort by location          idx_properties_location
+--   price range, or sort by price                 idx_properties_price
+CREATE INDEX idx_properties_type_location ON properties (type, location, price);
+CREATE INDEX idx_properties_status_price ON properties (status, price);
+CREATE INDEX idx_properties_broker_status ON properties (broker_id, status, price);
+CREATE INDEX idx_properties_location ON properties (location);
+CREATE INDEX idx_properties_price ON properties (price);
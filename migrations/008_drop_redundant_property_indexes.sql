@@ -0,0 +1,11 @@
+-- Indexes made redundant by later composite indexes. Every index is kept up
+-- to date on each write to properties, so these only cost.
+--
+-- idx_properties_status (004) is a prefix of idx_properties_status_type (005)
+-- and idx_properties_status_price (007). Paging by status in id order now
+-- reads the primary key range and filters on status.
+DROP INDEX idx_properties_status ON properties;
+
+-- idx_properties_broker_id (003) is a prefix of idx_properties_broker_status
+-- (007), which also serves the fk_properties_broker foreign key.
+DROP INDEX idx_properties_broker_id ON properties;
@@ -0,0 +1,20 @@
+-- properties.listed_at: when the property was listed, read by
+-- controllers/analytics_controller.py for time on market. It was derived from
+-- the first 'insert' in change_log, which costs a GROUP BY over the whole log
+-- and is lost when the log is purged.
+ALTER TABLE properties ADD COLUMN listed_at TIMESTAMP NULL DEFAULT NULL;
+
+-- Backfill from the change feed while it still has the entries. Properties
+-- listed before 002_change_log.sql, or whose entries were purged, have no
+-- record of when they were listed and stay NULL.
+UPDATE properties p
+JOIN (
+    SELECT row_id, MIN(changed_at) AS listed_at
+    FROM change_log
+    WHERE table_name = 'properties' AND operation = 'insert'
+    GROUP BY row_id
+) l ON l.row_id = p.id
+SET p.listed_at = l.listed_at;
+
+-- Only now, so the backfill above didn't see every row as listed today
+ALTER TABLE properties MODIFY listed_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP;
@@ -0,0 +1,8 @@
+-- Id-ordered indexes for keyset paging (db_helper.paginate) by status or
+-- broker: WHERE status = ? AND id > ? ORDER BY id LIMIT n reads n entries of
+-- (status, id) in order. 008 dropped idx_properties_status and
+-- idx_properties_broker_id, which gave this order implicitly (InnoDB appends
+-- the primary key to secondary indexes), leaving the composite indexes that
+-- sort every matching row for each page. These spell the order out.
+CREATE INDEX idx_properties_status_id ON properties (status, id);
+CREATE INDEX idx_properties_broker_id_id ON properties (broker_id, id);
@@ -1,4 +1,8 @@
 class Broker:
+    # Table columns in constructor order; also the attribute names
+    COLUMNS = ("id", "name", "years_experience")
+    __slots__ = COLUMNS
+
     def __init__(self, id, name, years_experience):
         self.id = id
         self.name = name
@@ -11,3 +15,8 @@ class Broker:
             name=row['name'],
             years_experience=row['years_experience']
         )
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a Broker from a tuple of values in COLUMNS order."""
+        return cls(*row)
@@ -1,4 +1,8 @@
 class Client:
+    # Table columns in constructor order; also the attribute names
+    COLUMNS = ("id", "name", "contact", "preferences", "broker_id")
+    __slots__ = COLUMNS
+
     def __init__(self, id, name, contact, preferences, broker_id=None):
         self.id = id
         self.name = name
@@ -15,3 +19,8 @@ class Client:
             preferences=row['preferences'],
             broker_id=row['broker_id']
         )
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a Client from a tuple of values in COLUMNS order."""
+        return cls(*row)
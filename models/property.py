@@ -1,4 +1,8 @@
 class Property:
+    # Table columns in constructor order; also the attribute names
+    COLUMNS = ("id", "location", "type", "size", "price", "status", "broker_id")
+    __slots__ = COLUMNS
+
     def __init__(self, id, location, type_, size, price, status="available", broker_id=None):
         self.id = id
         self.location = location
@@ -19,3 +23,8 @@ class Property:
             status=row['status'],
             broker_id=row.get('broker_id')
         )
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a Property from a tuple of values in COLUMNS order."""
+        return cls(*row)
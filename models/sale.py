@@ -1,4 +1,8 @@
 class Sale:
+    # Table columns in constructor order; also the attribute names
+    COLUMNS = ("id", "property_id", "client_id", "broker_id", "date", "final_price")
+    __slots__ = COLUMNS
+
     def __init__(self, id, property_id, client_id, broker_id, date, final_price):
         self.id = id
         self.property_id = property_id
@@ -17,3 +21,8 @@ class Sale:
             date=row['date'],
             final_price=row['final_price']
         )
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a Sale from a tuple of values in COLUMNS order."""
+        return cls(*row)
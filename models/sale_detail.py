@@ -0,0 +1,28 @@
+from models.sale import Sale
+
+
+class SaleDetail(Sale):
+    """A sale with the names of its property, client and broker, read in one join."""
+    COLUMNS = Sale.COLUMNS + ("property_location", "client_name", "broker_name")
+    __slots__ = ("property_location", "client_name", "broker_name")
+
+    def __init__(self, id, property_id, client_id, broker_id, date, final_price,
+                 property_location, client_name, broker_name):
+        super().__init__(id, property_id, client_id, broker_id, date, final_price)
+        self.property_location = property_location
+        self.client_name = client_name
+        self.broker_name = broker_name
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(
+            id=row['id'],
+            property_id=row['property_id'],
+            client_id=row['client_id'],
+            broker_id=row['broker_id'],
+            date=row['date'],
+            final_price=row['final_price'],
+            property_location=row['property_location'],
+            client_name=row['client_name'],
+            broker_name=row['broker_name']
+        )
@@ -1,14 +1,36 @@
 --run in mysql workbench not here!!!!!!!!!
+-- This is the schema with every file in migrations/ applied. For an existing
+-- database, run `python -m utils.migrate` instead.
 CREATE DATABASE IF NOT EXISTS real_estate_db;
 USE real_estate_db;
 
+CREATE TABLE IF NOT EXISTS brokers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    years_experience INT DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS properties (
     id INT AUTO_INCREMENT PRIMARY KEY,
     location VARCHAR(100) NOT NULL,
     type VARCHAR(50) NOT NULL,
     size INT NOT NULL,
     price DECIMAL(15, 2) NOT NULL,
-    status ENUM('available', 'sold') DEFAULT 'available'
+    status ENUM('available', 'sold') DEFAULT 'available',
+    broker_id INT NULL,
+    listed_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_properties_status_type (status, type, price, size),
+    INDEX idx_properties_type_location (type, location, price),
+    INDEX idx_properties_status_price (status, price),
+    INDEX idx_properties_broker_status (broker_id, status, price),
+    INDEX idx_properties_location (location),
+    INDEX idx_properties_price (price),
+    INDEX idx_properties_status_id (status, id),
+    INDEX idx_properties_broker_id_id (broker_id, id),
+    CONSTRAINT fk_properties_broker FOREIGN KEY (broker_id) REFERENCES brokers(id)
+        ON DELETE SET NULL ON UPDATE CASCADE
 );
 
 CREATE TABLE IF NOT EXISTS clients (
@@ -17,16 +39,11 @@ CREATE TABLE IF NOT EXISTS clients (
     contact VARCHAR(100),
     preferences TEXT,
     broker_id INT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (broker_id) REFERENCES brokers(id)
         ON DELETE SET NULL ON UPDATE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS brokers (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    years_experience INT DEFAULT 0
-);
-
 CREATE TABLE IF NOT EXISTS sales (
     id INT AUTO_INCREMENT PRIMARY KEY,
     property_id INT NOT NULL,
@@ -34,10 +51,84 @@ CREATE TABLE IF NOT EXISTS sales (
     broker_id INT NOT NULL,
     date DATE NOT NULL,
     final_price DECIMAL(15,2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_sales_date (date),
     FOREIGN KEY (property_id) REFERENCES properties(id)
         ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (client_id) REFERENCES clients(id)
         ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (broker_id) REFERENCES brokers(id)
         ON DELETE CASCADE ON UPDATE CASCADE
-);
\ No newline at end of file
+);
+
+-- Change feed: one row per insert/update/delete, written by the triggers below.
+-- controllers/change_controller.py reads it with get_changes_since(token).
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(20) NOT NULL,
+    row_id INT NOT NULL,
+    operation ENUM('insert', 'update', 'delete') NOT NULL,
+    changed_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_change_log_table (table_name, id)
+);
+
+-- Summary tables kept up to date by controllers/report_controller.py
+-- Sales per day / per month (first day of the month) by broker, property type and location
+CREATE TABLE IF NOT EXISTS report_sales_daily (
+    day DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, broker_id, property_type, location),
+    INDEX idx_report_sales_daily_broker (broker_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS report_sales_monthly (
+    month DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, broker_id, property_type, location),
+    INDEX idx_report_sales_monthly_broker (broker_id, month)
+);
+
+-- Property counts and listed value by status and type
+CREATE TABLE IF NOT EXISTS report_inventory (
+    status ENUM('available', 'sold') NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    properties INT NOT NULL DEFAULT 0,
+    total_value DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, type)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_properties_insert AFTER INSERT ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_properties_update AFTER UPDATE ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_properties_delete AFTER DELETE ON properties FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_insert AFTER INSERT ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_clients_update AFTER UPDATE ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_clients_delete AFTER DELETE ON clients FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_brokers_insert AFTER INSERT ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_brokers_update AFTER UPDATE ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_brokers_delete AFTER DELETE ON brokers FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', OLD.id, 'delete');
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_insert AFTER INSERT ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'insert');
+CREATE TRIGGER IF NOT EXISTS trg_sales_update AFTER UPDATE ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'update');
+CREATE TRIGGER IF NOT EXISTS trg_sales_delete AFTER DELETE ON sales FOR EACH ROW
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', OLD.id, 'delete');
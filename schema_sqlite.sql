@@ -0,0 +1,149 @@
+-- schema.sql for the embedded SQLite backend (utils/db_backend.py), which runs
+-- this file when it first connects. Keep the two in step: same tables, columns,
+-- indexes and change_log triggers. Differences are only in spelling: ENUM
+-- becomes a CHECK constraint, ON UPDATE CURRENT_TIMESTAMP part of the update
+-- triggers, and text columns compare case-insensitively (NOCASE) like MySQL's
+-- default collation.
+
+CREATE TABLE IF NOT EXISTS brokers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL COLLATE NOCASE,
+    years_experience INT DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS properties (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location VARCHAR(100) NOT NULL COLLATE NOCASE,
+    type VARCHAR(50) NOT NULL COLLATE NOCASE,
+    size INT NOT NULL,
+    price DECIMAL(15, 2) NOT NULL,
+    status TEXT DEFAULT 'available' CHECK (status IN ('available', 'sold')),
+    broker_id INT NULL REFERENCES brokers(id) ON DELETE SET NULL ON UPDATE CASCADE,
+    listed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_properties_status_type ON properties (status, type, price, size);
+CREATE INDEX IF NOT EXISTS idx_properties_type_location ON properties (type, location, price);
+CREATE INDEX IF NOT EXISTS idx_properties_status_price ON properties (status, price);
+CREATE INDEX IF NOT EXISTS idx_properties_broker_status ON properties (broker_id, status, price);
+CREATE INDEX IF NOT EXISTS idx_properties_location ON properties (location);
+CREATE INDEX IF NOT EXISTS idx_properties_price ON properties (price);
+CREATE INDEX IF NOT EXISTS idx_properties_status_id ON properties (status, id);
+CREATE INDEX IF NOT EXISTS idx_properties_broker_id_id ON properties (broker_id, id);
+-- Dropped by migrations/008, replaced by the id-ordered indexes above (010)
+DROP INDEX IF EXISTS idx_properties_status;
+DROP INDEX IF EXISTS idx_properties_broker_id;
+
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL COLLATE NOCASE,
+    contact VARCHAR(100),
+    preferences TEXT,
+    broker_id INT REFERENCES brokers(id) ON DELETE SET NULL ON UPDATE CASCADE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- MySQL indexes foreign key columns implicitly; SQLite needs them spelled out
+CREATE INDEX IF NOT EXISTS idx_clients_broker_id ON clients (broker_id);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    property_id INT NOT NULL REFERENCES properties(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    client_id INT NOT NULL REFERENCES clients(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    broker_id INT NOT NULL REFERENCES brokers(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    date DATE NOT NULL,
+    final_price DECIMAL(15,2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (date);
+CREATE INDEX IF NOT EXISTS idx_sales_property_id ON sales (property_id);
+CREATE INDEX IF NOT EXISTS idx_sales_client_id ON sales (client_id);
+CREATE INDEX IF NOT EXISTS idx_sales_broker_id ON sales (broker_id);
+
+-- Change feed: one row per insert/update/delete, written by the triggers below.
+-- The update triggers also stand in for ON UPDATE CURRENT_TIMESTAMP; their own
+-- UPDATE does not fire them again because recursive triggers are off.
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name VARCHAR(20) NOT NULL,
+    row_id INT NOT NULL,
+    operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+    changed_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log (table_name, id);
+
+-- Summary tables kept up to date by controllers/report_controller.py
+CREATE TABLE IF NOT EXISTS report_sales_daily (
+    day DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL COLLATE NOCASE,
+    location VARCHAR(100) NOT NULL COLLATE NOCASE,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, broker_id, property_type, location)
+);
+CREATE INDEX IF NOT EXISTS idx_report_sales_daily_broker ON report_sales_daily (broker_id, day);
+
+CREATE TABLE IF NOT EXISTS report_sales_monthly (
+    month DATE NOT NULL,
+    broker_id INT NOT NULL,
+    property_type VARCHAR(50) NOT NULL COLLATE NOCASE,
+    location VARCHAR(100) NOT NULL COLLATE NOCASE,
+    sales INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, broker_id, property_type, location)
+);
+CREATE INDEX IF NOT EXISTS idx_report_sales_monthly_broker ON report_sales_monthly (broker_id, month);
+
+CREATE TABLE IF NOT EXISTS report_inventory (
+    status TEXT NOT NULL CHECK (status IN ('available', 'sold')),
+    type VARCHAR(50) NOT NULL COLLATE NOCASE,
+    properties INT NOT NULL DEFAULT 0,
+    total_value DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, type)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_properties_insert AFTER INSERT ON properties FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_properties_update AFTER UPDATE ON properties FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', NEW.id, 'update');
+    UPDATE properties SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_properties_delete AFTER DELETE ON properties FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('properties', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_clients_insert AFTER INSERT ON clients FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_clients_update AFTER UPDATE ON clients FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', NEW.id, 'update');
+    UPDATE clients SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_clients_delete AFTER DELETE ON clients FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('clients', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_brokers_insert AFTER INSERT ON brokers FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_brokers_update AFTER UPDATE ON brokers FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', NEW.id, 'update');
+    UPDATE brokers SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_brokers_delete AFTER DELETE ON brokers FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('brokers', OLD.id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_sales_insert AFTER INSERT ON sales FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'insert');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_sales_update AFTER UPDATE ON sales FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', NEW.id, 'update');
+    UPDATE sales SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_sales_delete AFTER DELETE ON sales FOR EACH ROW BEGIN
+    INSERT INTO change_log (table_name, row_id, operation) VALUES ('sales', OLD.id, 'delete');
+END;
+
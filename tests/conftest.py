@@ -0,0 +1,18 @@
+"""Runs every test against a fresh SQLite database (schema_sqlite.sql), so no MySQL server is needed."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.db_backend import use_backend
+from utils.entity_cache import entity_cache
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path):
+    backend = use_backend("sqlite", path=str(tmp_path / "real_estate.sqlite3"))
+    entity_cache.clear()
+    yield backend
+    entity_cache.clear()
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from controllers import analytics_controller, broker_controller, client_controller
+from controllers import property_controller, sale_controller
+from controllers.change_controller import get_change_token, purge_changes
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+from models.sale import Sale
+from utils.db_helper import execute_query
+
+
+@pytest.fixture
+def frame():
+    # Two brokers with the same name must stay apart
+    first, second = (broker_controller.add_broker(Broker(None, "Amr", 3)) for _ in range(2))
+    client_id = client_controller.add_client(Client(None, "Sara", "010", ""))
+    for broker_id, day, price in ((first, datetime.date(2023, 5, 1), 1_000_000),
+                                  (first, datetime.date(2024, 5, 1), 1_500_000),
+                                  (second, datetime.date(2024, 6, 1), 2_000_000)):
+        property_id = property_controller.add_property(Property(None, "Maadi", "villa", 100, price, "available", broker_id))
+        sale_controller.add_sale(Sale(None, property_id, client_id, broker_id, day, price))
+    return analytics_controller.load_sales_frame(), first, second
+
+
+def test_revenue_by_broker_keeps_same_named_brokers_apart(frame):
+    frame, first, second = frame
+    result = analytics_controller.revenue(frame, "broker")
+    assert list(result.index) == [(first, "Amr"), (second, "Amr")]
+    assert list(result["sales"]) == [2, 1]
+    assert list(result["revenue"]) == [2_500_000, 2_000_000]
+
+
+def test_yoy_growth_by_broker(frame):
+    frame, first, second = frame
+    result = analytics_controller.yoy_growth(frame, "broker")
+    assert list(result.index) == [(first, "Amr", 2023), (first, "Amr", 2024), (second, "Amr", 2023), (second, "Amr", 2024)]
+    assert result.loc[(first, "Amr", 2024), "growth"] == pytest.approx(0.5)
+    assert list(result.xs(second, level="broker_id")["revenue"]) == [0, 2_000_000]
+
+
+def test_other_groupings(frame):
+    frame, _, _ = frame
+    assert list(analytics_controller.revenue(frame, "location").index) == ["Maadi"]
+    assert analytics_controller.median_price_per_sqm(frame, "broker")["sales"].sum() == 3
+    assert list(analytics_controller.yoy_growth(frame, "type").index) == [("villa", 2023), ("villa", 2024)]
+    with pytest.raises(ValueError):
+        analytics_controller.revenue(frame, "client")
+
+
+def test_time_on_market_reads_listed_at_after_the_change_log_is_purged(frame):
+    _, first, _ = frame
+    execute_query("UPDATE properties SET listed_at = %s", (datetime.datetime(2023, 4, 1, 15, 30),))
+    purge_changes(get_change_token())
+
+    frame = analytics_controller.load_sales_frame(broker_id=first)
+    assert list(frame["days_on_market"]) == [30, 396]
+    assert analytics_controller.time_on_market(frame)["median_days"][0] == 213
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from utils import async_db
+from utils.db_helper import execute_query as sync_query
+
+
+def broker_names():
+    return [row["name"] for row in sync_query("SELECT name FROM brokers ORDER BY id", fetch=True)]
+
+
+async def insert(name, fail=False):
+    async with async_db.transaction():
+        await async_db.execute_query("INSERT INTO brokers (name, years_experience) VALUES (%s, %s)", (name, 1))
+        await asyncio.sleep(0)  # let the sibling task run in between
+        if fail:
+            raise ValueError(name)
+
+
+def test_commit_and_rollback():
+    async def work():
+        async with async_db.transaction():
+            await insert("kept")
+        with pytest.raises(ValueError):
+            async with async_db.transaction():
+                await insert("gone")
+                raise ValueError
+
+    asyncio.run(work())
+    assert broker_names() == ["kept"]
+
+
+def test_savepoint_rolls_back_only_the_inner_block():
+    async def work():
+        async with async_db.transaction():
+            await insert("outer")
+            with pytest.raises(ValueError):
+                await insert("inner", fail=True)
+
+    asyncio.run(work())
+    assert broker_names() == ["outer"]
+
+
+@pytest.mark.parametrize("names", [("ok", "bad"), ("bad", "ok")])
+def test_gathered_savepoints_do_not_undo_each_other(names):
+    async def work():
+        async with async_db.transaction():
+            results = await asyncio.gather(*(insert(name, fail=name == "bad") for name in names),
+                                           return_exceptions=True)
+        return results
+
+    results = asyncio.run(work())
+    assert [type(r) for r in results] == [type(None) if n == "ok" else ValueError for n in names]
+    assert broker_names() == ["ok"]
+
+
+def test_on_commit_runs_only_after_commit():
+    calls = []
+
+    async def work(fail):
+        async with async_db.transaction() as tx:
+            tx.on_commit(lambda: calls.append(fail))
+            if fail:
+                raise ValueError
+
+    asyncio.run(work(False))
+    with pytest.raises(ValueError):
+        asyncio.run(work(True))
+    assert calls == [False]
@@ -0,0 +1,29 @@
+from benchmarks import run
+
+
+def results(calibration_ms, p50_ms):
+    meta = {"calibration_ms": calibration_ms} if calibration_ms else {}
+    return {"meta": meta, "controllers": {"case": {"p50_ms": p50_ms}}, "panels": {}}
+
+
+def test_baseline_is_scaled_to_this_machine():
+    baseline = results(10.0, 2.0)
+    # Twice as slow a machine: 4 ms is what the baseline predicts here
+    assert run.machine_factor(results(20.0, 0), baseline) == 2.0
+    assert run.compare(results(20.0, 4.5), baseline) == []
+    assert run.compare(results(20.0, 6.5), baseline) == [("case", 4.0, 6.5)]
+    # Twice as fast: 1.5 ms is a regression although it beats the stored number
+    assert run.compare(results(5.0, 1.6), baseline) == [("case", 1.0, 1.6)]
+
+
+def test_uncalibrated_baselines_compare_unscaled():
+    assert run.compare(results(20.0, 2.5), results(None, 2.0)) == []
+    assert run.compare(results(None, 3.5), results(10.0, 2.0)) == [("case", 2.0, 3.5)]
+
+
+def test_small_slowdowns_are_noise():
+    assert run.compare(results(10.0, 0.3), results(10.0, 0.1)) == []
+
+
+def test_calibration_returns_a_positive_time():
+    assert run.calibrate(rounds=1) > 0
@@ -0,0 +1,66 @@
+import pytest
+
+from config import db_config
+from controllers import broker_controller, change_controller
+from controllers.change_controller import get_change_token, get_changes_since
+from models.broker import Broker
+from utils.db_helper import execute_query
+
+
+@pytest.fixture(autouse=True)
+def fresh_gaps(monkeypatch):
+    monkeypatch.setattr(change_controller, "_gaps", {})
+
+
+def log(*entries):
+    for row_id, (table_name, entity_id, operation) in entries:
+        execute_query("INSERT INTO change_log (id, table_name, row_id, operation) VALUES (%s, %s, %s, %s)",
+                      (row_id, table_name, entity_id, operation))
+
+
+def summary(changes):
+    return [(c["table_name"], c["row_id"], c["operation"]) for c in changes]
+
+
+def test_changes_come_back_in_log_order_collapsed_per_row():
+    token = get_change_token()
+    first = broker_controller.add_broker(Broker(None, "A", 1))
+    second = broker_controller.add_broker(Broker(None, "B", 1))
+    broker_controller.update_broker(Broker(first, "A2", 1))
+    broker_controller.delete_broker(second)
+
+    changes, token = get_changes_since(token)
+    assert summary(changes) == [("brokers", first, "insert"), ("brokers", second, "delete")]
+    assert token == get_change_token()
+    assert get_changes_since(token) == ([], token)
+
+
+def test_limit_and_table_filter():
+    log((1, ("brokers", 1, "insert")), (2, ("clients", 1, "insert")), (3, ("brokers", 2, "insert")))
+    changes, token = get_changes_since(0, tables=["brokers"], limit=1)
+    assert summary(changes) == [("brokers", 1, "insert")] and token == 1
+    changes, token = get_changes_since(token, tables=["brokers"])
+    assert summary(changes) == [("brokers", 2, "insert")] and token == 3
+
+
+def test_uncommitted_ids_hold_the_token_back(monkeypatch):
+    monkeypatch.setattr(db_config, "CHANGE_GAP_TIMEOUT", 60)
+    # id 3 belongs to a transaction that has not committed yet
+    log((1, ("brokers", 1, "insert")), (2, ("brokers", 2, "insert")), (4, ("brokers", 4, "insert")))
+    assert get_change_token() == 2
+
+    changes, token = get_changes_since(0)
+    assert summary(changes) == [("brokers", 1, "insert"), ("brokers", 2, "insert")] and token == 2
+    assert get_changes_since(token) == ([], 2)
+
+    log((3, ("brokers", 3, "insert")))  # ... and now it has
+    changes, token = get_changes_since(token)
+    assert summary(changes) == [("brokers", 3, "insert"), ("brokers", 4, "insert")] and token == 4
+
+
+def test_ids_missing_past_the_timeout_are_skipped(monkeypatch):
+    monkeypatch.setattr(db_config, "CHANGE_GAP_TIMEOUT", 0)
+    log((1, ("brokers", 1, "insert")), (3, ("brokers", 3, "insert")))
+    changes, token = get_changes_since(0)
+    assert summary(changes) == [("brokers", 1, "insert"), ("brokers", 3, "insert")] and token == 3
+    assert change_controller._gaps == {}
@@ -0,0 +1,98 @@
+import datetime
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from controllers import broker_controller, client_controller, property_controller, sale_controller
+from controllers.change_controller import get_change_token, get_changes_since
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+from models.sale import Sale
+from utils.db_backend import SQLiteBackend, _translate, use_backend
+from utils.db_helper import execute_query
+
+
+def test_placeholders_are_translated():
+    assert _translate("SELECT * FROM t WHERE a = %s AND b LIKE 'x%%'") == "SELECT * FROM t WHERE a = ? AND b LIKE 'x%'"
+
+
+def test_values_come_back_as_mysql_types():
+    broker_id = broker_controller.add_broker(Broker(None, "Amr", 3))
+    property_id = property_controller.add_property(Property(None, "Maadi", "villa", 200, Decimal("2500000.50")))
+    client_id = client_controller.add_client(Client(None, "Sara", "010", ""))
+    sale_controller.add_sale(Sale(None, property_id, client_id, broker_id, datetime.date(2024, 2, 29), Decimal("2400000.25")))
+
+    row = execute_query("SELECT date, final_price, YEAR(date) AS y, MONTH(date) AS m, updated_at FROM sales",
+                        fetch=True)[0]
+    assert row["date"] == datetime.date(2024, 2, 29)
+    assert row["final_price"] == Decimal("2400000.25")
+    assert (row["y"], row["m"]) == (2024, 2)
+    assert isinstance(row["updated_at"], datetime.datetime)
+    assert property_controller.get_property_by_id(property_id).price == Decimal("2500000.50")
+
+
+def test_statements_share_one_transaction_until_commit(database):
+    conn = database.connect()
+    other = database.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO brokers (name, years_experience) VALUES (%s, %s)", ("Amr", 3))
+        assert conn.in_transaction and cursor.lastrowid == 1
+        assert execute_query("SELECT COUNT(*) AS n FROM brokers", fetch=True)[0]["n"] == 0
+        conn.commit()
+        assert not conn.in_transaction
+        read = other.cursor(dictionary=True)
+        read.execute("SELECT name FROM brokers WHERE id = %s", (1,))
+        assert read.fetchall() == [{"name": "Amr"}]
+        other.ping()
+    finally:
+        conn.close()
+        other.close()
+
+
+def test_cascaded_deletes_are_logged():
+    broker_id = broker_controller.add_broker(Broker(None, "Amr", 3))
+    property_id = property_controller.add_property(Property(None, "Maadi", "villa", 200, 2_000_000, "available", broker_id))
+    client_id = client_controller.add_client(Client(None, "Sara", "010", "", broker_id))
+    sale_id = sale_controller.add_sale(Sale(None, property_id, client_id, broker_id, datetime.date(2024, 1, 1), 1_900_000))
+
+    token = get_change_token()
+    broker_controller.delete_broker(broker_id)
+    changes, _ = get_changes_since(token)
+    assert {(c["table_name"], c["row_id"], c["operation"]) for c in changes} == {
+        ("brokers", broker_id, "delete"),
+        ("sales", sale_id, "delete"),
+        ("clients", client_id, "update"),
+        ("properties", property_id, "update"),
+    }
+    assert property_controller.get_property_by_id(property_id).broker_id is None
+
+
+def test_older_files_get_listed_at(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    with open(SQLiteBackend.SCHEMA_PATH, encoding="utf-8") as f:
+        schema = f.read().replace("    listed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,\n", "")
+    raw = sqlite3.connect(path)
+    raw.executescript(schema)
+    raw.execute("INSERT INTO properties (location, type, size, price) VALUES ('Maadi', 'villa', 200, 2000000)")
+    raw.commit()
+    raw.close()
+
+    use_backend("sqlite", path=path)
+    old = property_controller.get_property_by_id(1)
+    new = property_controller.add_property(Property(None, "Maadi", "villa", 200, 2_000_000))
+    rows = execute_query("SELECT id, listed_at FROM properties ORDER BY id", fetch=True)
+    assert [row["id"] for row in rows] == [old.id, new]
+    assert all(isinstance(row["listed_at"], datetime.datetime) for row in rows)
+
+
+def test_lock_errors_are_retryable(database):
+    assert database.is_retryable(sqlite3.OperationalError("database is locked"))
+    assert not database.is_retryable(sqlite3.OperationalError("no such table: x"))
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        use_backend("postgres")
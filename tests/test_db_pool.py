@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from utils.db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.healthy = True
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise OSError("gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    def make(**options):
+        def connect():
+            opened.append(FakeConnection())
+            return opened[-1]
+        return ConnectionPool(connect=connect, **options)
+    return make
+
+
+def test_connections_are_reused(make_pool, opened):
+    pool = make_pool(pool_size=2)
+    for _ in range(5):
+        with pool.connection():
+            pass
+    assert len(opened) == 1
+    assert pool.stats()["acquired"] == 5 and pool.stats()["idle"] == 1
+
+
+def test_overflow_connections_are_closed_when_returned(make_pool, opened):
+    pool = make_pool(pool_size=1, max_overflow=1, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    assert second.overflow
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert [conn.closed for conn in opened] == [False, True]
+    assert pool.stats()["timeouts"] == 1 and pool.stats()["overflow_created"] == 1
+
+
+def test_waiting_caller_gets_the_released_connection(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=0, timeout=5)
+    entry = pool.acquire()
+    threading.Timer(0.05, pool.release, (entry,)).start()
+    assert pool.acquire() is entry
+    assert pool.stats()["waits"] == 1
+
+
+def test_open_transactions_are_rolled_back(make_pool, opened):
+    pool = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.in_transaction = True
+            raise ValueError
+    with pool.connection() as conn:
+        conn.in_transaction = True
+    assert opened[0].rollbacks == 2 and not opened[0].closed
+
+
+def test_dead_and_expired_connections_are_replaced(make_pool, opened):
+    pool = make_pool(max_lifetime=None)
+    with pool.connection() as conn:
+        conn.healthy = False
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert opened[0].closed and pool.stats()["failed_checks"] == 1
+
+    pool.max_lifetime = 1e-9
+    with pool.connection() as conn:
+        assert conn is opened[2]
+    assert pool.stats()["recycled"] >= 1
+
+
+def test_failed_connect_gives_the_slot_back():
+    pool = ConnectionPool(connect=lambda: 1 / 0, pool_size=1, max_overflow=0, timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(ZeroDivisionError):
+            pool.acquire()
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,30 @@
+from controllers import property_controller
+from utils import explain_check
+from utils.db_helper import execute_query
+
+
+def test_controller_queries_use_indexes():
+    assert explain_check.run_checks(log=lambda message: None) == []
+
+
+def test_full_scans_are_reported():
+    assert explain_check.full_scans("SELECT * FROM properties WHERE size > %s", (100,)) == [("properties", None)]
+    assert explain_check.full_scans("SELECT * FROM properties WHERE price > %s", (100,)) == []
+
+
+def test_redundant_property_indexes_are_gone():
+    rows = execute_query("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'properties'", fetch=True)
+    names = {row["name"] for row in rows}
+    assert {"idx_properties_broker_status", "idx_properties_status_id", "idx_properties_broker_id_id"} <= names
+    assert not names & {"idx_properties_status", "idx_properties_broker_id"}
+
+
+def test_pages_are_read_in_index_order(monkeypatch):
+    assert not explain_check.sorts("SELECT * FROM properties WHERE status = %s AND id > %s ORDER BY id LIMIT 10",
+                                   ("available", 1))
+    # Without the id-ordered index, each page sorts every matching row
+    execute_query("DROP INDEX idx_properties_status_id")
+    monkeypatch.setattr(explain_check, "CHECKS", [
+        (property_controller, "get_properties_page", (), {"after_id": 1, "status": "available"}),
+    ])
+    assert [table for _, table, _ in explain_check.run_checks(log=lambda message: None)] == [None]
@@ -0,0 +1,48 @@
+import functools
+
+import pytest
+
+from controllers import import_controller, report_controller
+from utils import db_helper
+from utils.db_helper import execute_query
+
+
+def write_csv(path, rows):
+    path.write_text("location,type,size,price,status\n" + "".join(f"{','.join(map(str, row))}\n" for row in rows))
+    return str(path)
+
+
+def test_each_chunk_updates_the_inventory_summary(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "listings.csv", [("Maadi", "villa", 200, 1_000_000, "available")] * 3
+                     + [("Zamalek", "apartment", 100, 500_000, "sold")] * 2)
+    validate_chunk = import_controller.validate_chunk
+    chunks = []
+
+    def fail_on_third_chunk(table, chunk):
+        chunks.append(chunk)
+        if len(chunks) == 3:
+            raise RuntimeError("bad chunk")
+        return validate_chunk(table, chunk)
+
+    monkeypatch.setattr(import_controller, "validate_chunk", fail_on_third_chunk)
+    with pytest.raises(RuntimeError):
+        import_controller.import_file("properties", path, chunk_size=2, log=None)
+
+    assert execute_query("SELECT COUNT(*) AS n FROM properties", fetch=True)[0]["n"] == 4
+    assert [(row["status"], row["type"], row["properties"]) for row in report_controller.inventory_report()] == [
+        ("available", "villa", 3), ("sold", "apartment", 1)]
+    report_controller.rebuild_inventory()
+    assert [row["properties"] for row in report_controller.inventory_report()] == [3, 1]
+
+
+def test_references_are_looked_up_in_batches(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "listings.csv", [("Maadi", "villa", 200, 1_000_000, "available")] * 3)
+    import_controller.import_file("properties", path, log=None)
+    lookups = []
+    execute_query = db_helper.execute_query
+    monkeypatch.setattr(db_helper, "execute_query",
+                        lambda query, values=None, **kwargs: lookups.append(values) or execute_query(query, values, **kwargs))
+    monkeypatch.setattr(import_controller, "fetch_by_ids", functools.partial(db_helper.fetch_by_ids, chunk_size=2))
+
+    assert import_controller._existing_ids("properties", [1, 2, 3, 9]) == {1, 2, 3}
+    assert lookups == [(1, 2), (3, 9)]
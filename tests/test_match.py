@@ -0,0 +1,81 @@
+import pytest
+
+from controllers import client_controller, match_controller, property_controller
+from controllers.match_controller import parse_preferences
+from models.client import Client
+from models.property import Property
+
+TYPES = ("apartment", "villa")
+LOCATIONS = {"maadi", "zamalek", "cairo"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("apartment in Maadi or Zamalek, 100-150 sqm, budget under 2M",
+     dict(types={"apartment"}, locations={"maadi", "zamalek"}, min_size=100, max_size=150, max_price=2_000_000)),
+    ("Villas from 1.5 to 3 million", dict(types={"villa"}, min_price=1_500_000, max_price=3_000_000)),
+    ("about 120m in new cairo", dict(locations={"cairo"}, min_size=102, max_size=138)),
+    ("3 bedrooms, at least 200 sqm", dict(min_size=200)),
+    ("", dict()),
+])
+def test_parse_preferences(text, expected):
+    criteria = parse_preferences(text, TYPES, LOCATIONS)
+    fields = dict(types=set(), locations=set(), min_size=None, max_size=None, min_price=None, max_price=None)
+    fields.update(expected)
+    assert {name: getattr(criteria, name) for name in fields} == pytest.approx(fields)
+
+
+@pytest.fixture
+def matcher(monkeypatch):
+    monkeypatch.setattr(match_controller, "REFRESH_INTERVAL", 0)
+    monkeypatch.setattr(match_controller, "_matcher", match_controller._Matcher())
+
+
+def add_property(location, type_, size, price):
+    return property_controller.add_property(Property(None, location, type_, size, price))
+
+
+def test_matches_rank_and_follow_changes(matcher):
+    cheap = add_property("Maadi", "apartment", 120, 1_800_000)
+    pricey = add_property("Maadi", "apartment", 120, 2_200_000)
+    add_property("Maadi", "villa", 120, 1_500_000)      # wrong type
+    add_property("Zamalek", "apartment", 120, 1_000_000)  # wrong location
+    client = client_controller.add_client(Client(None, "Sara", "010", "apartment in Maadi, 100-150 sqm, under 2M"))
+    other = client_controller.add_client(Client(None, "Omar", "011", "anything"))
+
+    matches = match_controller.get_matches_for_client(client)
+    assert [(p.id, score) for p, score in matches] == [(cheap, 1.0), (pricey, pytest.approx(0.8))]  # 10% over budget
+    assert match_controller.get_matches_for_client(other) == []
+    assert [c.id for c, _ in match_controller.get_interested_clients(cheap)] == [client]
+
+    # A new listing is merged into the cached matches; a sold one drops out
+    better = add_property("Maadi", "apartment", 130, 1_500_000)
+    property_controller.update_property(Property(cheap, "Maadi", "apartment", 120, 1_800_000, "sold"))
+    assert [p.id for p, _ in match_controller.get_matches_for_client(client)] == [better, pricey]
+
+    # Changed preferences are re-parsed
+    client_controller.update_client(Client(client, "Sara", "010", "villa in Maadi"))
+    assert match_controller.get_client_criteria(client).types == {"villa"}
+
+
+def test_clients_are_parsed_against_every_property_not_just_available_ones(matcher):
+    sold = add_property("Zamalek", "villa", 300, 2_800_000)
+    property_controller.update_property(Property(sold, "Zamalek", "villa", 300, 2_800_000, "sold"))
+    apartment = add_property("Maadi", "apartment", 120, 1_000_000)
+    client = client_controller.add_client(Client(None, "Sara", "010", "villa in Zamalek under 3M"))
+
+    criteria = match_controller.get_client_criteria(client)
+    assert (criteria.types, criteria.locations) == ({"villa"}, {"zamalek"})
+    assert match_controller.get_matches_for_client(client) == []
+    assert match_controller.get_interested_clients(apartment) == []
+
+
+def test_clients_are_parsed_again_when_a_new_type_or_location_appears(matcher):
+    apartment = add_property("Maadi", "apartment", 120, 1_000_000)
+    client = client_controller.add_client(Client(None, "Sara", "010", "villas in Zamalek under 3M"))
+    assert match_controller.get_client_criteria(client).types == set()
+
+    villa = add_property("Zamalek", "villa", 300, 2_800_000)
+    criteria = match_controller.get_client_criteria(client)
+    assert (criteria.types, criteria.locations) == ({"villa"}, {"zamalek"})
+    assert [p.id for p, _ in match_controller.get_matches_for_client(client)] == [villa]
+    assert match_controller.get_interested_clients(apartment) == []
@@ -0,0 +1,79 @@
+import pytest
+
+from controllers import broker_controller, client_controller, property_controller
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+
+
+@pytest.fixture
+def broker_id():
+    return broker_controller.add_broker(Broker(None, "Amr", 3))
+
+
+@pytest.fixture
+def client_ids(broker_id):
+    other = broker_controller.add_broker(Broker(None, "Mona", 1))
+    return [client_controller.add_client(Client(None, f"Client {i}", "010", "", broker_id if i % 2 else other))
+            for i in range(25)]
+
+
+def walk(get_page, **kwargs):
+    """Follows next_cursor from the first page; returns the pages' ids."""
+    pages, cursor = [], None
+    while True:
+        page = get_page(after_id=cursor, **kwargs)
+        pages.append([item.id for item in page])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_every_row_once(client_ids):
+    pages = walk(client_controller.get_clients_page, limit=10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == client_ids
+
+
+def test_filtered_pages_and_total_estimate(broker_id, client_ids):
+    page = client_controller.get_clients_page(limit=5, broker_id=broker_id)
+    assert [c.id for c in page] == client_ids[1:11:2]
+    assert page.total_estimate == 12 and page.prev_cursor is None
+    assert sum(walk(client_controller.get_clients_page, limit=5, broker_id=broker_id), []) == client_ids[1::2]
+
+
+def test_backwards_pages_come_in_ascending_order(client_ids):
+    last = client_controller.get_clients_page(before_id=client_ids[-1] + 1, limit=10)
+    assert [c.id for c in last] == client_ids[15:]
+    assert last.next_cursor == client_ids[-1] and last.prev_cursor == client_ids[15]
+    previous = client_controller.get_clients_page(before_id=last.prev_cursor, limit=10)
+    assert [c.id for c in previous] == client_ids[5:15]
+    first = client_controller.get_clients_page(before_id=previous.prev_cursor, limit=10)
+    assert [c.id for c in first] == client_ids[:5] and first.prev_cursor is None
+
+
+def test_find_properties_pages_through_ties_in_sort_order():
+    prices = [500_000, 300_000, 300_000, 700_000, 300_000, 500_000, 100_000]
+    ids = [property_controller.add_property(Property(None, "Maadi", "apartment", 100, price)) for price in prices]
+    expected = [i for _, i in sorted(zip(prices, ids))]
+
+    seen, cursor = [], None
+    while True:
+        page = property_controller.find_properties(sort="price", page=cursor, limit=2)
+        seen.extend(p.id for p in page)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert seen == expected
+
+    page = property_controller.find_properties(sort="-price", limit=3)
+    assert [p.id for p in page] == [i for _, i in sorted(zip(prices, ids), key=lambda pair: (-pair[0], -pair[1]))][:3]
+    back = property_controller.find_properties(sort="-price", page=page.next_cursor, limit=3)
+    assert [p.id for p in property_controller.find_properties(sort="-price", page=back.prev_cursor, limit=3)] == [p.id for p in page]
+
+
+def test_unknown_sort_or_filter_is_rejected():
+    with pytest.raises(ValueError):
+        property_controller.find_properties(sort="broker")
+    with pytest.raises(ValueError):
+        property_controller.find_properties(filters={"colour": "red"})
@@ -0,0 +1,122 @@
+"""PreparedStatementConnection against a stand-in for a mysql.connector connection."""
+import pytest
+
+from utils.db_backend import PreparedStatementConnection
+from utils.db_helper import ids_queries
+
+
+class FakeCursor:
+    def __init__(self, log, prepared):
+        self.log = log
+        self.prepared = prepared
+        self.description = None
+        self.lastrowid = None
+        self.rowcount = -1
+        self._rows = []
+
+    def execute(self, query, values=None):
+        self.log.append(("execute", self.prepared, query))
+        if "broken" in query:
+            raise RuntimeError(query)
+        if query.startswith("SELECT"):
+            self.description = [("id",), ("name",)]
+            self._rows = [(1, "a"), (2, "b")]
+        else:
+            self.description, self._rows, self.lastrowid, self.rowcount = None, [], 7, 1
+
+    def executemany(self, query, rows):
+        self.log.append(("executemany", self.prepared, query))
+        self.rowcount = len(rows)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self.log.append(("close", self.prepared, None))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+        self.autocommit = False
+
+    def cursor(self, prepared=False, buffered=None, dictionary=False):
+        return FakeCursor(self.log, prepared)
+
+    def close(self):
+        self.log.append(("close connection", None, None))
+
+
+@pytest.fixture
+def raw():
+    return FakeConnection()
+
+
+def prepared(raw):
+    return [query for action, is_prepared, query in raw.log if action == "execute" and is_prepared]
+
+
+def test_parameterized_statements_are_prepared_once(raw):
+    conn = PreparedStatementConnection(raw)
+    cursor = conn.cursor(dictionary=True)
+    for broker_id in (1, 2, 3):
+        cursor.execute("SELECT * FROM brokers WHERE id = %s", (broker_id,))
+    assert cursor.fetchall() == [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+    assert len(conn._statements) == 1
+    assert prepared(raw) == ["SELECT * FROM brokers WHERE id = %s"] * 3
+
+
+def test_other_statements_use_the_text_protocol(raw):
+    conn = PreparedStatementConnection(raw)
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT sp_1")
+    cursor.execute("SELECT * FROM brokers")
+    assert cursor.fetchone() == (1, "a") and cursor.fetchmany(5) == [(2, "b")] and cursor.fetchone() is None
+    cursor.executemany("INSERT INTO brokers (name) VALUES (%s)", [("a",), ("b",)])
+    assert prepared(raw) == [] and not conn._statements
+    assert conn.autocommit is False  # everything else is passed through
+
+
+def test_results_and_write_metadata(raw):
+    conn = PreparedStatementConnection(raw)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE brokers SET name = %s WHERE id = %s", ("a", 1))
+    assert (cursor.lastrowid, cursor.rowcount, cursor.description) == (7, 1, None)
+    assert cursor.fetchall() == []
+
+
+def test_least_recently_used_statement_is_closed(raw):
+    conn = PreparedStatementConnection(raw, cache_size=2)
+    cursor = conn.cursor()
+    for query in ("SELECT a FROM t WHERE id = %s", "SELECT b FROM t WHERE id = %s",
+                  "SELECT a FROM t WHERE id = %s", "SELECT c FROM t WHERE id = %s"):
+        cursor.execute(query, (1,))
+    assert list(conn._statements) == ["SELECT a FROM t WHERE id = %s", "SELECT c FROM t WHERE id = %s"]
+    assert [entry for entry in raw.log if entry[0] == "close"] == [("close", True, None)]
+
+
+def test_generated_in_lists_do_not_evict_cached_statements(raw):
+    conn = PreparedStatementConnection(raw, cache_size=1)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM brokers WHERE id = %s", (1,))
+    for query, values in ids_queries("SELECT * FROM properties", range(1, 8), chunk_size=3):
+        cursor.execute(query, values)
+    assert cursor.fetchall() == [(1, "a"), (2, "b")]
+    assert list(conn._statements) == ["SELECT * FROM brokers WHERE id = %s"]
+    assert prepared(raw) == ["SELECT * FROM brokers WHERE id = %s"]
+
+
+def test_failed_statement_is_discarded(raw):
+    conn = PreparedStatementConnection(raw)
+    with pytest.raises(RuntimeError):
+        conn.cursor().execute("INSERT INTO broken VALUES (%s)", (1,))
+    assert prepared(raw) == ["INSERT INTO broken VALUES (%s)"]
+    assert not conn._statements
+
+
+def test_close_deallocates_statements(raw):
+    conn = PreparedStatementConnection(raw)
+    conn.cursor().execute("SELECT * FROM t WHERE id = %s", (1,))
+    conn.close()
+    assert raw.log[-2:] == [("close", True, None), ("close connection", None, None)]
@@ -0,0 +1,111 @@
+"""The incrementally maintained summary tables must always equal a full rebuild."""
+import asyncio
+import datetime
+
+import pytest
+
+from controllers import async_controller, broker_controller, client_controller
+from controllers import property_controller, report_controller, sale_controller
+from models.broker import Broker
+from models.client import Client
+from models.property import Property
+from models.sale import Sale
+from utils.db_helper import execute_query, transaction
+
+SUMMARIES = {
+    "report_sales_daily": "sales",
+    "report_sales_monthly": "sales",
+    "report_inventory": "properties",
+}
+
+
+def summaries():
+    # Maintenance leaves groups it emptied at zero instead of deleting them
+    return {table: [row for row in execute_query(f"SELECT * FROM {table} ORDER BY 1, 2, 3, 4", fetch=True)
+                    if row[count]]
+            for table, count in SUMMARIES.items()}
+
+
+@pytest.fixture
+def data():
+    brokers = [broker_controller.add_broker(Broker(None, name, 3)) for name in ("Amr", "Mona")]
+    clients = [client_controller.add_client(Client(None, name, "010", "villa", brokers[0]))
+               for name in ("Sara", "Omar")]
+    properties = [
+        property_controller.add_property(Property(None, location, type_, 150, price, "available", broker))
+        for location, type_, price, broker in (("Maadi", "villa", 3_000_000, brokers[0]),
+                                               ("Zamalek", "apartment", 1_500_000, brokers[1]),
+                                               ("Maadi", "apartment", 1_200_000, brokers[1]))
+    ]
+    sales = [sale_controller.add_sale(Sale(None, properties[0], clients[0], brokers[0], datetime.date(2024, 1, 31), 2_900_000)),
+             sale_controller.add_sale(Sale(None, properties[1], clients[1], brokers[1], datetime.date(2024, 2, 1), 1_450_000))]
+    return {"brokers": brokers, "clients": clients, "properties": properties, "sales": sales}
+
+
+def _date(day):
+    return datetime.date(2024, 3, day)
+
+
+SYNC_WRITES = {
+    "add_property": lambda d: property_controller.add_property(Property(None, "Giza", "house", 90, 800_000)),
+    "update_property": lambda d: property_controller.update_property(
+        Property(d["properties"][0], "Zamalek", "house", 160, 3_100_000, "sold", d["brokers"][1])),
+    "delete_property": lambda d: property_controller.delete_property(d["properties"][0]),
+    "assign_broker_to_property": lambda d: property_controller.assign_broker_to_property(d["properties"][2], d["brokers"][0]),
+    "add_sale": lambda d: sale_controller.add_sale(
+        Sale(None, d["properties"][2], d["clients"][0], d["brokers"][1], _date(1), 1_100_000)),
+    "update_sale": lambda d: sale_controller.update_sale(
+        Sale(d["sales"][0], d["properties"][2], d["clients"][1], d["brokers"][1], _date(2), 1_000_000)),
+    "delete_sale": lambda d: sale_controller.delete_sale(d["sales"][0]),
+    "delete_client": lambda d: client_controller.delete_client(d["clients"][1]),
+    "delete_broker": lambda d: broker_controller.delete_broker(d["brokers"][1]),
+}
+
+ASYNC_WRITES = {
+    "add_property": lambda d: async_controller.add_property(Property(None, "Giza", "house", 90, 800_000)),
+    "update_property": lambda d: async_controller.update_property(
+        Property(d["properties"][0], "Zamalek", "house", 160, 3_100_000, "sold", d["brokers"][1])),
+    "delete_property": lambda d: async_controller.delete_property(d["properties"][0]),
+    "assign_broker_to_property": lambda d: async_controller.assign_broker_to_property(d["properties"][2], d["brokers"][0]),
+    "add_sale": lambda d: async_controller.add_sale(
+        Sale(None, d["properties"][2], d["clients"][0], d["brokers"][1], _date(1), 1_100_000)),
+    "update_sale": lambda d: async_controller.update_sale(
+        Sale(d["sales"][0], d["properties"][2], d["clients"][1], d["brokers"][1], _date(2), 1_000_000)),
+    "delete_sale": lambda d: async_controller.delete_sale(d["sales"][0]),
+    "delete_client": lambda d: async_controller.delete_client(d["clients"][1]),
+    "delete_broker": lambda d: async_controller.delete_broker(d["brokers"][1]),
+}
+
+
+def assert_matches_rebuild():
+    maintained = summaries()
+    report_controller.rebuild()
+    assert maintained == summaries()
+
+
+def test_seed_data_is_consistent(data):
+    assert summaries()["report_sales_daily"]
+    assert_matches_rebuild()
+
+
+@pytest.mark.parametrize("write", SYNC_WRITES, ids=str)
+def test_sync_writes_keep_summaries_current(data, write):
+    before = summaries()
+    SYNC_WRITES[write](data)
+    assert summaries() != before or write == "assign_broker_to_property"
+    assert_matches_rebuild()
+
+
+@pytest.mark.parametrize("write", ASYNC_WRITES, ids=str)
+def test_async_writes_keep_summaries_current(data, write):
+    asyncio.run(ASYNC_WRITES[write](data))
+    assert_matches_rebuild()
+
+
+def test_rolled_back_write_leaves_summaries_untouched(data):
+    before = summaries()
+    with pytest.raises(ValueError):
+        with transaction():
+            sale_controller.delete_sale(data["sales"][0])
+            raise ValueError
+    assert summaries() == before
@@ -0,0 +1,64 @@
+import pytest
+
+from controllers import property_controller, search_controller
+from models.property import Property
+from utils.search_index import InvertedIndex
+
+DOCUMENTS = [(1, "New Cairo villa"), (2, "Maadi apartment"), (3, "Maadi villa garden"), (4, "Zamalek apartment")]
+
+
+@pytest.fixture
+def index():
+    index = InvertedIndex()
+    index.add_many(DOCUMENTS)
+    return index
+
+
+def ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_bulk_load_matches_one_by_one(index):
+    one_by_one = InvertedIndex()
+    for doc_id, text in DOCUMENTS:
+        one_by_one.add(doc_id, text)
+    assert index._vocabulary == one_by_one._vocabulary == sorted(index._postings)
+    for query in ("maadi", "vil", "apartmnet", "cairo villa"):
+        assert index.search(query) == one_by_one.search(query)
+
+
+def test_exact_prefix_and_typo_matches(index):
+    assert ids(index.search("maadi villa")) == [3]
+    assert ids(index.search("apart")) == [2, 4]
+    assert ids(index.search("zamalk")) == [4]
+    assert index.search("nowhere") == []
+
+
+def test_within_and_limit(index):
+    assert ids(index.search("villa", within=[1, 2])) == [1]
+    assert len(index.search("apartment", limit=1)) == 1
+
+
+def test_replace_remove_and_compact(index):
+    index.add(2, "Heliopolis duplex")
+    index.remove(4)
+    assert index.search("apartment") == []
+    assert ids(index.search("duplex")) == [2]
+    index.compact()
+    assert len(index) == 3 and "apartment" not in index._vocabulary
+    index.add_many([(5, "Zamalek penthouse")])
+    assert index._vocabulary == sorted(index._postings)
+    assert ids(index.search("pent")) == [5]
+
+
+def test_search_follows_the_change_feed(monkeypatch):
+    monkeypatch.setattr(search_controller, "REFRESH_INTERVAL", 0)
+    monkeypatch.setattr(search_controller, "_properties", search_controller._TableSearch("properties", ("location", "type")))
+    first = property_controller.add_property(Property(None, "Maadi", "villa", 200, 3_000_000))
+    assert [p.id for p in search_controller.search_properties("maadi")] == [first]
+
+    second = property_controller.add_property(Property(None, "Maadi", "apartment", 90, 1_000_000))
+    assert [p.id for p in search_controller.search_properties("maadi apartment")] == [second]
+    property_controller.delete_property(first)
+    assert [p.id for p in search_controller.search_properties("villa")] == []
+    assert [p.id for p in search_controller.search_properties("maadi", filters={"max_price": 2_000_000})] == [second]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from controllers import async_controller, broker_controller
+from models.broker import Broker
+from utils import async_db
+from utils.db_helper import execute_query, run_in_transaction, transaction
+from utils.entity_cache import entity_cache
+
+
+def broker_names():
+    return [row["name"] for row in execute_query("SELECT name FROM brokers ORDER BY id", fetch=True)]
+
+
+def test_rollback_undoes_the_whole_block():
+    with pytest.raises(ValueError):
+        with transaction():
+            broker_controller.add_broker(Broker(None, "A", 1))
+            broker_controller.add_broker(Broker(None, "B", 2))
+            raise ValueError
+    assert broker_names() == []
+
+
+def test_savepoint_rolls_back_only_the_inner_block():
+    with transaction():
+        broker_controller.add_broker(Broker(None, "outer", 1))
+        with pytest.raises(ValueError):
+            with transaction():
+                broker_controller.add_broker(Broker(None, "inner", 1))
+                raise ValueError
+        with transaction():
+            broker_controller.add_broker(Broker(None, "second", 1))
+    assert broker_names() == ["outer", "second"]
+
+
+def test_retryable_errors_rerun_the_whole_unit(database, monkeypatch):
+    monkeypatch.setattr(database, "is_retryable", lambda e: isinstance(e, TimeoutError))
+    attempts = []
+
+    def work():
+        attempts.append(broker_controller.add_broker(Broker(None, "retried", 1)))
+        if len(attempts) < 3:
+            raise TimeoutError
+
+    run_in_transaction(work, backoff=0)
+    assert len(attempts) == 3
+    assert broker_names() == ["retried"]
+
+    def always_times_out():
+        attempts.append(None)
+        raise TimeoutError
+
+    attempts.clear()
+    with pytest.raises(TimeoutError):
+        run_in_transaction(always_times_out, retries=1, backoff=0)
+    assert len(attempts) == 2
+
+
+def test_rows_read_inside_a_rolled_back_transaction_are_not_cached():
+    with pytest.raises(ValueError):
+        with transaction():
+            broker_id = broker_controller.add_broker(Broker(None, "phantom", 1))
+            assert broker_controller.get_broker_by_id(broker_id).name == "phantom"
+            raise ValueError
+    assert broker_controller.get_broker_by_id(broker_id) is None
+
+
+def test_committed_reads_are_cached_and_writes_invalidate():
+    broker_id = broker_controller.add_broker(Broker(None, "cached", 1))
+    assert broker_controller.get_broker_by_id(broker_id).name == "cached"
+    assert entity_cache.get(("brokers", broker_id))[0]
+    broker_controller.update_broker(Broker(broker_id, "renamed", 1))
+    assert broker_controller.get_broker_by_id(broker_id).name == "renamed"
+
+
+def test_async_rows_read_inside_a_rolled_back_transaction_are_not_cached():
+    async def work():
+        with pytest.raises(ValueError):
+            async with async_db.transaction():
+                broker_id = await async_controller.add_broker(Broker(None, "phantom", 1))
+                assert (await async_controller.get_broker_by_id(broker_id)).name == "phantom"
+                raise ValueError
+        return broker_id, await async_controller.get_broker_by_id(broker_id)
+
+    broker_id, broker = asyncio.run(work())
+    assert broker is None
+    assert broker_controller.get_broker_by_id(broker_id) is None
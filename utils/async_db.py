@@ -0,0 +1,298 @@
+"""The asyncio counterpart of utils.db_helper and utils.db_pool.
+
+Same contracts, awaited: execute_query, transaction, run_in_transaction /
+transactional, paginate, fetch_by_ids. Connections come from
+get_backend().connect_async() and are kept in an AsyncConnectionPool, one
+per event loop, sized like the synchronous pool (config/db_config.py).
+
+Independent lookups can run concurrently, each on its own connection:
+
+    broker, client = await asyncio.gather(get_broker_by_id(1), get_client_by_id(2))
+
+The open transaction follows the task (a context variable), so calls made
+inside `async with transaction():` share its connection. Tasks gathered
+inside the block share it too and take turns: while one of them is inside
+a nested transaction() (a savepoint), the others wait for it to finish,
+so a sibling's rollback never undoes their statements.
+"""
+import asyncio
+import contextvars
+import functools
+import random
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+
+from config import db_config
+from utils import query_stats
+from utils.db_backend import get_backend
+from utils.db_helper import DEADLOCK_BACKOFF, DEADLOCK_RETRIES, build_page, estimate_query, ids_queries, page_query, page_rows
+from utils.db_pool import PoolTimeoutError, _PoolEntry
+
+
+class AsyncConnectionPool:
+    """ConnectionPool for coroutines: up to pool_size idle connections, max_overflow more under load.
+
+    Callers past that wait up to timeout seconds for a free connection.
+    Connections are not pinged on checkout; one that fails is discarded
+    when it goes back.
+    """
+
+    def __init__(self, connect=None, pool_size=5, max_overflow=5, timeout=10, max_lifetime=1800):
+        self._connect = connect or (lambda: get_backend().connect_async())
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(pool_size + max_overflow)
+
+    def _is_expired(self, entry):
+        return self.max_lifetime and time.monotonic() - entry.created_at > self.max_lifetime
+
+    async def _close_entry(self, entry):
+        try:
+            await entry.conn.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+            ) from None
+        try:
+            while self._idle:
+                entry = self._idle.popleft()
+                if not self._is_expired(entry):
+                    return entry
+                await self._close_entry(entry)
+            return _PoolEntry(await self._connect(), overflow=False)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, entry, discard=False):
+        try:
+            if not discard:
+                try:
+                    # Never hand the next caller a connection with an open transaction
+                    if entry.conn.in_transaction:
+                        await entry.conn.rollback()
+                except Exception:
+                    discard = True
+            if not discard and not self._is_expired(entry) and len(self._idle) < self.pool_size:
+                self._idle.append(entry)
+            else:
+                await self._close_entry(entry)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Yields a pooled connection; any uncommitted transaction is rolled back on exit."""
+        entry = await self.acquire()
+        try:
+            yield entry.conn
+        except BaseException:
+            try:
+                await entry.conn.rollback()
+                await self.release(entry)
+            except Exception:
+                await self.release(entry, discard=True)
+            raise
+        else:
+            await self.release(entry)
+
+    async def close(self):
+        """Closes every idle connection."""
+        idle = list(self._idle)
+        self._idle.clear()
+        for entry in idle:
+            await self._close_entry(entry)
+
+
+# Connections and asyncio primitives belong to one event loop
+_pools = weakref.WeakKeyDictionary()
+
+def get_pool():
+    """Returns the pool of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = AsyncConnectionPool(
+            pool_size=db_config.POOL_SIZE,
+            max_overflow=db_config.POOL_MAX_OVERFLOW,
+            timeout=db_config.POOL_TIMEOUT,
+            max_lifetime=db_config.POOL_MAX_LIFETIME,
+        )
+    return pool
+
+def reset_pools():
+    """Drops every loop's pool; the next get_pool() builds a new one."""
+    _pools.clear()
+
+async def close_pool():
+    """Closes the idle connections of the running loop's pool (call before the loop ends)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+def pooled_connection():
+    return get_pool().connection()
+
+
+async def _run(conn, query, values, fetch):
+    if not db_config.QUERY_STATS:
+        return await conn.run(query, values, fetch)
+    started = time.perf_counter()
+    try:
+        result = await conn.run(query, values, fetch)
+    except Exception:
+        query_stats.record(query, values, time.perf_counter() - started, 0, error=True)
+        raise
+    query_stats.record(query, values, time.perf_counter() - started, len(result) if fetch else 1)
+    return result
+
+
+class Transaction:
+    """A unit of work on one pooled connection, committed once at the end (see transaction())."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.savepoints = 0  # savepoints opened so far; names them uniquely
+        self._on_commit = []
+
+    async def execute(self, query, values=None, fetch=False):
+        """Same contract as execute_query, without the commit."""
+        async with _scope.get():
+            return await _run(self.conn, query, values, fetch)
+
+    def on_commit(self, callback):
+        """Runs callback once the outermost transaction has committed."""
+        self._on_commit.append(callback)
+
+_transaction = contextvars.ContextVar("transaction", default=None)
+# Guards the transaction or savepoint the task is in: tasks sharing it take
+# turns, one statement or one whole nested savepoint at a time
+_scope = contextvars.ContextVar("transaction_scope", default=None)
+
+def current_transaction():
+    """Returns the Transaction open in this task, or None."""
+    return _transaction.get()
+
+@asynccontextmanager
+async def transaction():
+    """Groups everything in the block into one transaction with a single commit.
+
+    Nested blocks become savepoints, as with utils.db_helper.transaction().
+    """
+    tx = current_transaction()
+    if tx is not None:
+        # Hold the enclosing scope for the whole block, so no other task's
+        # statements land inside this savepoint
+        async with _scope.get():
+            tx.savepoints += 1
+            savepoint = f"sp_{tx.savepoints}"
+            token = _scope.set(asyncio.Lock())
+            try:
+                await tx.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    yield tx
+                except BaseException:
+                    try:
+                        await tx.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    except Exception:
+                        pass  # e.g. after a deadlock the server already rolled everything back
+                    raise
+                await tx.execute(f"RELEASE SAVEPOINT {savepoint}")
+            finally:
+                _scope.reset(token)
+        return
+
+    async with pooled_connection() as conn:
+        tx = Transaction(conn)
+        token = _transaction.set(tx)
+        scope_token = _scope.set(asyncio.Lock())
+        try:
+            yield tx
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        finally:
+            _scope.reset(scope_token)
+            _transaction.reset(token)
+    for callback in tx._on_commit:
+        callback()
+
+async def run_in_transaction(work, *args, retries=DEADLOCK_RETRIES, backoff=DEADLOCK_BACKOFF, **kwargs):
+    """Awaits work(*args, **kwargs) inside transaction(), retrying deadlocks like the sync version."""
+    if current_transaction() is not None:
+        async with transaction():
+            return await work(*args, **kwargs)
+
+    attempt = 0
+    while True:
+        try:
+            async with transaction():
+                return await work(*args, **kwargs)
+        except Exception as e:
+            if not get_backend().is_retryable(e) or attempt >= retries:
+                raise
+            await asyncio.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+def transactional(func):
+    """Decorator: runs the coroutine function through run_in_transaction."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_transaction(func, *args, **kwargs)
+    return wrapper
+
+async def execute_query(query, values=None, fetch=False):
+    # Inside transaction(): reuse its connection and leave the commit to it
+    tx = current_transaction()
+    if tx is not None:
+        return await tx.execute(query, values, fetch)
+
+    async with pooled_connection() as conn:
+        result = await _run(conn, query, values, fetch)
+        if not fetch:
+            await conn.commit()
+        return result
+
+async def estimate_count(table, conditions=(), values=()):
+    rows = await execute_query(estimate_query(table, conditions), tuple(values) or None, fetch=True)
+    return int(rows[0]["rows"] or 0) if rows else 0
+
+async def paginate(table, model, conditions=(), values=(), after_id=None, before_id=None, limit=100, with_total=True,
+                   select=None, key="id"):
+    """Builds a Page of `model` objects; see utils.db_helper.paginate()."""
+    query, page_values = page_query(select or f"SELECT * FROM {table}", conditions, values,
+                                    after_id, before_id, limit, key)
+    if with_total:
+        # The page and the estimate are independent: fetch them concurrently
+        rows, total = await asyncio.gather(execute_query(query, page_values, fetch=True),
+                                           estimate_count(table, conditions, values))
+    else:
+        rows, total = await execute_query(query, page_values, fetch=True), None
+    rows, has_more = page_rows(rows, limit, before_id)
+    return build_page([model.from_dict(row) for row in rows], has_more, after_id, before_id, total)
+
+async def fetch_by_ids(select, ids, key="id", chunk_size=1000):
+    """Runs `select` for many ids at once; see utils.db_helper.fetch_by_ids()."""
+    chunks = await asyncio.gather(*(execute_query(query, chunk, fetch=True)
+                                    for query, chunk in ids_queries(select, ids, key, chunk_size)))
+    return [row for rows in chunks for row in rows]
+
+async def fetch_models(table, model, conditions=(), values=()):
+    """Reads `model` objects from `table`; see utils.db_helper.fetch_models()."""
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    rows = await execute_query(f"SELECT {', '.join(model.COLUMNS)} FROM {table}{where}",
+                               tuple(values) or None, fetch=True)
+    return [model.from_dict(row) for row in rows]
@@ -0,0 +1,555 @@
+"""Storage backends: where connections come from and the SQL that differs between engines.
+
+Controllers write MySQL-flavoured SQL with %s placeholders and get their
+connections from utils.db_pool; the backend decides what those connections
+are. Two are available, chosen by DB_BACKEND in config/db_config.py (or the
+REAL_ESTATE_DB_BACKEND environment variable):
+
+    mysql   the MySQL server in db_config (the default)
+    sqlite  an embedded SQLite file in WAL mode with the same tables, indexes
+            and change_log triggers (schema_sqlite.sql), created on first use.
+            Meant for tests, benchmarks and demos on a machine without MySQL.
+
+MySQL connections are wrapped in PreparedStatementConnection, which sends
+parameterized statements as server-side prepared statements, cached per
+connection by query text. SQLite keeps its own per-connection statement
+cache, sized by the same setting.
+
+connect_async() gives the asyncio layer (utils/async_db.py) a connection
+with awaitable run() / commit() / rollback() / close(): mysql.connector.aio
+for MySQL; for SQLite, which has no asynchronous driver, the same
+connection as connect() with its calls run on a thread of its own.
+
+SQLite connections are wrapped to behave like mysql.connector ones
+(cursor(dictionary=True), lastrowid, in_transaction, ping), translate %s
+placeholders, and register YEAR() and MONTH(). The few statements that have
+no common spelling (summary upserts, first of month, row estimates) are
+built by the backend methods below.
+"""
+import asyncio
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
+
+from config import db_config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MySQLBackend:
+    name = "mysql"
+    migrations = True             # schema changes come from migrations/ (utils/migrate.py)
+    triggers_on_cascade = False   # FK cascades do not fire triggers (see change_controller.CASCADES)
+
+    # Errors after which the whole transaction can simply be run again
+    RETRYABLE_ERRORS = {
+        1213,  # deadlock found; InnoDB already rolled the transaction back
+        1205,  # lock wait timeout exceeded
+    }
+
+    def __init__(self, host=None, user=None, password=None, database=None, prepared_statements=None):
+        self.host = host or db_config.MYSQL_HOST
+        self.user = user or db_config.MYSQL_USER
+        self.password = password if password is not None else db_config.MYSQL_PASSWORD
+        self.database = database or db_config.MYSQL_DATABASE
+        if prepared_statements is None:
+            prepared_statements = db_config.PREPARED_STATEMENTS
+        self.prepared_statements = prepared_statements
+
+    def connect(self):
+        import mysql.connector
+
+        raw = mysql.connector.connect(host=self.host, user=self.user,
+                                      password=self.password, database=self.database)
+        if not self.prepared_statements:
+            return raw
+        return PreparedStatementConnection(raw, db_config.STATEMENT_CACHE_SIZE)
+
+    async def connect_async(self):
+        from mysql.connector import aio
+
+        raw = await aio.connect(host=self.host, user=self.user,
+                                password=self.password, database=self.database)
+        return AsyncMySQLConnection(raw)
+
+    def is_retryable(self, error):
+        return getattr(error, "errno", None) in self.RETRYABLE_ERRORS
+
+    def month_start(self, expression):
+        """SQL for the first day of the month of a DATE expression."""
+        return f"{expression} - INTERVAL (DAYOFMONTH({expression}) - 1) DAY"
+
+    def add_to_totals(self, table, keys, totals, select):
+        """SQL adding the rows of `select` to `table`, summing `totals` on key collisions.
+
+        select must return the key columns then the totals, each aliased
+        delta_<column>.
+        """
+        columns = ", ".join(list(keys) + list(totals))
+        updates = ", ".join(f"{column} = {table}.{column} + delta_{column}" for column in totals)
+        return (f"INSERT INTO {table} ({columns}) SELECT * FROM ({select}) AS delta "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    def estimate_query(self, select):
+        """SQL whose first row has a `rows` estimate for `select` (read from index statistics)."""
+        return f"EXPLAIN {select}"
+
+
+# Statements the server can prepare; anything else (SAVEPOINT, DDL, EXPLAIN)
+# is sent as text
+_PREPARABLE = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b", re.IGNORECASE)
+# IN lists generated per call (fetch_by_ids, search id chunks, importer
+# lookups): each length is a new query text, used once or twice, that would
+# push the statements run on every request out of the cache
+_GENERATED_IN_LIST = re.compile(r"\bIN\s*\(\s*%s(?:\s*,\s*%s)*\s*\)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def _preparable(query):
+    return _PREPARABLE.match(query) is not None and _GENERATED_IN_LIST.search(query) is None
+
+
+class PreparedStatementConnection:
+    """A mysql.connector connection that runs parameterized statements prepared.
+
+    The first execute() of a query text prepares it on the server; later
+    ones on the same connection only send the parameters, and rows come
+    back in the binary protocol, so neither side parses the SQL again. Up
+    to cache_size statements are kept per connection; the least recently
+    used one is closed (deallocated on the server) to make room.
+
+    Statements without parameters, those the server cannot prepare, those
+    with a generated IN (%s, ...) list, executemany() (text mode folds a
+    batch of INSERTs into one statement) and cursor(buffered=False) streams
+    still go through the text protocol.
+    """
+
+    def __init__(self, raw, cache_size=128):
+        self.raw = raw
+        self.cache_size = cache_size
+        self._statements = OrderedDict()  # query text -> prepared cursor
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        if buffered is False:
+            return self.raw.cursor(dictionary=dictionary, buffered=False, **kwargs)
+        return PreparedStatementCursor(self, dictionary)
+
+    def statement(self, query):
+        """Returns the prepared cursor for query, opening one on first use."""
+        cursor = self._statements.get(query)
+        if cursor is not None:
+            self._statements.move_to_end(query)
+            return cursor
+        if len(self._statements) >= self.cache_size:
+            _, oldest = self._statements.popitem(last=False)
+            _close_quietly(oldest)
+        cursor = self._statements[query] = self.raw.cursor(prepared=True)
+        return cursor
+
+    def discard(self, query):
+        """Drops the statement for query, e.g. after it failed."""
+        cursor = self._statements.pop(query, None)
+        if cursor is not None:
+            _close_quietly(cursor)
+
+    def close(self):
+        for cursor in self._statements.values():
+            _close_quietly(cursor)
+        self._statements.clear()
+        self.raw.close()
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+class PreparedStatementCursor:
+    """Cursor of a PreparedStatementConnection; buffers each result so the shared statement is free again."""
+
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._dictionary = dictionary
+        self._text = None  # text-protocol cursor, opened when first needed
+        self._rows = []
+        self._next = 0  # index of the next row to fetch
+        self.description = None
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def _text_cursor(self):
+        if self._text is None:
+            self._text = self._conn.raw.cursor(buffered=True)
+        return self._text
+
+    def execute(self, query, values=None):
+        if values and _preparable(query):
+            cursor = self._conn.statement(query)
+            try:
+                cursor.execute(query, tuple(values))
+                rows = cursor.fetchall() if cursor.description is not None else []
+            except Exception:
+                self._conn.discard(query)
+                raise
+        else:
+            cursor = self._text_cursor()
+            cursor.execute(query, values)
+            rows = cursor.fetchall() if cursor.description is not None else []
+        self.description = cursor.description
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = cursor.rowcount
+        if self._dictionary and rows:
+            names = [column[0] for column in self.description]
+            rows = [dict(zip(names, row)) for row in rows]
+        self._rows = rows
+        self._next = 0
+
+    def executemany(self, query, rows):
+        cursor = self._text_cursor()
+        cursor.executemany(query, rows)
+        self.description = None
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = cursor.rowcount
+        self._rows = []
+        self._next = 0
+
+    def fetchone(self):
+        if self._next >= len(self._rows):
+            return None
+        self._next += 1
+        return self._rows[self._next - 1]
+
+    def fetchmany(self, size=1):
+        rows = self._rows[self._next:self._next + size]
+        self._next += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._next:] if self._next else self._rows
+        self._rows, self._next = [], 0
+        return rows
+
+    def close(self):
+        self._rows, self._next = [], 0
+        if self._text is not None:
+            self._text.close()
+
+
+class AsyncMySQLConnection:
+    """A mysql.connector.aio connection behind the interface utils.async_db uses."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    async def run(self, query, values=None, fetch=False):
+        """Runs one statement; returns its rows as dicts if fetch, else lastrowid."""
+        cursor = await self.raw.cursor(dictionary=True)
+        try:
+            await cursor.execute(query, values)
+            if fetch:
+                return await cursor.fetchall()
+            return cursor.lastrowid
+        finally:
+            await cursor.close()
+
+    async def commit(self):
+        await self.raw.commit()
+
+    async def rollback(self):
+        await self.raw.rollback()
+
+    async def close(self):
+        await self.raw.close()
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    migrations = False           # the database is created from schema_sqlite.sql
+    triggers_on_cascade = True   # SQLite fires triggers for rows changed by FK cascades
+
+    SCHEMA_PATH = os.path.join(ROOT_DIR, "schema_sqlite.sql")
+
+    def __init__(self, path=None, busy_timeout=5.0):
+        self.path = path or db_config.SQLITE_PATH
+        self.busy_timeout = busy_timeout
+        self._created = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        # Pool connections move between threads, one thread at a time
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                              detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+                              cached_statements=db_config.STATEMENT_CACHE_SIZE)
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        raw.execute("PRAGMA foreign_keys = ON")
+        raw.create_function("YEAR", 1, _year, deterministic=True)
+        raw.create_function("MONTH", 1, _month, deterministic=True)
+        with self._lock:
+            if not self._created:
+                with open(self.SCHEMA_PATH, encoding="utf-8") as f:
+                    raw.executescript(f.read())
+                _add_listed_at(raw)
+                self._created = True
+        return SQLiteConnection(raw)
+
+    async def connect_async(self):
+        thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        try:
+            conn = await asyncio.get_running_loop().run_in_executor(thread, self.connect)
+        except BaseException:
+            thread.shutdown(wait=False)
+            raise
+        return AsyncSQLiteConnection(conn, thread)
+
+    def is_retryable(self, error):
+        # A deferred transaction that cannot upgrade to a write lock fails at once
+        # instead of waiting (waiting could deadlock); running it again is safe.
+        return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+    def month_start(self, expression):
+        return f"date({expression}, 'start of month')"
+
+    def add_to_totals(self, table, keys, totals, select):
+        columns = ", ".join(list(keys) + list(totals))
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in totals)
+        # WHERE true keeps the parser from reading ON CONFLICT as a join constraint
+        return (f"INSERT INTO {table} ({columns}) SELECT * FROM ({select}) AS delta WHERE true "
+                f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+    def estimate_query(self, select):
+        # No row estimates in SQLite; an exact count is cheap on a local file
+        return f'SELECT COUNT(*) AS "rows" FROM ({select}) AS counted'
+
+
+def _add_listed_at(raw):
+    """Adds properties.listed_at to files created before it (migrations/009).
+
+    SQLite can't ADD COLUMN with a CURRENT_TIMESTAMP default, so the column is
+    added bare and the default written into the stored CREATE TABLE, which
+    https://sqlite.org/lang_altertable.html allows for changes that leave the
+    rows on disk as they are.
+    """
+    if any(row[1] == "listed_at" for row in raw.execute("PRAGMA table_info(properties)")):
+        return
+    raw.execute("BEGIN IMMEDIATE")
+    try:
+        raw.execute("ALTER TABLE properties ADD COLUMN listed_at TIMESTAMP")
+        raw.execute("""
+            UPDATE properties SET listed_at = (
+                SELECT MIN(changed_at) FROM change_log
+                WHERE table_name = 'properties' AND operation = 'insert' AND row_id = properties.id
+            )
+        """)
+        version = raw.execute("PRAGMA schema_version").fetchone()[0]
+        raw.execute("PRAGMA writable_schema = ON")
+        raw.execute("""
+            UPDATE sqlite_master
+            SET sql = replace(sql, 'listed_at TIMESTAMP', 'listed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+            WHERE type = 'table' AND name = 'properties'
+        """)
+        raw.execute(f"PRAGMA schema_version = {version + 1}")
+        raw.execute("PRAGMA writable_schema = OFF")
+        raw.execute("COMMIT")
+    except BaseException:
+        raw.execute("ROLLBACK")
+        raise
+
+def _year(value):
+    return int(value[:4]) if value else None
+
+def _month(value):
+    return int(value[5:7]) if value else None
+
+# Values go in as SQLite types and DATE / TIMESTAMP / DECIMAL columns come back
+# as the same Python types mysql.connector returns
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+
+_PLACEHOLDER = re.compile(r"%s|%%")
+
+@lru_cache(maxsize=1024)
+def _translate(query):
+    return _PLACEHOLDER.sub(lambda match: "?" if match.group() == "%s" else "%", query)
+
+
+class SQLiteConnection:
+    """A sqlite3 connection with the parts of the mysql.connector API the app uses.
+
+    Every statement runs inside a transaction, opened on first use and ended
+    by commit() or rollback(), so reads and writes between two commits see
+    one snapshot and SAVEPOINTs nest inside it, as they do on InnoDB.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def cursor(self, dictionary=False, buffered=True, **kwargs):
+        return SQLiteCursor(self, dictionary)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=False):
+        self.raw.execute("SELECT 1")
+
+    def close(self):
+        self.raw.close()
+
+
+class SQLiteCursor:
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._dictionary = dictionary
+        self._cursor = conn.raw.cursor()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _begin(self):
+        if not self._conn.raw.in_transaction:
+            self._cursor.execute("BEGIN")
+
+    def execute(self, query, values=None):
+        self._begin()
+        self._cursor.execute(_translate(query), tuple(values) if values else ())
+
+    def executemany(self, query, rows):
+        self._begin()
+        self._cursor.executemany(_translate(query), rows)
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        return [self._row(row) for row in rows] if self._dictionary else rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self._dictionary:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def close(self):
+        self._cursor.close()
+
+
+class AsyncSQLiteConnection:
+    """A SQLiteConnection whose calls run on its own thread, so waiting on the file never blocks the event loop.
+
+    One thread per connection rather than a shared executor: a caller
+    waiting for the write lock must not hold up the commit() that frees it.
+    """
+
+    def __init__(self, conn, thread):
+        self.conn = conn
+        self._thread = thread
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def _run(self, query, values, fetch):
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, values)
+            if fetch:
+                return cursor.fetchall()
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+
+    def _call(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self._thread, func, *args)
+
+    async def run(self, query, values=None, fetch=False):
+        return await self._call(self._run, query, values, fetch)
+
+    async def commit(self):
+        await self._call(self.conn.commit)
+
+    async def rollback(self):
+        await self._call(self.conn.rollback)
+
+    async def close(self):
+        try:
+            await self._call(self.conn.close)
+        finally:
+            self._thread.shutdown(wait=False)
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Returns the configured backend, created from config/db_config.py on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create(db_config.DB_BACKEND)
+    return _backend
+
+def _create(name, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown database backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+def use_backend(name, **options):
+    """Switches to another backend, e.g. use_backend("sqlite", path="bench.db").
+
+    The connection pools (sync and asyncio) are emptied so every connection
+    from now on comes from the new backend. In-memory caches and indexes built from the old
+    database are not cleared; switch before using the controllers.
+    """
+    global _backend
+    from utils.async_db import reset_pools
+    from utils.db_pool import reset_pool
+
+    with _backend_lock:
+        _backend = _create(name, **options)
+    reset_pool()
+    reset_pools()
+    return _backend
@@ -1,13 +1,317 @@
-from config.db_config import get_connection
+import datetime
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from utils.db_backend import get_backend
+from utils.db_pool import pooled_connection
+
+DEADLOCK_RETRIES = 3
+DEADLOCK_BACKOFF = 0.05  # seconds before the first retry, doubled for each further one
+
+_local = threading.local()
+
+
+class Transaction:
+    """A unit of work on one pooled connection, committed once at the end.
+
+    Created by transaction(); controllers reach it through execute_query or
+    current_transaction() and never commit themselves while it is open.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 0
+        self._on_commit = []
+
+    def cursor(self, **kwargs):
+        return self.conn.cursor(**kwargs)
+
+    def execute(self, query, values=None, fetch=False):
+        """Same contract as execute_query, without the commit."""
+        cursor = self.conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, values)
+            if fetch:
+                return cursor.fetchall()
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+
+    def on_commit(self, callback):
+        """Runs callback once the outermost transaction has committed."""
+        self._on_commit.append(callback)
+
+def current_transaction():
+    """Returns the Transaction open on this thread, or None."""
+    return getattr(_local, "transaction", None)
+
+@contextmanager
+def transaction():
+    """Groups everything in the block into one transaction with a single commit.
+
+    Controller calls made inside the block (through execute_query or
+    current_transaction()) share the same pooled connection, so several of
+    them can be combined atomically:
+
+        with transaction():
+            client_id = add_client(client)
+            sale.client_id = client_id
+            add_sale(sale)
+
+    Nested blocks become savepoints: an exception escaping the inner block
+    rolls back only that block's statements. Any exception escaping the
+    outermost block rolls back everything.
+    """
+    tx = current_transaction()
+    if tx is not None:
+        tx.depth += 1
+        savepoint = f"sp_{tx.depth}"
+        cursor = tx.conn.cursor()
+        try:
+            cursor.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield tx
+            except BaseException:
+                try:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                except Exception:
+                    pass  # e.g. after a deadlock the server already rolled everything back
+                raise
+            cursor.execute(f"RELEASE SAVEPOINT {savepoint}")
+        finally:
+            cursor.close()
+            tx.depth -= 1
+        return
+
+    with pooled_connection() as conn:
+        tx = Transaction(conn)
+        _local.transaction = tx
+        try:
+            yield tx
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _local.transaction = None
+    for callback in tx._on_commit:
+        callback()
+
+def run_in_transaction(work, *args, retries=DEADLOCK_RETRIES, backoff=DEADLOCK_BACKOFF, **kwargs):
+    """Calls work(*args, **kwargs) inside transaction(), retrying deadlocks.
+
+    On a deadlock or lock wait timeout the whole unit is rolled back and run
+    again after an exponential backoff with jitter, up to `retries` times.
+    Inside an already open transaction the work just joins it; the
+    outermost run_in_transaction does the retrying.
+    """
+    if current_transaction() is not None:
+        with transaction():
+            return work(*args, **kwargs)
+
+    attempt = 0
+    while True:
+        try:
+            with transaction():
+                return work(*args, **kwargs)
+        except Exception as e:
+            if not get_backend().is_retryable(e) or attempt >= retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+def transactional(func):
+    """Decorator: runs the function through run_in_transaction."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_in_transaction(func, *args, **kwargs)
+    return wrapper
 
 def execute_query(query, values=None, fetch=False):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    # Inside transaction(): reuse its connection and leave the commit to it
+    tx = current_transaction()
+    if tx is not None:
+        return tx.execute(query, values, fetch)
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, values)
+            if fetch:
+                return cursor.fetchall()
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+
+def _select(conn, query, values):
+    cursor = conn.cursor()  # tuple rows: no dict built per row
     try:
         cursor.execute(query, values)
-        if fetch:
-            return cursor.fetchall()
-        conn.commit()
+        names = [column[0] for column in cursor.description]
+        return names, cursor.fetchall()
     finally:
         cursor.close()
-        conn.close()
+
+def fetch_rows(query, values=None):
+    """Runs a SELECT and returns (column names, list of row tuples)."""
+    tx = current_transaction()
+    if tx is not None:
+        return _select(tx.conn, query, values)
+    with pooled_connection() as conn:
+        return _select(conn, query, values)
+
+def fetch_models(table, model, conditions=(), values=()):
+    """Reads `model` objects from `table` straight from row tuples.
+
+    Only the model's COLUMNS are selected, in constructor order, so each
+    row becomes one slotted object with no intermediate dict. Use this for
+    whole-table reads; fetch_frame() is cheaper still when the caller only
+    needs columns, not objects.
+    """
+    query = f"SELECT {', '.join(model.COLUMNS)} FROM {table}{_where(conditions)}"
+    _, rows = fetch_rows(query, tuple(values) or None)
+    return list(map(model.from_row, rows))
+
+def fetch_frame(query, values=None):
+    """Runs a SELECT and returns the result as a pandas DataFrame.
+
+    DECIMAL columns become float64 and DATE/DATETIME columns datetime64,
+    so the frame holds one NumPy array per column instead of Python
+    objects per row.
+    """
+    import pandas as pd
+
+    names, rows = fetch_rows(query, values)
+    frame = pd.DataFrame.from_records(rows, columns=names, coerce_float=True)
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype != object:
+            continue
+        sample = column.dropna()
+        if sample.empty:
+            continue
+        first = sample.iloc[0]
+        if isinstance(first, Decimal):
+            frame[name] = column.astype("float64")
+        elif isinstance(first, (datetime.date, datetime.datetime)):
+            frame[name] = pd.to_datetime(column)
+    return frame
+
+class Page:
+    """One page of a keyset-paginated listing.
+
+    next_cursor / prev_cursor are the ids to pass as after_id / before_id
+    to get the following / previous page (None when there is none).
+    total_estimate is the optimizer's row estimate, not an exact count.
+    """
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total_estimate=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total_estimate = total_estimate
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+def _where(conditions):
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+def page_query(select, conditions=(), values=(), after_id=None, before_id=None, limit=100, key="id"):
+    """Returns (query, values) for one keyset page of `select`; see fetch_page()."""
+    conditions = list(conditions)
+    values = list(values)
+    if before_id is not None:
+        conditions.append(f"{key} < %s")
+        values.append(before_id)
+        order = "DESC"
+    else:
+        if after_id is not None:
+            conditions.append(f"{key} > %s")
+            values.append(after_id)
+        order = "ASC"
+
+    # Fetch one extra row to know if another page follows without a COUNT
+    query = f"{select}{_where(conditions)} ORDER BY {key} {order} LIMIT %s"
+    return query, tuple(values) + (limit + 1,)
+
+def page_rows(rows, limit, before_id=None):
+    """Splits the rows of a page_query() into (rows in ascending key order, has_more)."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before_id is not None:
+        rows.reverse()
+    return rows, has_more
+
+def fetch_page(select, conditions=(), values=(), after_id=None, before_id=None, limit=100, key="id"):
+    """Runs `select` (a SELECT ... FROM ... with no WHERE) one keyset page at a time.
+
+    Rows are ordered by `key`, which must be unique (the primary key), so
+    pages are stable while rows are inserted or deleted. Seeking with
+    `key > after_id` uses the index instead of scanning past an OFFSET.
+    Returns (rows, has_more) with rows always in ascending key order.
+    """
+    query, values = page_query(select, conditions, values, after_id, before_id, limit, key)
+    return page_rows(execute_query(query, values, fetch=True), limit, before_id)
+
+def estimate_count(table, conditions=(), values=()):
+    """Returns the optimizer's row estimate for `table` with the given filters.
+
+    On MySQL this reads index statistics through EXPLAIN, so it costs the
+    same on a thousand rows as on a million (SQLite counts exactly). Use
+    COUNT(*) when an exact number matters.
+    """
+    rows = execute_query(estimate_query(table, conditions), tuple(values) or None, fetch=True)
+    return int(rows[0]["rows"] or 0) if rows else 0
+
+def estimate_query(table, conditions=()):
+    return get_backend().estimate_query(f"SELECT * FROM {table}{_where(conditions)}")
+
+def paginate(table, model, conditions=(), values=(), after_id=None, before_id=None, limit=100, with_total=True,
+             select=None, key="id"):
+    """Builds a Page of `model` objects from `table` using keyset pagination.
+
+    select replaces the default SELECT * FROM `table`, e.g. with a join;
+    then `table` is "name alias" and key and conditions use the alias.
+    """
+    rows, has_more = fetch_page(select or f"SELECT * FROM {table}", conditions, values,
+                                after_id=after_id, before_id=before_id, limit=limit, key=key)
+    total = estimate_count(table, conditions, values) if with_total else None
+    return build_page([model.from_dict(row) for row in rows], has_more, after_id, before_id, total)
+
+def build_page(items, has_more, after_id=None, before_id=None, total=None):
+    """Wraps one page of model objects (from page_rows()) in a Page with its cursors."""
+    next_cursor = prev_cursor = None
+    if items:
+        # Going backwards, there is always a next page (the one we came from)
+        if has_more or before_id is not None:
+            next_cursor = items[-1].id
+        if after_id is not None or (before_id is not None and has_more):
+            prev_cursor = items[0].id
+    return Page(items, next_cursor, prev_cursor, total)
+
+def fetch_by_ids(select, ids, key="id", chunk_size=1000):
+    """Runs `select` (a SELECT ... FROM ... with no WHERE) for many ids at once.
+
+    Ids are de-duplicated and sent as `key IN (...)` lists of at most
+    chunk_size, so N lookups cost one round trip per chunk instead of N.
+    """
+    rows = []
+    for query, chunk in ids_queries(select, ids, key, chunk_size):
+        rows.extend(execute_query(query, chunk, fetch=True))
+    return rows
+
+def ids_queries(select, ids, key="id", chunk_size=1000):
+    """Yields the (query, values) pairs fetch_by_ids() runs."""
+    ids = list(dict.fromkeys(i for i in ids if i is not None))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        yield f"{select} WHERE {key} IN ({placeholders})", tuple(chunk)
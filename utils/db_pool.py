@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import db_config
+from utils import query_stats
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class _PoolEntry:
+    def __init__(self, conn, overflow):
+        self.conn = conn
+        self.overflow = overflow
+        self.created_at = time.monotonic()
+
+
+class ConnectionPool:
+    """Keeps database connections open so each query skips the connect/auth handshake.
+
+    Up to pool_size connections are kept idle for reuse. When they are all busy,
+    up to max_overflow extra connections are opened and closed again once
+    returned. Past that, callers wait up to timeout seconds for a free one.
+    """
+
+    def __init__(self, connect=None, pool_size=5, max_overflow=5, timeout=10,
+                 max_lifetime=1800, health_check=True, instrument=False):
+        self._connect = connect or db_config.get_connection
+        self.instrument = instrument  # wrap connections for utils.query_stats
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._idle = deque()
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "acquired": 0,
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,          # closed because max_lifetime was reached
+            "failed_checks": 0,     # closed because the ping on checkout failed
+            "overflow_created": 0,
+            "waits": 0,             # checkouts that had to wait for a free connection
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _open_entry(self, overflow):
+        conn = self._connect()
+        if self.instrument:
+            conn = query_stats.instrument(conn)
+        entry = _PoolEntry(conn, overflow)
+        with self._cond:
+            self._stats["created"] += 1
+            if overflow:
+                self._stats["overflow_created"] += 1
+        return entry
+
+    def _close_entry(self, entry, reason=None):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+            if reason:
+                self._stats[reason] += 1
+
+    def _is_expired(self, entry):
+        return self.max_lifetime and time.monotonic() - entry.created_at > self.max_lifetime
+
+    def _is_healthy(self, entry):
+        if not self.health_check:
+            return True
+        try:
+            entry.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        """Reserves a slot and returns (idle entry or None, overflow flag)."""
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                total = self._in_use + len(self._idle)
+                if self._idle:
+                    entry = self._idle.popleft()
+                    self._in_use += 1
+                    break
+                if total < self.pool_size + self.max_overflow:
+                    entry = None
+                    self._in_use += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            waited_for = time.monotonic() - start
+            self._stats["acquired"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total"] += waited_for
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited_for)
+            overflow = entry is None and total >= self.pool_size
+        return entry, overflow
+
+    def acquire(self):
+        """Returns a pool entry; pass it back to release() when done."""
+        started = time.perf_counter()
+        entry, overflow = self._checkout()
+        try:
+            if entry is not None:
+                if self._is_expired(entry):
+                    self._close_entry(entry, "recycled")
+                    entry = None
+                elif not self._is_healthy(entry):
+                    self._close_entry(entry, "failed_checks")
+                    entry = None
+            if entry is None:
+                entry = self._open_entry(overflow)
+        except Exception:
+            # Give the reserved slot back so a failed connect doesn't leak capacity
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        if self.instrument:
+            query_stats.query_stats.record_acquire(time.perf_counter() - started)
+        return entry
+
+    def release(self, entry, discard=False):
+        if not discard:
+            try:
+                # Never hand the next caller a connection with an open transaction
+                if entry.conn.in_transaction:
+                    entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            keep = (not discard
+                    and not self._is_expired(entry)
+                    and len(self._idle) < self.pool_size)
+            if keep:
+                entry.overflow = False
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if not keep:
+            self._close_entry(entry, "recycled" if self._is_expired(entry) else None)
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection.
+
+        The connection goes back to the pool on exit. Any transaction that
+        was not committed is rolled back first.
+        """
+        entry = self.acquire()
+        try:
+            yield entry.conn
+        except BaseException:
+            try:
+                entry.conn.rollback()
+                self.release(entry)
+            except Exception:
+                self.release(entry, discard=True)
+            raise
+        else:
+            self.release(entry)
+
+    def stats(self):
+        """Returns a snapshot of the pool counters and wait-time metrics."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["in_use"] = self._in_use
+            snapshot["idle"] = len(self._idle)
+        acquired = snapshot["acquired"]
+        snapshot["wait_time_avg"] = snapshot["wait_time_total"] / acquired if acquired else 0.0
+        return snapshot
+
+    def close(self):
+        """Closes every idle connection. Connections in use are closed when returned."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for entry in idle:
+            self._close_entry(entry)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns the shared pool, creating it from config/db_config.py on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    pool_size=db_config.POOL_SIZE,
+                    max_overflow=db_config.POOL_MAX_OVERFLOW,
+                    timeout=db_config.POOL_TIMEOUT,
+                    max_lifetime=db_config.POOL_MAX_LIFETIME,
+                    health_check=db_config.POOL_HEALTH_CHECK,
+                    instrument=db_config.QUERY_STATS,
+                )
+    return _pool
+
+def reset_pool():
+    """Drops the shared pool; the next get_pool() builds a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+def pooled_connection():
+    """Shortcut for get_pool().connection()."""
+    return get_pool().connection()
@@ -0,0 +1,144 @@
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from config import db_config
+from utils.async_db import current_transaction as current_async_transaction
+from utils.db_helper import current_transaction
+
+
+class EntityCache:
+    """Bounded LRU cache with a TTL for single-row lookups such as get_broker_by_id.
+
+    Keys are (kind, id) tuples where kind is the table name. Entries expire
+    after `ttl` seconds, which bounds staleness from writes made by other
+    processes. Writes made through the controllers invalidate the affected
+    keys right away. "Not found" results are cached too, so the add_*
+    functions invalidate the new row's key.
+
+    Values are copied on the way in and out, so callers can't change a
+    cached object by mutating the one they got back. Lookups made inside a
+    transaction are not cached: they can see rows that are later rolled back.
+    """
+
+    def __init__(self, max_size=1024, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._version = 0  # bumped on every invalidation, see cached()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Returns (found, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return True, copy.copy(value)
+
+    def set(self, key, value, version=None):
+        """Stores value. If `version` is given, only does so if nothing was invalidated since."""
+        value = copy.copy(value)
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, kind, entity_id):
+        with self._lock:
+            self._version += 1
+            if self._entries.pop((kind, entity_id), None) is not None:
+                self._stats["invalidations"] += 1
+        self._again_on_commit(self.invalidate, kind, entity_id)
+
+    def invalidate_kind(self, kind):
+        """Drops every cached row of one table (used when a write can touch many rows)."""
+        self._drop_kind(kind)
+        self._again_on_commit(self._drop_kind, kind)
+
+    def _again_on_commit(self, invalidate, *args):
+        # Inside a transaction, another thread can still read the old committed
+        # row and cache it before we commit, so invalidate once more afterwards.
+        tx = current_transaction()
+        if tx is not None:
+            tx.on_commit(lambda: invalidate(*args))
+
+    def _drop_kind(self, kind):
+        with self._lock:
+            self._version += 1
+            keys = [key for key in self._entries if key[0] == kind]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+    def cached(self, kind):
+        """Decorator for a lookup function taking a single id."""
+        def decorator(load):
+            @functools.wraps(load)
+            def wrapper(entity_id):
+                key = (kind, entity_id)
+                found, value = self.get(key)
+                if found:
+                    return value
+                with self._lock:
+                    version = self._version
+                value = load(entity_id)
+                # Not cached if something was invalidated while loading:
+                # the value read may predate that write.
+                if current_transaction() is None:
+                    self.set(key, value, version=version)
+                return value
+            wrapper.uncached = load
+            return wrapper
+        return decorator
+
+    def cached_async(self, kind):
+        """cached() for a coroutine function taking a single id (see controllers/async_controller.py)."""
+        def decorator(load):
+            @functools.wraps(load)
+            async def wrapper(entity_id):
+                key = (kind, entity_id)
+                found, value = self.get(key)
+                if found:
+                    return value
+                with self._lock:
+                    version = self._version
+                value = await load(entity_id)
+                if current_async_transaction() is None:
+                    self.set(key, value, version=version)
+                return value
+            wrapper.uncached = load
+            return wrapper
+        return decorator
+
+
+entity_cache = EntityCache(max_size=db_config.ENTITY_CACHE_SIZE, ttl=db_config.ENTITY_CACHE_TTL)
@@ -0,0 +1,148 @@
+"""Fails if a controller query has to scan a whole table.
+
+Each read function in CHECKS is called with its execute_query swapped for a
+recorder, so the SQL checked is exactly what the controller sends. Every
+recorded SELECT is then run through EXPLAIN on the configured database.
+A table read with access type ALL and no usable index is a failure. If an
+index exists but the optimizer still chose a scan (usual on near-empty
+tables), it is only reported as a warning. A keyset page (ORDER BY id ...
+LIMIT) that has to sort the matching rows also fails: it should read the
+next rows of an index in order. Run it against a database with realistic
+data. On SQLite, EXPLAIN QUERY PLAN is used and every plain "SCAN table" is
+a failure (it doesn't say which indexes were considered).
+
+Usage:
+    python -m utils.explain_check
+"""
+import datetime
+import re
+import sys
+from contextlib import contextmanager
+
+from controllers import broker_controller, change_controller, client_controller
+from controllers import property_controller, sale_controller
+from utils import db_helper
+from utils.db_backend import get_backend
+from utils.db_helper import execute_query
+
+# (controller module, function name, args, kwargs)
+CHECKS = [
+    (broker_controller, "get_broker_by_id", (1,), {}),
+    (broker_controller, "get_broker_sales", (1,), {}),
+    (broker_controller, "get_brokers_page", (), {"after_id": 1}),
+    (client_controller, "get_client_by_id", (1,), {}),
+    (client_controller, "get_client_sales", (1,), {}),
+    (client_controller, "get_clients_by_broker_id", (1,), {}),
+    (client_controller, "get_clients_page", (), {"after_id": 1, "broker_id": 1}),
+    (property_controller, "get_property_by_id", (1,), {}),
+    (property_controller, "get_available_properties", (), {}),
+    (property_controller, "get_property_sales", (1,), {}),
+    (property_controller, "get_properties_page", (), {"after_id": 1, "status": "available"}),
+    (sale_controller, "get_sale_by_id", (1,), {}),
+    (sale_controller, "get_sales_by_broker_id", (1,), {}),
+    (sale_controller, "get_sales_by_date_range", (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)), {}),
+    (sale_controller, "get_sales_page", (), {"after_id": 1, "broker_id": 1}),
+    (sale_controller, "get_sale_details_page", (), {"after_id": 1}),
+    (sale_controller, "get_sale_details_page", (), {"after_id": 1, "broker_id": 1}),
+    (sale_controller, "sales_summary", (), {"group_by": "type", "date_range": (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))}),
+    (property_controller, "inventory_summary", (), {"status": "available"}),
+    (property_controller, "find_properties", (), {"filters": {"type": "apartment", "location": "Maadi", "max_price": 2000000}, "sort": "price"}),
+    (property_controller, "find_properties", (), {"filters": {"status": "available", "min_price": 1000000}, "sort": "-price", "page": ("after", 1500000, 1)}),
+    (property_controller, "find_properties", (), {"filters": {"broker_id": 1, "status": "available"}, "sort": "price"}),
+    (property_controller, "find_properties", (), {"filters": {"broker_id": 1}}),
+    (property_controller, "find_properties", (), {"filters": {"location": "Maadi"}, "sort": "location"}),
+    (property_controller, "find_properties", (), {"filters": {"max_price": 2000000}, "sort": "price"}),
+    (property_controller, "get_properties_page", (), {"after_id": 1, "broker_id": 1}),
+    (change_controller, "get_changes_since", (1,), {"tables": ["sales"]}),
+]
+
+# EXPLAIN QUERY PLAN detail of a full table read; index scans say "USING ... INDEX"
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+# Keyset pages in id order (db_helper.paginate)
+_ID_PAGE = re.compile(r"\bORDER BY (?:\w+\.)?id\b(?: ASC| DESC)?\s+LIMIT\b", re.IGNORECASE)
+
+@contextmanager
+def _recording(modules):
+    """Swaps execute_query in the given modules (and db_helper.fetch_rows) for recorders.
+
+    Row estimates (estimate_count) are left out: on MySQL they are EXPLAINs,
+    on SQLite an exact count that reads the table by design.
+    """
+    recorded = []
+
+    def recorder(query, values=None, fetch=False):
+        recorded.append((query, values))
+        return []
+
+    def rows_recorder(query, values=None):
+        recorded.append((query, values))
+        return [], []
+
+    replacements = {"execute_query": recorder, "fetch_rows": rows_recorder, "estimate_count": lambda *args: 0}
+    originals = [(module, "execute_query", module.execute_query) for module in modules]
+    originals.append((db_helper, "fetch_rows", db_helper.fetch_rows))
+    originals.extend((module, "estimate_count", module.estimate_count)
+                     for module in modules if hasattr(module, "estimate_count"))
+    for module, name, _ in originals:
+        setattr(module, name, replacements[name])
+    try:
+        yield recorded
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+def capture_queries(module, name, args, kwargs):
+    """Returns the SELECT statements a controller function issues."""
+    # paginate()/fetch_page()/fetch_models() live in db_helper, so record there too
+    with _recording([module, db_helper]) as recorded:
+        getattr(module, name)(*args, **kwargs)
+    return [(query, values) for query, values in recorded
+            if query.lstrip().upper().startswith("SELECT")]
+
+def explain(query, values):
+    if get_backend().name == "sqlite":
+        return execute_query("EXPLAIN QUERY PLAN " + query, values, fetch=True)
+    return execute_query("EXPLAIN " + query, values, fetch=True)
+
+def full_scans(query, values):
+    """Returns [(table, possible_keys)] for the tables `query` reads in full."""
+    if get_backend().name == "sqlite":
+        matches = (_SQLITE_SCAN.match(row["detail"]) for row in explain(query, values))
+        return [(match.group(1), None) for match in matches if match]
+    return [(row.get("table"), row.get("possible_keys"))
+            for row in explain(query, values) if row.get("type") == "ALL"]
+
+def sorts(query, values):
+    """True if `query` sorts its rows instead of reading them in index order."""
+    if get_backend().name == "sqlite":
+        return any(row["detail"].startswith("USE TEMP B-TREE FOR ORDER BY") for row in explain(query, values))
+    return any("Using filesort" in (row.get("Extra") or "") for row in explain(query, values))
+
+def run_checks(log=print):
+    """Runs every check. Returns the list of failures as (function, table, query)."""
+    failures = []
+    for module, name, args, kwargs in CHECKS:
+        for query, values in capture_queries(module, name, args, kwargs):
+            for table, possible_keys in full_scans(query, values):
+                if possible_keys:
+                    log(f"warning  {name}: full scan of {table} although {possible_keys} could be used")
+                else:
+                    log(f"FAIL     {name}: full scan of {table}, no usable index")
+                    failures.append((name, table, " ".join(query.split())))
+            if _ID_PAGE.search(query) and sorts(query, values):
+                log(f"FAIL     {name}: sorts every matching row for one page")
+                failures.append((name, None, " ".join(query.split())))
+        log(f"checked  {name}")
+    return failures
+
+def main():
+    failures = run_checks()
+    if failures:
+        print(f"\n{len(failures)} controller queries scan a whole table:")
+        for name, table, query in failures:
+            print(f"  {name} ({table}): {query}")
+        sys.exit(1)
+    print("\nNo full table scans.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Applies the numbered SQL files in migrations/ to the configured database.
+
+Usage:
+    python -m utils.migrate            # apply everything pending
+    python -m utils.migrate --status   # list applied / pending migrations
+    python -m utils.migrate --to 3     # apply up to and including 003_*.sql
+"""
+import argparse
+import os
+import re
+
+from utils.db_backend import get_backend
+from utils.db_pool import pooled_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+# Errors meaning "this change is already in place". MySQL DDL can't be rolled
+# back and has no ADD COLUMN/INDEX IF NOT EXISTS, so these are skipped to let
+# migrations run against databases created from schema.sql or changed by hand.
+ALREADY_APPLIED_ERRORS = {
+    1050,  # table already exists
+    1060,  # duplicate column name
+    1061,  # duplicate key name
+    1826,  # duplicate foreign key constraint name
+    1359,  # trigger already exists
+    1091,  # can't drop: index or column already gone
+}
+
+LOCK_NAME = "real_estate_db_migrations"
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Returns [(version, name, path)] for every NNN_name.sql file, in order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = re.match(r"^(\d+)_(.+)\.sql$", filename)
+        if match:
+            migrations.append((int(match.group(1)), filename, os.path.join(directory, filename)))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration numbers in {directory}")
+    return migrations
+
+def split_statements(sql):
+    """Splits a migration file into statements, dropping -- comment lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def get_applied_versions(cursor):
+    _ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def _apply(cursor, statements):
+    skipped = 0
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except Exception as e:
+            if getattr(e, "errno", None) in ALREADY_APPLIED_ERRORS:
+                skipped += 1
+                continue
+            raise
+    return skipped
+
+def migrate(target=None, dry_run=False, log=print):
+    """Applies pending migrations up to `target` (all if None). Returns the versions applied."""
+    if not get_backend().migrations:
+        log(f"The {get_backend().name} backend creates its schema on first connect; nothing to migrate.")
+        return []
+    applied_now = []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Serialize concurrent runners (e.g. two app instances starting at once)
+            cursor.execute("SELECT GET_LOCK(%s, 60)", (LOCK_NAME,))
+            if cursor.fetchone()[0] != 1:
+                raise RuntimeError("Another migration run holds the migration lock")
+            try:
+                applied = get_applied_versions(cursor)
+                for version, name, path in discover_migrations():
+                    if version in applied or (target is not None and version > target):
+                        continue
+                    with open(path, encoding="utf-8") as f:
+                        statements = split_statements(f.read())
+                    if dry_run:
+                        log(f"would apply {name} ({len(statements)} statements)")
+                        continue
+                    skipped = _apply(cursor, statements)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (version, name)
+                    )
+                    conn.commit()
+                    applied_now.append(version)
+                    note = f", {skipped} already in place" if skipped else ""
+                    log(f"applied {name} ({len(statements)} statements{note})")
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                cursor.fetchone()
+        finally:
+            cursor.close()
+    return applied_now
+
+def status():
+    """Returns [(version, name, applied)] for every migration file."""
+    if not get_backend().migrations:
+        return [(version, name, True) for version, name, _ in discover_migrations()]
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            applied = get_applied_versions(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+    return [(version, name, version in applied) for version, name, _ in discover_migrations()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--to", type=int, dest="target", help="apply migrations up to this number")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be applied")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for version, name, applied in status():
+            print(f"{'applied' if applied else 'pending':8} {name}")
+        return
+
+    applied = migrate(target=args.target, dry_run=args.dry_run)
+    if not applied and not args.dry_run:
+        print("Database is up to date.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Per-statement instrumentation for every query the app sends.
+
+Pooled connections are wrapped (see ConnectionPool) so each cursor times its
+statements, whichever path sent them: execute_query, fetch_rows, an open
+Transaction, the streaming exporter or a raw cursor. For each query shape
+(the SQL with whitespace and IN lists normalized) and the controller
+function that issued it, this records calls, errors, rows returned or
+affected, total and maximum time and a latency histogram. Connection
+acquire time from the pool gets its own histogram.
+
+Statements slower than SLOW_QUERY_SECONDS (config/db_config.py) are logged
+to the "real_estate.slow_queries" logger, with parameter values replaced by
+their types. Read the numbers with snapshot() / by_caller(), or serve them
+in Prometheus text format with start_metrics_server(port).
+"""
+import bisect
+import logging
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import db_config
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_query_log = logging.getLogger("real_estate.slow_queries")
+
+_SPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_SAVEPOINT = re.compile(r"\b(SAVEPOINT) sp_\d+", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def query_shape(query):
+    """The query with runs of whitespace and IN (%s, %s, ...) lists collapsed."""
+    shape = _SPACE.sub(" ", query).strip()
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _SAVEPOINT.sub(r"\1 sp_N", shape)
+
+def redact(values):
+    """Parameter values replaced by their type names, for logs."""
+    if values is None:
+        return "()"
+    if isinstance(values, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in values.items()) + "}"
+    return "(" + ", ".join(f"<{type(value).__name__}>" for value in values) + ")"
+
+def _caller():
+    """The outermost controllers.* function on the stack, e.g. 'sale_controller.add_sale'.
+
+    Awaiting coroutines are on the stack too, so this works for the asyncio layer.
+    """
+    caller = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("controllers."):
+            caller = f"{module[len('controllers.'):]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return caller or "other"
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last one is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile q (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class _ShapeStats:
+    __slots__ = ("calls", "errors", "rows", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.latency = _Histogram()
+
+
+class QueryStats:
+    """Thread-safe counters per (caller, query shape), plus connection acquire times."""
+
+    def __init__(self, slow_query_seconds=None):
+        self.slow_query_seconds = slow_query_seconds
+        self._shapes = {}
+        self._acquire = _Histogram()
+        self._lock = threading.Lock()
+
+    def record(self, caller, query, values, seconds, rows, error=False):
+        shape = query_shape(query)
+        with self._lock:
+            stats = self._shapes.get((caller, shape))
+            if stats is None:
+                stats = self._shapes[(caller, shape)] = _ShapeStats()
+            stats.calls += 1
+            stats.rows += rows
+            if error:
+                stats.errors += 1
+            stats.latency.add(seconds)
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            slow_query_log.warning("%.1f ms, %d rows, %s: %s params=%s",
+                                   seconds * 1000, rows, caller, shape, redact(values))
+
+    def record_acquire(self, seconds):
+        with self._lock:
+            self._acquire.add(seconds)
+
+    def snapshot(self):
+        """Returns one dict per (caller, query shape), most total time first."""
+        with self._lock:
+            items = [(key, stats.calls, stats.errors, stats.rows, stats.latency.total, stats.latency.max,
+                      stats.latency.quantile(0.5), stats.latency.quantile(0.99))
+                     for key, stats in self._shapes.items()]
+        result = [
+            {
+                "caller": caller,
+                "query": shape,
+                "calls": calls,
+                "errors": errors,
+                "rows": rows,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / calls,
+                "max_ms": max_ * 1000,
+                "p50_ms": p50 * 1000,  # bucket upper bounds, not exact
+                "p99_ms": p99 * 1000,
+            }
+            for (caller, shape), calls, errors, rows, total, max_, p50, p99 in items
+        ]
+        result.sort(key=lambda row: row["total_ms"], reverse=True)
+        return result
+
+    def by_caller(self):
+        """Returns per controller function totals, most total time first."""
+        totals = {}
+        for row in self.snapshot():
+            entry = totals.setdefault(row["caller"], {"caller": row["caller"], "statements": 0,
+                                                      "errors": 0, "rows": 0, "total_ms": 0.0})
+            entry["statements"] += row["calls"]
+            entry["errors"] += row["errors"]
+            entry["rows"] += row["rows"]
+            entry["total_ms"] += row["total_ms"]
+        return sorted(totals.values(), key=lambda entry: entry["total_ms"], reverse=True)
+
+    def acquire_stats(self):
+        with self._lock:
+            histogram = self._acquire
+            return {
+                "acquired": histogram.count,
+                "total_ms": histogram.total * 1000,
+                "max_ms": histogram.max * 1000,
+                "p50_ms": histogram.quantile(0.5) * 1000,
+                "p99_ms": histogram.quantile(0.99) * 1000,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self._acquire = _Histogram()
+
+    def prometheus_text(self):
+        """All counters in the Prometheus text exposition format."""
+        with self._lock:
+            shapes = [(key, stats.calls, stats.errors, stats.rows, list(stats.latency.counts),
+                       stats.latency.total, stats.latency.count) for key, stats in self._shapes.items()]
+            acquire = (list(self._acquire.counts), self._acquire.total, self._acquire.count)
+
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, labels, counts, total, count):
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {total}")
+            lines.append(f"{name}_count{suffix} {count}")
+
+        labels = {key: f'caller="{_escape(key[0])}",query="{_escape(key[1])}"' for key, *_ in shapes}
+        for name, index, text in (("real_estate_queries_total", 1, "Statements executed."),
+                                  ("real_estate_query_errors_total", 2, "Statements that raised an error."),
+                                  ("real_estate_query_rows_total", 3, "Rows returned or affected.")):
+            header(name, "counter", text)
+            for shape in shapes:
+                lines.append(f"{name}{{{labels[shape[0]]}}} {shape[index]}")
+        header("real_estate_query_duration_seconds", "histogram", "Statement latency, including fetching the rows.")
+        for key, _, _, _, counts, total, count in shapes:
+            histogram("real_estate_query_duration_seconds", labels[key], counts, total, count)
+        header("real_estate_connection_acquire_seconds", "histogram", "Time to get a connection from the pool.")
+        histogram("real_estate_connection_acquire_seconds", "", *acquire)
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class InstrumentedCursor:
+    """Wraps a DB-API cursor; a statement's time runs from execute() to the next execute() or close()."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._current = None  # (caller, query, values) of the statement being fetched
+        self._seconds = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _finish(self):
+        if self._current is not None:
+            caller, query, values = self._current
+            self._current = None
+            self._stats.record(caller, query, values, self._seconds, self._rows)
+
+    def _run(self, method, query, values, rows):
+        self._finish()
+        caller = _caller()
+        started = time.perf_counter()
+        try:
+            method(query, values)
+        except Exception:
+            self._stats.record(caller, query, values, time.perf_counter() - started, 0, error=True)
+            raise
+        self._seconds = time.perf_counter() - started
+        if rows is None:
+            # Writes report affected rows; SELECT rows are counted as they are fetched
+            rows = 0 if self._cursor.description is not None else max(self._cursor.rowcount, 0)
+        self._rows = rows
+        self._current = (caller, query, values)
+
+    def execute(self, query, values=None):
+        self._run(self._cursor.execute, query, values, None)
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        self._run(self._cursor.executemany, query, rows, len(rows))
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=1):
+        rows = self._fetch(self._cursor.fetchmany, size)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+
+class InstrumentedConnection:
+    """Wraps a connection so every cursor it opens is an InstrumentedCursor."""
+
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats)
+
+
+query_stats = QueryStats(slow_query_seconds=db_config.SLOW_QUERY_SECONDS)
+
+def instrument(conn):
+    return InstrumentedConnection(conn, query_stats)
+
+def record(query, values, seconds, rows, error=False):
+    """Records one statement sent without an instrumented cursor (the asyncio layer)."""
+    query_stats.record(_caller(), query, values, seconds, rows, error)
+
+def snapshot():
+    return query_stats.snapshot()
+
+def by_caller():
+    return query_stats.by_caller()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = query_stats.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes are not worth a line each
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serves /metrics in Prometheus text format from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,221 @@
+import bisect
+import re
+import threading
+from array import array
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+# Score multipliers for how a query term matched an indexed term
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+MAX_EXPANSIONS = 100  # indexed terms tried per query term for prefix / typo matches
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower()) if text else []
+
+def _deletes(term):
+    """The term with each one of its characters removed."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+    return a[i:] == b[i + 1:]
+
+
+class InvertedIndex:
+    """In-memory full-text index with prefix and one-typo matching.
+
+    Documents are (id, text) pairs. Every query term must match (AND); a
+    term matches an indexed term exactly, as a prefix (2+ characters) or
+    within one edit (4+ characters). Results are ranked by the sum over
+    query terms of match quality times IDF, divided by a mild document
+    length penalty, then by id.
+
+    Each document gets a slot number and posting lists are growable arrays
+    of slots, so scoring a query is a few NumPy operations whatever the
+    number of matches. Removing or replacing a document only marks its old
+    slot dead; compact() reclaims dead slots once they pile up. Typo lookup
+    uses the single-deletion neighbourhood of each indexed term, so the
+    query is never compared with the whole vocabulary. Thread-safe.
+    """
+
+    def __init__(self):
+        self._slots = {}              # doc id -> slot
+        self._ids = array("q")        # slot -> doc id
+        self._lengths = array("f")    # slot -> number of tokens
+        self._alive = bytearray()     # slot -> 1 while the slot holds the current version
+        self._dead = 0
+        self._postings = {}           # term -> array of slots
+        self._vocabulary = []         # sorted terms, for prefix lookups
+        self._neighbours = {}         # term with one character deleted -> set of terms
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._slots
+
+    def add(self, doc_id, text):
+        """Indexes a document, replacing any previous version of it."""
+        with self._lock:
+            for term in self._add(doc_id, text):
+                bisect.insort(self._vocabulary, term)
+
+    def add_many(self, documents):
+        """add() for many (doc_id, text) pairs, e.g. the initial load.
+
+        The vocabulary is sorted once at the end instead of once per new term.
+        """
+        with self._lock:
+            new_terms = []
+            for doc_id, text in documents:
+                new_terms.extend(self._add(doc_id, text))
+            if new_terms:
+                self._vocabulary.extend(new_terms)
+                self._vocabulary.sort()
+
+    def _add(self, doc_id, text):
+        """Indexes a document; returns the terms it adds, left out of the sorted vocabulary."""
+        tokens = tokenize(text)
+        self._remove(doc_id)
+        slot = len(self._ids)
+        self._slots[doc_id] = slot
+        self._ids.append(doc_id)
+        self._lengths.append(len(tokens))
+        self._alive.append(1)
+        new_terms = []
+        for term in dict.fromkeys(tokens):
+            slots = self._postings.get(term)
+            if slots is None:
+                slots = self._postings[term] = array("i")
+                new_terms.append(term)
+                for variant in _deletes(term):
+                    self._neighbours.setdefault(variant, set()).add(term)
+            slots.append(slot)
+        return new_terms
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+            if self._dead > max(10000, len(self._slots)):
+                self.compact()
+
+    def _remove(self, doc_id):
+        slot = self._slots.pop(doc_id, None)
+        if slot is not None:
+            self._alive[slot] = 0
+            self._dead += 1
+
+    def compact(self):
+        """Drops dead slots and terms only they used. Slots are renumbered."""
+        with self._lock:
+            if not self._dead:
+                return
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            for term in list(self._postings):
+                slots = np.frombuffer(self._postings[term], dtype=np.int32)
+                kept = renumber[slots[alive[slots]]].astype(np.int32)
+                if len(kept):
+                    self._postings[term] = array("i", kept.tobytes())
+                else:
+                    self._drop_term(term)
+            ids = np.frombuffer(self._ids, dtype=np.int64)[alive]
+            lengths = np.frombuffer(self._lengths, dtype=np.float32)[alive]
+            self._ids = array("q", ids.tobytes())
+            self._lengths = array("f", lengths.tobytes())
+            self._alive = bytearray(b"\x01" * len(ids))
+            self._slots = {int(doc_id): slot for slot, doc_id in enumerate(ids.tolist())}
+            self._dead = 0
+
+    def _drop_term(self, term):
+        del self._postings[term]
+        del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+        for variant in _deletes(term):
+            neighbours = self._neighbours[variant]
+            neighbours.discard(term)
+            if not neighbours:
+                del self._neighbours[variant]
+
+    def _expand(self, term):
+        """Returns {indexed term: weight} for everything `term` matches."""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT
+        if len(term) >= 2:
+            start = bisect.bisect_left(self._vocabulary, term)
+            for candidate in self._vocabulary[start:start + MAX_EXPANSIONS]:
+                if not candidate.startswith(term):
+                    break
+                matches.setdefault(candidate, PREFIX)
+        if len(term) >= 4:
+            candidates = set(self._neighbours.get(term, ()))
+            for variant in _deletes(term):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._neighbours.get(variant, ()))
+            for candidate in candidates:
+                if candidate not in matches and _within_one_edit(term, candidate):
+                    matches[candidate] = FUZZY
+        return matches
+
+    def search(self, query, limit=None, within=None):
+        """Returns [(doc_id, score)] best first.
+
+        within, an iterable of doc ids, restricts the results to those
+        documents (e.g. one broker's clients).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            size = len(self._ids)
+            if not self._slots:
+                return []
+            live = len(self._slots)
+            matched = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            total = np.zeros(size, dtype=np.float32)
+            for term in terms:
+                matches = self._expand(term)
+                if not matches:
+                    return []
+                scores = np.zeros(size, dtype=np.float32)
+                # Lowest weight first, so a slot ends up with its best match's score
+                for indexed, weight in sorted(matches.items(), key=lambda item: item[1]):
+                    slots = np.frombuffer(self._postings[indexed], dtype=np.int32)
+                    scores[slots] = weight * np.log1p(live / len(slots))
+                matched &= scores > 0
+                total += scores
+            if within is not None:
+                allowed = np.zeros(size, dtype=bool)
+                allowed[[self._slots[doc_id] for doc_id in within if doc_id in self._slots]] = True
+                matched &= allowed
+
+            slots = np.flatnonzero(matched)
+            ids = np.frombuffer(self._ids, dtype=np.int64)[slots]
+            lengths = np.frombuffer(self._lengths, dtype=np.float32)[slots]
+            scores = total[slots] / (1 + 0.1 * lengths)
+
+        if limit is not None and len(slots) > limit:
+            # Keep everything scoring at least the limit-th best, so ties are cut by id below
+            cutoff = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores >= cutoff
+            ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((ids, -scores))
+        if limit is not None:
+            order = order[:limit]
+        return list(zip(ids[order].tolist(), scores[order].astype(float).tolist()))